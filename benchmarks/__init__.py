@@ -0,0 +1,39 @@
+"""
+Benchmarks Init
+"""
+
+import os
+import statistics
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Cargar las variables de entorno
+config = {
+    "api_base_url": os.getenv("API_BASE_URL", "http://127.0.0.1:8000"),
+    "password": os.getenv("PASSWORD"),
+    "timeout": int(os.getenv("TIMEOUT", "10")),
+    "username": os.getenv("USERNAME"),
+}
+
+
+def get_token() -> str:
+    """Hacer el login a la API y entregar el token"""
+    response = requests.post(
+        url=f"{config['api_base_url']}/token",
+        data={"grant_type": "password", "username": config["username"], "password": config["password"]},
+        timeout=config["timeout"],
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentiles(tiempos: list[float]) -> dict:
+    """Entregar p50, p90 y p99 en milisegundos"""
+    if len(tiempos) < 2:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+    cuantiles = statistics.quantiles(tiempos, n=100)
+    return {"p50": cuantiles[49] * 1000, "p90": cuantiles[89] * 1000, "p99": cuantiles[98] * 1000}
@@ -0,0 +1,101 @@
+"""
+Benchmark Compresión
+
+Trae de la API respuestas sin comprimir, páginas de 1, 10 y 100 registros y el flujo de /export,
+y mide por tamaño de respuesta y codificación los bytes que se ahorran y los milisegundos de CPU que cuesta comprimir,
+con los mismos compresores y niveles del middleware. El flujo se comprime por lotes, como lo hace el middleware.
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import requests
+
+from benchmarks import config, get_token
+from pjecz_hercules_api_oauth2.config.settings import get_settings
+from pjecz_hercules_api_oauth2.dependencies.compression import available_encodings
+
+# Límite superior en bytes de cada grupo de tamaños
+GRUPOS = [(1_000, "< 1 KB"), (10_000, "1-10 KB"), (100_000, "10-100 KB"), (1_000_000, "100 KB-1 MB"), (None, ">= 1 MB")]
+
+
+def grupo(cantidad: int) -> str:
+    """Nombre del grupo de tamaño"""
+    return next(nombre for limite, nombre in GRUPOS if limite is None or cantidad < limite)
+
+
+def traer(token: str, url: str, params: dict) -> bytes:
+    """Traer el contenido sin comprimir"""
+    response = requests.get(
+        url=url,
+        headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"},
+        params=params,
+        timeout=config["timeout"],
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def comprimir(compresor_clase, nivel: int, partes: list[bytes]) -> tuple[int, float]:
+    """Comprimir las partes, entregar los bytes comprimidos y los milisegundos de CPU"""
+    inicio = time.process_time()
+    compresor = compresor_clase(nivel)
+    cantidad = sum(len(compresor.comprimir(parte, terminar=i == len(partes) - 1)) for i, parte in enumerate(partes))
+    return cantidad, (time.process_time() - inicio) * 1000
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Bytes ahorrados y CPU por tamaño de respuesta y codificación")
+    parser.add_argument("--rutas", default="/api/v5/sentencias,/api/v5/edictos,/api/v5/listas_de_acuerdos", help="Rutas")
+    parser.add_argument("--limits", default="1,10,100", help="Registros por página, separados por comas")
+    parser.add_argument("--lote", type=int, default=1000, help="Líneas por parte del flujo de /export")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Compresiones por respuesta")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    niveles = {
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }
+    token = get_token()
+
+    # Respuestas como listas de partes, una sola parte en las páginas y lotes de líneas en el flujo
+    respuestas = []
+    for ruta in args.rutas.split(","):
+        url = f"{config['api_base_url']}{ruta}"
+        for limit in args.limits.split(","):
+            respuestas.append(("página", [traer(token, url, {"limit": limit})]))
+        lineas = traer(token, f"{url}/export", {}).splitlines(keepends=True)
+        respuestas.append(("flujo", [b"".join(lineas[i : i + args.lote]) for i in range(0, len(lineas), args.lote)]))
+
+    # Acumular por grupo y codificación
+    totales = defaultdict(lambda: [0, 0, 0, 0.0])  # Respuestas, bytes, comprimidos, ms
+    for tipo, partes in respuestas:
+        tamano = grupo(sum(len(parte) for parte in partes))
+        for codificacion, compresor_clase in available_encodings().items():
+            for _ in range(args.repeticiones):
+                comprimidos, ms = comprimir(compresor_clase, niveles[codificacion], partes)
+                total = totales[(tamano, tipo, codificacion)]
+                total[0] += 1
+                total[1] += sum(len(parte) for parte in partes)
+                total[2] += comprimidos
+                total[3] += ms
+
+    print(
+        f"{'tamaño':12} {'tipo':7} {'codificación':12} {'bytes':>10} {'comprimido':>10} {'ahorro %':>9} {'ms CPU':>8} {'MB/s':>8}"
+    )
+    orden = [nombre for _, nombre in GRUPOS]
+    for (tamano, tipo, codificacion), (cantidad, crudos, comprimidos, ms) in sorted(
+        totales.items(), key=lambda elemento: (orden.index(elemento[0][0]), elemento[0][1:])
+    ):
+        print(
+            f"{tamano:12} {tipo:7} {codificacion:12} {crudos // cantidad:10} {comprimidos // cantidad:10} "
+            f"{100 * (1 - comprimidos / crudos):9.1f} {ms / cantidad:8.3f} {crudos / 1_000_000 / (ms / 1000 or 1e-9):8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
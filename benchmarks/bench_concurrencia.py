@@ -0,0 +1,150 @@
+"""
+Benchmark Concurrencia
+
+Muchos clientes concurrentes consultando listados y detalles,
+mide las solicitudes por segundo y la latencia de cada ruta.
+
+Con --modo sesiones no pasa por la API, consulta las mismas páginas directo a la base de datos
+con las sesiones síncronas en hilos, como se atendían las rutas, y con las asíncronas en el ciclo de eventos.
+Se conecta con el mismo .env que la API.
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from sqlalchemy import select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from benchmarks import config, get_token, percentiles
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine, async_session_maker, engine, session_maker
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.autoridades import Autoridad
+from pjecz_hercules_api_oauth2.models.distritos import Distrito
+from pjecz_hercules_api_oauth2.models.edictos import Edicto
+from pjecz_hercules_api_oauth2.models.listas_de_acuerdos import ListaDeAcuerdo
+from pjecz_hercules_api_oauth2.models.sentencias import Sentencia
+
+RUTAS = [
+    "/api/v5/distritos",
+    "/api/v5/autoridades",
+    "/api/v5/sentencias?limit=100",
+    "/api/v5/edictos?limit=100",
+    "/api/v5/listas_de_acuerdos?limit=100",
+]
+
+# Modelos de las mismas rutas para el modo sesiones
+MODELOS = {
+    "distritos": Distrito,
+    "autoridades": Autoridad,
+    "sentencias": Sentencia,
+    "edictos": Edicto,
+    "listas_de_acuerdos": ListaDeAcuerdo,
+}
+
+
+def consultar(sesion: requests.Session, token: str, ruta: str) -> tuple[str, float, int]:
+    """Hacer un GET y entregar la ruta, el tiempo en segundos y el código de estado"""
+    inicio = time.perf_counter()
+    response = sesion.get(
+        url=f"{config['api_base_url']}{ruta}",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=config["timeout"],
+    )
+    return ruta, time.perf_counter() - inicio, response.status_code
+
+
+def mostrar(titulo: str, nombres: list[str], resultados: list[tuple[str, float, int]], duracion: float) -> None:
+    """Mostrar las solicitudes por segundo y los percentiles por ruta"""
+    errores = sum(1 for _, _, codigo in resultados if codigo != 200)
+    print(f"{titulo} solicitudes={len(resultados)} errores={errores} {len(resultados) / duracion:.1f} req/s")
+    for nombre in nombres + ["Todas"]:
+        tiempos = [tiempo for r, tiempo, _ in resultados if nombre in (r, "Todas")]
+        valores = percentiles(tiempos)
+        print(
+            f"{nombre:40} n={len(tiempos):5} p50={valores['p50']:8.1f} ms p90={valores['p90']:8.1f} ms p99={valores['p99']:8.1f} ms"
+        )
+
+
+def con_http(args) -> None:
+    """Consultar las rutas de la API con clientes en hilos"""
+    token = get_token()
+    sesion = requests.Session()
+    sesion.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.clientes))
+    sesion.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=args.clientes))
+
+    # Repartir las solicitudes entre las rutas
+    rutas = [RUTAS[i % len(RUTAS)] for i in range(args.solicitudes)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clientes) as executor:
+        resultados = list(executor.map(lambda ruta: consultar(sesion, token, ruta), rutas))
+    mostrar(f"http clientes={args.clientes}", RUTAS, resultados, time.perf_counter() - inicio)
+
+
+def con_sesiones(args) -> None:
+    """Consultar las mismas páginas con las sesiones síncronas y con las asíncronas"""
+    # Las páginas de 100 registros de cada ruta, con sus relaciones y sin las columnas RAG
+    consultas = {}
+    for nombre, modelo in MODELOS.items():
+        opciones = [*getattr(modelo, "load_options", list)(), *getattr(modelo, "defer_rag_options", list)()]
+        consultas[nombre] = select(modelo).options(*opciones).filter(modelo.estatus == "A").order_by(modelo.id).limit(100)
+    nombres = [list(consultas)[i % len(consultas)] for i in range(args.solicitudes)]
+
+    def consultar_sincrona(nombre: str) -> tuple[str, float, int]:
+        """Consultar con una sesión síncrona, en un hilo"""
+        inicio = time.perf_counter()
+        try:
+            with session_maker() as database:
+                database.execute(consultas[nombre]).unique().scalars().all()
+        except PoolTimeoutError:
+            # Se cuenta como error, igual que el 503 que entrega la API
+            return nombre, time.perf_counter() - inicio, 503
+        return nombre, time.perf_counter() - inicio, 200
+
+    async def consultar_asincrona(semaforo: asyncio.Semaphore, nombre: str) -> tuple[str, float, int]:
+        """Consultar con una sesión asíncrona, hasta tantos clientes a la vez"""
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                async with async_session_maker() as database:
+                    (await database.execute(consultas[nombre])).unique().scalars().all()
+            except PoolTimeoutError:
+                return nombre, time.perf_counter() - inicio, 503
+            return nombre, time.perf_counter() - inicio, 200
+
+    async def asincronas() -> list[tuple[str, float, int]]:
+        """Lanzar todas las consultas asíncronas"""
+        semaforo = asyncio.Semaphore(args.clientes)
+        try:
+            return await asyncio.gather(*(consultar_asincrona(semaforo, nombre) for nombre in nombres))
+        finally:
+            await async_engine.dispose()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clientes) as executor:
+        resultados = list(executor.map(consultar_sincrona, nombres))
+    mostrar(f"síncronas clientes={args.clientes}", list(consultas), resultados, time.perf_counter() - inicio)
+    engine.dispose()
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(asincronas())
+    mostrar(f"asíncronas clientes={args.clientes}", list(consultas), resultados, time.perf_counter() - inicio)
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Solicitudes por segundo y latencia con clientes concurrentes")
+    parser.add_argument("--clientes", type=int, default=50, help="Cantidad de clientes concurrentes")
+    parser.add_argument("--solicitudes", type=int, default=2000, help="Cantidad total de solicitudes")
+    parser.add_argument("--modo", choices=["http", "sesiones"], default="http", help="Por la API o directo con las sesiones")
+    args = parser.parse_args()
+    if args.modo == "sesiones":
+        con_sesiones(args)
+    else:
+        con_http(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark DTO
+
+Compara una página con objetos del ORM, como se paginaba, contra renglones de Core de row_select,
+desde la consulta hasta el JSON de CustomPage. Mide registros por segundo y el pico de memoria.
+Se conecta directo a la base de datos con el mismo .env que la API.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.util import greenlet_spawn
+
+from pjecz_hercules_api_oauth2.dependencies.catalogos_loader import get_catalogo
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine, async_session_maker
+from pjecz_hercules_api_oauth2.dependencies.fastapi_pagination_custom_page import CustomPage
+from pjecz_hercules_api_oauth2.dependencies.json_response import ModelJSONResponse
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.edictos import Edicto
+from pjecz_hercules_api_oauth2.models.listas_de_acuerdos import ListaDeAcuerdo
+from pjecz_hercules_api_oauth2.models.sentencias import Sentencia
+from pjecz_hercules_api_oauth2.schemas.edictos import EdictoOut
+from pjecz_hercules_api_oauth2.schemas.listas_de_acuerdos import ListaDeAcuerdoOut
+from pjecz_hercules_api_oauth2.schemas.sentencias import SentenciaOut
+
+MODELOS = {
+    "edictos": (Edicto, EdictoOut),
+    "listas_de_acuerdos": (ListaDeAcuerdo, ListaDeAcuerdoOut),
+    "sentencias": (Sentencia, SentenciaOut),
+}
+
+
+def renderizar(esquema, items: list) -> bytes:
+    """Validar la página y convertirla a JSON, como lo hace el paginado"""
+    pagina = CustomPage[esquema](success=True, message="Success", data=items, total=len(items), limit=len(items), offset=0)
+    return ModelJSONResponse(pagina).body
+
+
+async def con_orm(modelo, esquema, filas: int) -> tuple[int, bytes]:
+    """Objetos del ORM sin las columnas RAG, las propiedades usan el catálogo"""
+    consulta = select(modelo).options(*modelo.defer_rag_options()).filter(modelo.estatus == "A").order_by(modelo.id)
+    async with async_session_maker() as database:
+        items = (await database.execute(consulta.limit(filas))).scalars().all()
+        return len(items), await greenlet_spawn(renderizar, esquema, items)
+
+
+async def con_renglones(modelo, esquema, filas: int) -> tuple[int, bytes]:
+    """Renglones de Core con JOIN a los catálogos"""
+    consulta = modelo.row_select().filter(modelo.estatus == "A").order_by(modelo.id)
+    async with async_session_maker() as database:
+        items = (await database.execute(consulta.limit(filas))).all()
+        return len(items), renderizar(esquema, items)
+
+
+async def medir(variante, modelo, esquema, filas: int, repeticiones: int) -> tuple[int, int, float, int]:
+    """Entregar los registros, los bytes, la mediana en segundos y el pico de memoria en bytes, medido aparte"""
+    registros, contenido = await variante(modelo, esquema, filas)  # Calentar
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        await variante(modelo, esquema, filas)
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        await variante(modelo, esquema, filas)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return registros, len(contenido), statistics.median(tiempos), pico
+
+
+async def ejecutar(args) -> None:
+    """Medir cada variante por cantidad de registros"""
+    modelo, esquema = MODELOS[args.tabla]
+    await get_catalogo()
+    print(f"{'filas':>7} {'variante':10} {'registros':>9} {'bytes':>10} {'ms':>9} {'registros/s':>12} {'memoria pico':>13}")
+    try:
+        for filas in (int(filas) for filas in args.filas.split(",")):
+            for nombre, variante in (("orm", con_orm), ("renglones", con_renglones)):
+                registros, cantidad, segundos, pico = await medir(variante, modelo, esquema, filas, args.repeticiones)
+                print(
+                    f"{filas:7} {nombre:10} {registros:9} {cantidad:10} {segundos * 1000:9.1f} "
+                    f"{registros / segundos:12.0f} {pico:13}"
+                )
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Registros por segundo y memoria, objetos del ORM contra renglones de Core")
+    parser.add_argument("--tabla", choices=MODELOS.keys(), default="sentencias", help="Tabla a medir")
+    parser.add_argument("--filas", default="100,10000", help="Cantidades de registros, separadas por comas")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones por variante")
+    args = parser.parse_args()
+    asyncio.run(ejecutar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark Exportar
+
+Compara el tiempo de traer N registros con la ruta /export, en un solo flujo NDJSON,
+contra recorrer el paginado con cursor de limit registros por página.
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from benchmarks import config, get_token
+
+
+def exportar(token: str, ruta: str, filas: int) -> int:
+    """Leer el flujo NDJSON hasta tener filas registros, entregar cuántos se leyeron"""
+    cantidad = 0
+    with requests.get(
+        url=f"{config['api_base_url']}{ruta}/export",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=config["timeout"],
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        for linea in response.iter_lines():
+            json.loads(linea)
+            cantidad += 1
+            if cantidad >= filas:
+                break
+    return cantidad
+
+
+def paginar(token: str, ruta: str, filas: int, limit: int) -> tuple[int, int]:
+    """Recorrer las páginas con cursor hasta tener filas registros, entregar cuántos se leyeron y las solicitudes"""
+    cantidad = 0
+    solicitudes = 0
+    params = {"limit": limit}
+    while cantidad < filas:
+        response = requests.get(
+            url=f"{config['api_base_url']}{ruta}",
+            headers={"Authorization": f"Bearer {token}"},
+            params=params,
+            timeout=config["timeout"],
+        )
+        response.raise_for_status()
+        solicitudes += 1
+        contenido = response.json()
+        cantidad += len(contenido["data"])
+        if contenido.get("next_cursor") is None:
+            break
+        params = {"limit": limit, "cursor": contenido["next_cursor"], "total": "none"}
+    return min(cantidad, filas), solicitudes
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Tiempo de traer N registros exportando o paginando")
+    parser.add_argument("--ruta", default="/api/v5/sentencias", help="Ruta del paginado que tiene /export")
+    parser.add_argument("--filas", type=int, default=1000000, help="Registros a traer")
+    parser.add_argument("--limit", type=int, default=100, help="Registros por página al paginar")
+    args = parser.parse_args()
+    token = get_token()
+
+    inicio = time.perf_counter()
+    cantidad = exportar(token, args.ruta, args.filas)
+    segundos = time.perf_counter() - inicio
+    print(f"export   filas={cantidad:9} solicitudes={1:7} {segundos:8.2f} s {cantidad / segundos:10.0f} filas/s")
+
+    inicio = time.perf_counter()
+    cantidad, solicitudes = paginar(token, args.ruta, args.filas, args.limit)
+    segundos = time.perf_counter() - inicio
+    print(f"paginado filas={cantidad:9} solicitudes={solicitudes:7} {segundos:8.2f} s {cantidad / segundos:10.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark Paginación
+
+Compara la latencia de una página profunda con offset contra la misma página con cursor.
+Con offset la base de datos recorre y descarta todos los registros anteriores,
+con cursor filtra por la clave de orden y la latencia no depende de la profundidad.
+"""
+
+import argparse
+import time
+
+import requests
+
+from benchmarks import config, get_token, percentiles
+
+
+def consultar(token: str, ruta: str, params: dict) -> tuple[float, dict]:
+    """Hacer un GET y entregar el tiempo en segundos y el contenido"""
+    inicio = time.perf_counter()
+    response = requests.get(
+        url=f"{config['api_base_url']}{ruta}",
+        headers={"Authorization": f"Bearer {token}"},
+        params=params,
+        timeout=config["timeout"],
+    )
+    response.raise_for_status()
+    return time.perf_counter() - inicio, response.json()
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Latencia de páginas profundas con offset y con cursor")
+    parser.add_argument("--ruta", default="/api/v5/listas_de_acuerdos", help="Ruta del paginado")
+    parser.add_argument("--limit", type=int, default=100, help="Registros por página")
+    parser.add_argument("--paginas", default="1,10,100,1000,10000", help="Números de página separados por comas")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por página")
+    args = parser.parse_args()
+    token = get_token()
+
+    for pagina in [int(numero) for numero in args.paginas.split(",")]:
+        # Con offset
+        offset = (pagina - 1) * args.limit
+        tiempos_offset = []
+        for _ in range(args.repeticiones):
+            tiempo, _ = consultar(token, args.ruta, {"limit": args.limit, "offset": offset})
+            tiempos_offset.append(tiempo)
+
+        # Obtener el cursor de la página anterior, una sola vez, para llegar a la misma página con cursor
+        if pagina == 1:
+            params_cursor = {"limit": args.limit}
+        else:
+            _, anterior = consultar(token, args.ruta, {"limit": args.limit, "offset": offset - args.limit})
+            if anterior.get("next_cursor") is None:
+                print(f"pagina={pagina:6} no hay tantos registros")
+                break
+            params_cursor = {"limit": args.limit, "cursor": anterior["next_cursor"]}
+        tiempos_cursor = []
+        for _ in range(args.repeticiones):
+            tiempo, _ = consultar(token, args.ruta, params_cursor)
+            tiempos_cursor.append(tiempo)
+
+        # Mostrar resultados
+        for titulo, tiempos in (("offset", tiempos_offset), ("cursor", tiempos_cursor)):
+            valores = percentiles(tiempos)
+            print(f"pagina={pagina:6} {titulo:6} p50={valores['p50']:8.1f} ms p90={valores['p90']:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
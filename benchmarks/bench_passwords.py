@@ -0,0 +1,42 @@
+"""
+Benchmark Passwords
+
+Mide en esta máquina el costo de validar una contraseña por esquema y rondas,
+para elegir PASSWORD_PBKDF2_ROUNDS de acuerdo al CPU disponible por login.
+No necesita la API en ejecución.
+"""
+
+import argparse
+import time
+
+from passlib.hash import des_crypt, pbkdf2_sha256
+
+CONTRASENA = "Prueba2025"
+
+
+def medir(hasher, repeticiones: int) -> float:
+    """Entregar el promedio en milisegundos de validar una contraseña"""
+    hashed = hasher.hash(CONTRASENA)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        hasher.verify(CONTRASENA, hashed)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Costo de validar contraseñas por esquema y rondas")
+    parser.add_argument("--rounds", default="29000,100000,300000,600000", help="Rondas de pbkdf2_sha256 separadas por comas")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Validaciones por medición")
+    args = parser.parse_args()
+
+    print(f"{'esquema':16} {'rondas':>8} {'ms/login':>10} {'logins/s por CPU':>18}")
+    milisegundos = medir(des_crypt, args.repeticiones)
+    print(f"{'des_crypt':16} {25:8} {milisegundos:10.2f} {1000 / milisegundos:18.1f}")
+    for rondas in [int(valor) for valor in args.rounds.split(",")]:
+        milisegundos = medir(pbkdf2_sha256.using(rounds=rondas), args.repeticiones)
+        print(f"{'pbkdf2_sha256':16} {rondas:8} {milisegundos:10.2f} {1000 / milisegundos:18.1f}")
+
+
+if __name__ == "__main__":
+    main()
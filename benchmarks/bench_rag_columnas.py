@@ -0,0 +1,82 @@
+"""
+Benchmark Columnas RAG
+
+Compara los paginados cargando todas las columnas contra no cargar las columnas JSON de RAG.
+Mide los bytes que entrega PostgreSQL y la memoria para tener una página en objetos.
+Se conecta directo a la base de datos con el mismo .env que la API.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import func, select
+
+from benchmarks import percentiles
+from pjecz_hercules_api_oauth2.dependencies.database import session_maker
+from pjecz_hercules_api_oauth2.main import app  # Para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.edictos import Edicto
+from pjecz_hercules_api_oauth2.models.listas_de_acuerdos import ListaDeAcuerdo
+from pjecz_hercules_api_oauth2.models.sentencias import Sentencia
+
+MODELOS = {"edictos": Edicto, "listas_de_acuerdos": ListaDeAcuerdo, "sentencias": Sentencia}
+
+RAG_COLUMNAS = ("rag_analisis", "rag_sintesis", "rag_categorias")
+
+
+def medir_bytes(database, modelo, con_rag: bool, limit: int, offset: int) -> int:
+    """Sumar el tamaño en PostgreSQL de las columnas de una página"""
+    columnas = [c for c in modelo.__table__.columns if con_rag or c.name not in RAG_COLUMNAS]
+    pagina = select(*columnas).filter_by(estatus="A").order_by(modelo.id).limit(limit).offset(offset).subquery()
+    tamanio = sum(func.coalesce(func.pg_column_size(c), 0) for c in pagina.c)
+    return int(database.scalar(select(func.sum(tamanio))) or 0)
+
+
+def medir_pagina(modelo, con_rag: bool, limit: int, offset: int) -> tuple[float, int]:
+    """Consultar una página como objetos, entrega el tiempo en segundos y el pico de memoria en bytes"""
+    opciones = modelo.load_options() if con_rag else [*modelo.load_options(), *modelo.defer_rag_options()]
+    database = session_maker()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        consulta = select(modelo).options(*opciones).filter_by(estatus="A").order_by(modelo.id).limit(limit).offset(offset)
+        items = database.execute(consulta).unique().scalars().all()
+        tiempo = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        database.close()
+    del items
+    return tiempo, pico
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Bytes y memoria por página con y sin las columnas RAG")
+    parser.add_argument("--tabla", choices=MODELOS.keys(), default="sentencias", help="Tabla a medir")
+    parser.add_argument("--limit", type=int, default=100, help="Registros por página")
+    parser.add_argument("--offset", type=int, default=0, help="Desde qué registro")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones por variante")
+    args = parser.parse_args()
+    modelo = MODELOS[args.tabla]
+
+    database = session_maker()
+    try:
+        bytes_por_variante = {
+            con_rag: medir_bytes(database, modelo, con_rag, args.limit, args.offset) for con_rag in (True, False)
+        }
+    finally:
+        database.close()
+
+    for con_rag, titulo in ((True, "con RAG"), (False, "sin RAG")):
+        mediciones = [medir_pagina(modelo, con_rag, args.limit, args.offset) for _ in range(args.repeticiones)]
+        valores = percentiles([tiempo for tiempo, _ in mediciones])
+        memoria = max(pico for _, pico in mediciones)
+        print(
+            f"{titulo:8} bytes_postgres={bytes_por_variante[con_rag]:10} memoria_pico={memoria:10} "
+            f"p50={valores['p50']:8.1f} ms p90={valores['p90']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark Serialización
+
+Mide por esquema el tiempo de convertir a JSON una página de CustomPage,
+por el camino de FastAPI (volver a validar y json), el mismo con orjson y el del modelo ya validado.
+No necesita la API en ejecución.
+"""
+
+import argparse
+import asyncio
+import time
+import types
+import typing
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+
+from pjecz_hercules_api_oauth2.dependencies.fastapi_pagination_custom_page import CustomPage
+from pjecz_hercules_api_oauth2.dependencies.json_response import ModelJSONResponse
+from pjecz_hercules_api_oauth2.schemas.autoridades import AutoridadOut
+from pjecz_hercules_api_oauth2.schemas.distritos import DistritoOut
+from pjecz_hercules_api_oauth2.schemas.edictos import EdictoOut
+from pjecz_hercules_api_oauth2.schemas.listas_de_acuerdos import ListaDeAcuerdoOut
+from pjecz_hercules_api_oauth2.schemas.materias import MateriaOut
+from pjecz_hercules_api_oauth2.schemas.materias_tipos_juicios import MateriaTipoJuicioOut
+from pjecz_hercules_api_oauth2.schemas.modulos import ModuloOut
+from pjecz_hercules_api_oauth2.schemas.permisos import PermisoOut
+from pjecz_hercules_api_oauth2.schemas.roles import RolOut
+from pjecz_hercules_api_oauth2.schemas.sentencias import SentenciaOut
+from pjecz_hercules_api_oauth2.schemas.usuarios import UsuarioOut
+from pjecz_hercules_api_oauth2.schemas.usuarios_roles import UsuarioRolOut
+
+ESQUEMAS = [
+    AutoridadOut,
+    DistritoOut,
+    EdictoOut,
+    ListaDeAcuerdoOut,
+    MateriaOut,
+    MateriaTipoJuicioOut,
+    ModuloOut,
+    PermisoOut,
+    RolOut,
+    SentenciaOut,
+    UsuarioOut,
+    UsuarioRolOut,
+]
+
+EJEMPLOS = {
+    bool: True,
+    date: date(2025, 1, 31),
+    datetime: datetime(2025, 1, 31, 12, 30, 45, 123456),
+    dict: {"resumen": "Texto de ejemplo con acentos, año y ñ " * 4},
+    float: 1234.5,
+    int: 123456,
+    str: "Texto de ejemplo con acentos, año y ñ",
+}
+
+
+def ejemplo(anotacion):
+    """Valor de ejemplo para la anotación, en las opcionales se usa el primer tipo que no es None"""
+    if typing.get_origin(anotacion) in (typing.Union, types.UnionType):
+        anotacion = next(tipo for tipo in typing.get_args(anotacion) if tipo is not type(None))
+    return EJEMPLOS[typing.get_origin(anotacion) or anotacion]
+
+
+def crear_pagina(esquema: type[BaseModel], limit: int) -> BaseModel:
+    """Crear una página validada con limit registros de ejemplo"""
+    registro = {nombre: ejemplo(campo.annotation) for nombre, campo in esquema.model_fields.items()}
+    return CustomPage[esquema](
+        success=True,
+        message="Success",
+        data=[esquema.model_validate(registro) for _ in range(limit)],
+        total=limit,
+        limit=limit,
+        offset=0,
+    )
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Entregar el promedio en milisegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Tiempo de convertir a JSON una página por esquema")
+    parser.add_argument("--limit", type=int, default=100, help="Registros por página")
+    parser.add_argument("--repeticiones", type=int, default=200, help="Conversiones por medición")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    print(f"{'esquema':22} {'bytes':>8} {'fastapi ms':>11} {'orjson ms':>10} {'modelo ms':>10} {'veces':>6}")
+    for esquema in ESQUEMAS:
+        pagina = crear_pagina(esquema, args.limit)
+        field = create_model_field(name="Response", type_=CustomPage[esquema], mode="serialization")
+
+        def con_fastapi(response_class):
+            """Lo que hace FastAPI con response_model: convertir a diccionario, validar y serializar"""
+            contenido = loop.run_until_complete(serialize_response(field=field, response_content=pagina))
+            return response_class(contenido).body
+
+        fastapi_ms = medir(lambda: con_fastapi(JSONResponse), args.repeticiones)
+        orjson_ms = medir(lambda: con_fastapi(ORJSONResponse), args.repeticiones)
+        modelo_ms = medir(lambda: ModelJSONResponse(pagina).body, args.repeticiones)
+        cantidad = len(ModelJSONResponse(pagina).body)
+        print(
+            f"{esquema.__name__:22} {cantidad:8} {fastapi_ms:11.3f} {orjson_ms:10.3f} {modelo_ms:10.3f} "
+            f"{fastapi_ms / modelo_ms:6.1f}"
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
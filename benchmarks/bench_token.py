@@ -0,0 +1,68 @@
+"""
+Benchmark Token
+
+Lanza una ráfaga de logins a /token y al mismo tiempo consultas GET,
+para medir cuánto se retrasan los GET mientras se validan contraseñas.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks import config, get_token, percentiles
+
+
+def login() -> float:
+    """Hacer un login y entregar el tiempo en segundos"""
+    inicio = time.perf_counter()
+    requests.post(
+        url=f"{config['api_base_url']}/token",
+        data={"grant_type": "password", "username": config["username"], "password": config["password"]},
+        timeout=config["timeout"],
+    )
+    return time.perf_counter() - inicio
+
+
+def consultar(token: str) -> float:
+    """Hacer un GET y entregar el tiempo en segundos"""
+    inicio = time.perf_counter()
+    requests.get(
+        url=f"{config['api_base_url']}/api/v5/distritos",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=config["timeout"],
+    )
+    return time.perf_counter() - inicio
+
+
+def main():
+    """Ejecutar el benchmark"""
+    parser = argparse.ArgumentParser(description="Latencia de /token y de los GET concurrentes")
+    parser.add_argument("--logins", type=int, default=50, help="Cantidad de logins en la ráfaga")
+    parser.add_argument("--gets", type=int, default=500, help="Cantidad de GET concurrentes")
+    parser.add_argument("--hilos", type=int, default=20, help="Cantidad de clientes concurrentes")
+    args = parser.parse_args()
+    token = get_token()
+
+    # GET sin ráfaga de logins como referencia
+    with ThreadPoolExecutor(max_workers=args.hilos) as executor:
+        solos = list(executor.map(lambda _: consultar(token), range(args.gets)))
+
+    # GET durante la ráfaga de logins
+    with ThreadPoolExecutor(max_workers=args.hilos * 2) as executor:
+        logins_futuros = [executor.submit(login) for _ in range(args.logins)]
+        gets_futuros = [executor.submit(consultar, token) for _ in range(args.gets)]
+        logins = [futuro.result() for futuro in logins_futuros]
+        gets = [futuro.result() for futuro in gets_futuros]
+
+    # Mostrar resultados
+    for titulo, tiempos in (("/token", logins), ("GET sin logins", solos), ("GET con logins", gets)):
+        valores = percentiles(tiempos)
+        print(
+            f"{titulo:16} n={len(tiempos):5} p50={valores['p50']:8.1f} ms p90={valores['p90']:8.1f} ms p99={valores['p99']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
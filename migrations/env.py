@@ -0,0 +1,73 @@
+"""
+Alembic Env
+
+Las tablas las administra Plataforma Web, aquí sólo se administran los índices que declaran los modelos de esta API.
+Se usa una tabla de versiones propia para no chocar con las migraciones de Plataforma Web.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from pjecz_hercules_api_oauth2.config.settings import get_settings
+from pjecz_hercules_api_oauth2.dependencies.database import Base, get_engine
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+
+VERSION_TABLE = "alembic_version_hercules_api_oauth2"
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(objeto, nombre, tipo, reflejado, comparado) -> bool:
+    """Comparar sólo las tablas que existen y agregar sólo los índices de los modelos, nunca eliminar"""
+    if tipo == "table":
+        return comparado is not None
+    if tipo == "index":
+        return not reflejado
+    return False
+
+
+def get_url():
+    """URL de la base de datos, la misma del engine síncrono de la API"""
+    return get_engine(get_settings()).url
+
+
+def run_migrations_offline() -> None:
+    """Generar el SQL sin conectarse a la base de datos"""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        version_table=VERSION_TABLE,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Ejecutar las migraciones en la base de datos"""
+    # Sin el statement_timeout de la API, porque crear un índice puede tardar más
+    connectable = create_engine(get_url(), poolclass=NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            version_table=VERSION_TABLE,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
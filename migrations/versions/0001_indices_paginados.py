@@ -0,0 +1,60 @@
+"""Índices parciales para los paginados
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Los índices se crean con CONCURRENTLY para no bloquear las escrituras de Plataforma Web,
+por eso se ejecutan fuera de la transacción.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Nombre, tabla y columnas de cada índice, todos son parciales para los registros activos
+INDICES = [
+    ("ix_edictos_activos_id", "edictos", ["id"]),
+    ("ix_edictos_activos_autoridad_id", "edictos", ["autoridad_id", "id"]),
+    ("ix_edictos_activos_creado", "edictos", ["creado", "id"]),
+    ("ix_listas_de_acuerdos_activas_fecha", "listas_de_acuerdos", ["fecha", "id"]),
+    ("ix_listas_de_acuerdos_activas_autoridad_id_fecha", "listas_de_acuerdos", ["autoridad_id", "fecha", "id"]),
+    ("ix_permisos_activos_rol_id", "permisos", ["rol_id", "modulo_id"]),
+    ("ix_permisos_activos_modulo_id", "permisos", ["modulo_id", "id"]),
+    ("ix_sentencias_activas_id", "sentencias", ["id"]),
+    ("ix_sentencias_activas_autoridad_id", "sentencias", ["autoridad_id", "id"]),
+    ("ix_sentencias_activas_creado", "sentencias", ["creado", "id"]),
+    ("ix_usuarios_activos_autoridad_id", "usuarios", ["autoridad_id", "email"]),
+    ("ix_usuarios_roles_activos_usuario_id", "usuarios_roles", ["usuario_id", "rol_id"]),
+    ("ix_usuarios_roles_activos_rol_id", "usuarios_roles", ["rol_id", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(
+                nombre,
+                tabla,
+                columnas,
+                postgresql_where=sa.text("estatus = 'A'"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for _, tabla, _ in INDICES:
+            op.execute(f"ANALYZE {tabla}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
@@ -58,19 +58,50 @@ class Settings(BaseSettings):
 
     ACCESS_TOKEN_EXPIRE_SECONDS: int = int(get_secret("ACCESS_TOKEN_EXPIRE_SECONDS", "3600"))
     ALGORITHM: str = get_secret("ALGORITHM", "HS256")
+    AUTH_CACHE_MAX_SIZE: int = int(get_secret("AUTH_CACHE_MAX_SIZE", "1024"))
+    AUTH_CACHE_TTL_SECONDS: int = int(get_secret("AUTH_CACHE_TTL_SECONDS", "60"))
+    CATALOGO_TTL_SECONDS: int = int(get_secret("CATALOGO_TTL_SECONDS", "300"))
     CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS: str = get_secret("CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS")
+    COMPRESSION_BROTLI_QUALITY: int = int(get_secret("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_GZIP_LEVEL: int = int(get_secret("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_MINIMUM_SIZE: int = int(get_secret("COMPRESSION_MINIMUM_SIZE", "1000"))
+    COMPRESSION_ZSTD_LEVEL: int = int(get_secret("COMPRESSION_ZSTD_LEVEL", "3"))
+    DB_APPLICATION_NAME: str = get_secret("DB_APPLICATION_NAME", "pjecz_hercules_api_oauth2")
     DB_HOST: str = get_secret("DB_HOST")
-    DB_PORT: int = int(get_secret("DB_PORT", "5432"))
+    DB_MAX_OVERFLOW: int = int(get_secret("DB_MAX_OVERFLOW", "10"))
     DB_NAME: str = get_secret("DB_NAME")
     DB_PASS: str = get_secret("DB_PASS")
+    DB_POOL_PRE_PING: bool = get_secret("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(get_secret("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_SIZE: int = int(get_secret("DB_POOL_SIZE", "5"))
+    DB_POOL_TIMEOUT_SECONDS: int = int(get_secret("DB_POOL_TIMEOUT_SECONDS", "5"))
+    DB_PORT: int = int(get_secret("DB_PORT", "5432"))
+    DB_REPLICA_HOST: str = get_secret("DB_REPLICA_HOST")
+    DB_REPLICA_PORT: int = int(get_secret("DB_REPLICA_PORT", "5432"))
+    DB_REPLICA_RETRY_SECONDS: int = int(get_secret("DB_REPLICA_RETRY_SECONDS", "30"))
+    DB_STATEMENT_TIMEOUT_MS: int = int(get_secret("DB_STATEMENT_TIMEOUT_MS", "30000"))
     DB_USER: str = get_secret("DB_USER")
+    EXPORT_PERMISSION_LEVEL: int = int(get_secret("EXPORT_PERMISSION_LEVEL", "2"))
+    EXPORT_YIELD_PER: int = int(get_secret("EXPORT_YIELD_PER", "1000"))
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: int = int(get_secret("LOGIN_RATE_LIMIT_IP_PER_MINUTE", "60"))
+    LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE: int = int(get_secret("LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE", "10"))
     ORIGINS: str = get_secret("ORIGINS")
+    PAGINATION_COUNT_CACHE_MAX_SIZE: int = int(get_secret("PAGINATION_COUNT_CACHE_MAX_SIZE", "1024"))
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = int(get_secret("PAGINATION_COUNT_CACHE_TTL_SECONDS", "30"))
+    PASSWORD_HASHING_WORKERS: int = int(get_secret("PASSWORD_HASHING_WORKERS", "2"))
+    PASSWORD_PBKDF2_ROUNDS: int = int(get_secret("PASSWORD_PBKDF2_ROUNDS", "29000"))
+    READ_YOUR_WRITES_SECONDS: int = int(get_secret("READ_YOUR_WRITES_SECONDS", "10"))
     REDIS_URL: str = get_secret("REDIS_URL")
+    REFRESH_TOKEN_EXPIRE_SECONDS: int = int(get_secret("REFRESH_TOKEN_EXPIRE_SECONDS", "2592000"))
+    RESPONSE_CACHE_MAX_SIZE: int = int(get_secret("RESPONSE_CACHE_MAX_SIZE", "512"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(get_secret("RESPONSE_CACHE_TTL_SECONDS", "60"))
     SALT: str = get_secret("SALT")
     SECRET_KEY: str = get_secret("SECRET_KEY")
     SENDGRID_API_KEY: str = get_secret("SENDGRID_API_KEY")
     SENDGRID_FROM_EMAIL: str = get_secret("SENDGRID_FROM_EMAIL")
     TASK_QUEUE: str = get_secret("TASK_QUEUE")
+    TOKEN_WITH_PERMISSIONS: bool = get_secret("TOKEN_WITH_PERMISSIONS", "false").lower() == "true"
+    TRUSTED_PROXY_HOPS: int = int(get_secret("TRUSTED_PROXY_HOPS", "0"))
     TZ: str = get_secret("TZ", "America/Mexico_City")
 
     class Config:
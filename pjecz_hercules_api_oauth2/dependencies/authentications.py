@@ -2,22 +2,34 @@
 Authentications
 """
 
+import asyncio
+import hashlib
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from typing import Annotated
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
+from sqlalchemy import event, func, select, update
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from ..config.settings import Settings, get_settings
+from ..models.modulos import Modulo
+from ..models.permisos import Permiso
+from ..models.roles import Rol
 from ..models.usuarios import Usuario
-from ..schemas.usuarios import UsuarioInDB
-from .database import Session, get_db
+from ..models.usuarios_roles import UsuarioRol
+from ..schemas.usuarios import UsuarioInDB, UsuarioOut
+from .database import Session, async_session_maker, get_db
 from .exceptions import MyAnyError, MyAuthenticationError, MyIsDeletedError, MyNotExistsError, MyNotValidParamError
 from .safe_string import safe_email
+from .ttl_cache import TTLCache
+from .two_level_cache import create_two_level_cache
 
 ALGORITHM = "HS256"
 PASSWORD_REGEXP = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)[A-Za-z\d]{8,24}$"
@@ -26,6 +38,120 @@ TOKEN_EXPIRES_SECONDS = 3600  # 1 hora
 # Autentificar con OAuth2 y solicitar token en @app.post("/token", response_model=Token)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+settings = get_settings()
+
+# Contexto para cifrar y validar contraseñas, se crea una sola vez
+# Los hashes con des_crypt o con menos rondas que PASSWORD_PBKDF2_ROUNDS necesitan actualizarse
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256", "des_crypt"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_PBKDF2_ROUNDS,
+)
+
+# Caché de los usuarios autentificados, la llave es el hash del token, con Redis se comparte entre workers
+usuarios_cache = create_two_level_cache(
+    "usuarios", max_size=settings.AUTH_CACHE_MAX_SIZE, ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+# Caché de las versiones de los permisos, la llave es el ID del usuario
+versiones_cache = TTLCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS)
+
+# Grupo de hilos para autentificar, así la validación de la contraseña no bloquea el ciclo de eventos
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix="password")
+
+
+def invalidate_usuario(usuario_email: str) -> int:
+    """Eliminar de la caché los tokens de un usuario, entrega la cantidad eliminada en este proceso"""
+    return usuarios_cache.invalidate_tag_nowait(f"usuario:{usuario_email}")
+
+
+def invalidate_usuarios() -> None:
+    """Eliminar de la caché a todos los usuarios, por ejemplo al cambiar roles o permisos"""
+    usuarios_cache.clear_nowait()
+    versiones_cache.clear()
+
+
+# Estos eventos sólo ocurren con lo que escribe este proceso, invalidan su memoria y Redis. Plataforma Web también
+# modifica usuarios, roles y permisos, esos cambios, como la memoria de los otros workers, se ven al caducar la caché,
+# así que AUTH_CACHE_TTL_SECONDS es lo más atrasado que puede estar un usuario o sus permisos
+
+
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _on_usuario_change(mapper, connection, target: Usuario) -> None:
+    """Al cambiar un usuario desde esta API, eliminarlo de la caché"""
+    invalidate_usuario(target.email)
+    versiones_cache.delete(target.id)
+
+
+@event.listens_for(UsuarioRol, "after_insert")
+@event.listens_for(UsuarioRol, "after_update")
+@event.listens_for(UsuarioRol, "after_delete")
+@event.listens_for(Rol, "after_update")
+@event.listens_for(Rol, "after_delete")
+@event.listens_for(Permiso, "after_insert")
+@event.listens_for(Permiso, "after_update")
+@event.listens_for(Permiso, "after_delete")
+@event.listens_for(Modulo, "after_update")
+@event.listens_for(Modulo, "after_delete")
+def _on_roles_permisos_change(mapper, connection, target) -> None:
+    """Al cambiar roles o permisos desde esta API, vaciar la caché"""
+    invalidate_usuarios()
+
+
+def get_permissions_with_usuario_id(database: Session, usuario_id: int) -> dict:
+    """Consultar los permisos de un usuario con una sola sentencia SQL, entrega {modulo_nombre: nivel}"""
+    return dict(database.execute(Usuario.select_permissions(usuario_id)).all())
+
+
+def get_permissions_version(database: Session, usuario_id: int) -> int | None:
+    """Consultar la versión de los permisos, el último modificado del usuario, sus roles, permisos y módulos en milisegundos"""
+    version = versiones_cache.get(usuario_id)
+    if version is not None:
+        return version
+    modificado = database.execute(
+        select(
+            func.greatest(
+                Usuario.modificado,
+                func.max(UsuarioRol.modificado),
+                func.max(Rol.modificado),
+                func.max(Permiso.modificado),
+                func.max(Modulo.modificado),
+                type_=Usuario.modificado.type,
+            )
+        )
+        .select_from(Usuario)
+        .outerjoin(UsuarioRol, UsuarioRol.usuario_id == Usuario.id)
+        .outerjoin(Rol, Rol.id == UsuarioRol.rol_id)
+        .outerjoin(Permiso, Permiso.rol_id == UsuarioRol.rol_id)
+        .outerjoin(Modulo, Modulo.id == Permiso.modulo_id)
+        .where(Usuario.id == usuario_id)
+        .where(Usuario.estatus == "A")
+        .group_by(Usuario.id)
+    ).scalar()
+    if modificado is None:
+        return None
+    version = int(modificado.timestamp() * 1000)
+    versiones_cache.set(usuario_id, version)
+    return version
+
+
+def get_usuario_with_claims(database: Session, payload: dict) -> UsuarioInDB:
+    """Construir el usuario a partir de los datos del token, sólo se consulta la versión de los permisos"""
+    version = get_permissions_version(database, payload["usuario"]["id"])
+    if version is None:
+        raise MyIsDeletedError("No es activo ese usuario, está eliminado")
+    if version != payload["permissions_version"]:
+        raise MyAuthenticationError("No es válido el token porque cambiaron los permisos")
+    return UsuarioInDB(
+        **payload["usuario"],
+        username=payload["username"],
+        permissions=payload["permissions"],
+        hashed_password="",
+        disabled=False,
+    )
+
 
 def get_usuario_with_email(database: Session, usuario_email: str) -> UsuarioInDB:
     """Consultar un usuario por su email"""
@@ -34,7 +160,7 @@ def get_usuario_with_email(database: Session, usuario_email: str) -> UsuarioInDB
     except ValueError as error:
         raise MyNotValidParamError("El email no es válido") from error
     try:
-        usuario = database.query(Usuario).filter_by(email=email).one()
+        usuario = database.query(Usuario).options(*Usuario.load_options()).filter_by(email=email).one()
     except (NoResultFound, MultipleResultsFound) as error:
         raise MyNotExistsError("No existe ese usuario") from error
     if usuario.estatus != "A":
@@ -53,7 +179,7 @@ def get_usuario_with_email(database: Session, usuario_email: str) -> UsuarioInDB
         "distrito_nombre": usuario.autoridad.distrito.nombre,
         "distrito_nombre_corto": usuario.autoridad.distrito.nombre_corto,
         "username": usuario.email,
-        "permissions": usuario.permissions,
+        "permissions": get_permissions_with_usuario_id(database, usuario.id),
         "hashed_password": usuario.contrasena,
         "disabled": usuario.estatus != "A",
     }
@@ -62,30 +188,53 @@ def get_usuario_with_email(database: Session, usuario_email: str) -> UsuarioInDB
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Validar la contraseña"""
+    es_valida, _ = verify_and_update_password(plain_password, hashed_password)
+    return es_valida
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Validar la contraseña, si es válida y su hash necesita actualizarse entrega el nuevo hash"""
     if hashed_password == "":
         raise MyNotValidParamError("No tiene definida su contraseña")
     if re.match(PASSWORD_REGEXP, plain_password) is None:
         raise MyNotValidParamError("La contraseña no es valida")
-    pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 
 def authenticate_user(username: str, password: str, database: Session = Depends(get_db)) -> UsuarioInDB:
-    """Autentificar al usuario"""
+    """Autentificar al usuario, si el hash de la contraseña es obsoleto se guarda uno nuevo"""
     try:
         usuario = get_usuario_with_email(database, username)
     except MyAnyError as error:
         raise error
-    if not verify_password(password, usuario.hashed_password):
+    es_valida, nuevo_hash = verify_and_update_password(password, usuario.hashed_password)
+    if not es_valida:
         raise MyAuthenticationError("La contraseña es incorrecta")
+    if nuevo_hash is not None:
+        # Se conserva modificado porque no cambia la contraseña, sólo su cifrado
+        database.execute(
+            update(Usuario).where(Usuario.id == usuario.id).values(contrasena=nuevo_hash, modificado=Usuario.modificado)
+        )
+        database.commit()
+        usuario.hashed_password = nuevo_hash
     return usuario
 
 
-def encode_token(settings: Settings, usuario: UsuarioInDB) -> str:
-    """Crear el token"""
+async def authenticate_user_in_executor(username: str, password: str, database: Session) -> UsuarioInDB:
+    """Autentificar al usuario en el grupo de hilos PASSWORD_HASHING_WORKERS"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, partial(authenticate_user, username, password, database))
+
+
+def encode_token(settings: Settings, usuario: UsuarioInDB, database: Session | None = None) -> str:
+    """Crear el token, si TOKEN_WITH_PERMISSIONS es verdadero se agregan los permisos y su versión"""
     expiration_dt = datetime.now(timezone.utc) + timedelta(seconds=TOKEN_EXPIRES_SECONDS)
     expires_at = expiration_dt.timestamp()
     payload = {"username": usuario.email, "expires_at": expires_at}
+    if settings.TOKEN_WITH_PERMISSIONS and database is not None:
+        payload["usuario"] = usuario.model_dump(include={"id", *UsuarioOut.model_fields})
+        payload["permissions"] = usuario.permissions
+        payload["permissions_version"] = get_permissions_version(database, usuario.id)
     return jwt.encode(payload=payload, key=settings.SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -100,21 +249,42 @@ def decode_token(token: str, settings: Settings) -> dict:
     return payload
 
 
+async def run_in_short_session(funcion, *args):
+    """Ejecutar la función con una sesión propia que se cierra al terminar, no retiene la conexión toda la solicitud"""
+    async with async_session_maker() as database:
+        return await database.run_sync(funcion, *args)
+
+
 async def get_current_active_user(
-    database: Annotated[Session, Depends(get_db)],
     settings: Annotated[Settings, Depends(get_settings)],
     token: Annotated[str, Depends(oauth2_scheme)],
 ) -> UsuarioInDB:
     """Obtener el usuario a partir del token"""
     try:
         decoded_token = decode_token(token, settings)
-        usuario = get_usuario_with_email(database, decoded_token["username"])
+        if "permissions_version" in decoded_token:
+            return await run_in_short_session(get_usuario_with_claims, decoded_token)
+
+        async def cargar_usuario() -> UsuarioInDB:
+            usuario = await run_in_short_session(get_usuario_with_email, decoded_token["username"])
+            # Después del login no se necesita el hash de la contraseña, no se guarda en la caché
+            return usuario.model_copy(update={"hashed_password": ""})
+
+        usuario = await usuarios_cache.get_or_set(
+            hashlib.sha256(token.encode("utf-8")).hexdigest(),
+            cargar_usuario,
+            ttl_seconds=decoded_token["expires_at"] - datetime.now(timezone.utc).timestamp(),
+            tags=[f"usuario:{decoded_token['username']}"],
+        )
     except MyAnyError as error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(error),
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except PoolTimeoutError:
+        # Sin conexiones disponibles no es un problema del token, pool_timeout_handler entrega 503
+        raise
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,239 @@
+"""
+Catálogos
+
+Autoridades, distritos, materias, tipos de juicio, módulos y roles cambian pocas veces al año.
+Se cargan una vez por proceso en mapas inmutables, por id y por clave, y se recargan al caducar o al invalidarse.
+Este módulo no importa los modelos, así las propiedades de los modelos pueden consultar el catálogo vigente.
+"""
+
+import hashlib
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, NamedTuple
+
+from ..config.settings import get_settings
+
+
+class DistritoCatalogo(NamedTuple):
+    """Distrito del catálogo"""
+
+    id: int
+    clave: str
+    nombre: str
+    nombre_corto: str
+    estatus: str
+
+
+class MateriaCatalogo(NamedTuple):
+    """Materia del catálogo"""
+
+    id: int
+    clave: str
+    nombre: str
+    estatus: str
+
+
+class AutoridadCatalogo(NamedTuple):
+    """Autoridad del catálogo"""
+
+    id: int
+    clave: str
+    descripcion: str
+    descripcion_corta: str
+    distrito_id: int
+    materia_id: int
+    estatus: str
+
+
+class MateriaTipoJuicioCatalogo(NamedTuple):
+    """Tipo de juicio del catálogo"""
+
+    id: int
+    descripcion: str
+    materia_id: int
+    estatus: str
+
+
+class ModuloCatalogo(NamedTuple):
+    """Módulo del catálogo"""
+
+    id: int
+    nombre: str
+    estatus: str
+
+
+class RolCatalogo(NamedTuple):
+    """Rol del catálogo"""
+
+    id: int
+    nombre: str
+    estatus: str
+
+
+class Catalogo:
+    """Mapas inmutables de los catálogos, por id y por clave, incluye los registros eliminados"""
+
+    def __init__(
+        self,
+        version: int,
+        autoridades: Iterable[AutoridadCatalogo],
+        distritos: Iterable[DistritoCatalogo],
+        materias: Iterable[MateriaCatalogo],
+        materias_tipos_juicios: Iterable[MateriaTipoJuicioCatalogo],
+        modulos: Iterable[ModuloCatalogo],
+        roles: Iterable[RolCatalogo],
+    ):
+        self.version = version
+        self.autoridades = MappingProxyType({autoridad.id: autoridad for autoridad in autoridades})
+        self.autoridades_por_clave = MappingProxyType({autoridad.clave: autoridad for autoridad in self.autoridades.values()})
+        self.distritos = MappingProxyType({distrito.id: distrito for distrito in distritos})
+        self.distritos_por_clave = MappingProxyType({distrito.clave: distrito for distrito in self.distritos.values()})
+        self.materias = MappingProxyType({materia.id: materia for materia in materias})
+        self.materias_por_clave = MappingProxyType({materia.clave: materia for materia in self.materias.values()})
+        self.materias_tipos_juicios = MappingProxyType({tipo.id: tipo for tipo in materias_tipos_juicios})
+        self.modulos = MappingProxyType({modulo.id: modulo for modulo in modulos})
+        self.roles = MappingProxyType({rol.id: rol for rol in roles})
+        # Huella del contenido, es igual en todos los workers que tengan los mismos registros
+        huella = hashlib.sha256()
+        for mapa in (self.autoridades, self.distritos, self.materias, self.materias_tipos_juicios, self.modulos, self.roles):
+            huella.update(repr(sorted(mapa.values())).encode("utf-8"))
+        self.digest = huella.hexdigest()
+
+    def autoridad_activa(self, clave: str) -> AutoridadCatalogo | None:
+        """Autoridad activa a partir de su clave"""
+        return _activo(self.autoridades_por_clave.get(clave))
+
+    def distrito_activo(self, clave: str) -> DistritoCatalogo | None:
+        """Distrito activo a partir de su clave"""
+        return _activo(self.distritos_por_clave.get(clave))
+
+    def materia_activa(self, clave: str) -> MateriaCatalogo | None:
+        """Materia activa a partir de su clave"""
+        return _activo(self.materias_por_clave.get(clave))
+
+    def modulo_activo(self, modulo_id: int) -> ModuloCatalogo | None:
+        """Módulo activo a partir de su ID"""
+        return _activo(self.modulos.get(modulo_id))
+
+    def rol_activo(self, rol_id: int) -> RolCatalogo | None:
+        """Rol activo a partir de su ID"""
+        return _activo(self.roles.get(rol_id))
+
+
+def _activo(registro):
+    """Entregar el registro si está activo"""
+    if registro is not None and registro.estatus == "A":
+        return registro
+    return None
+
+
+class CatalogRow:
+    """Renglón de Core con las propiedades del modelo, como autoridad_clave, que se leen del catálogo vigente"""
+
+    __slots__ = ("_modelo", "_renglon")
+
+    def __init__(self, modelo, renglon):
+        self._modelo = modelo
+        self._renglon = renglon
+
+    def __getattr__(self, nombre: str):
+        propiedad = getattr(self._modelo, nombre, None)
+        if isinstance(propiedad, property):
+            return propiedad.fget(self)
+        # El renglón no trae las relaciones, si una propiedad la usa porque faltó en el catálogo provoca AttributeError
+        return getattr(self._renglon, nombre)
+
+
+class CatalogoCache:
+    """Catálogo vigente del proceso, al caducar o invalidarse se sigue entregando hasta que se recargue"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.catalogo: Catalogo | None = None
+        self.expires_at = 0.0
+        self.invalidaciones = 0
+        self.invalidaciones_cargadas = 0
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """¿Está cargado y no ha caducado?"""
+        return self.catalogo is not None and time.monotonic() < self.expires_at
+
+    def set(self, catalogo: Catalogo, invalidaciones: int) -> None:
+        """Guardar el catálogo cargado, si se invalidó durante la carga queda caducado para recargarlo"""
+        with self._lock:
+            self.catalogo = catalogo
+            self.invalidaciones_cargadas = invalidaciones
+            if invalidaciones == self.invalidaciones:
+                self.expires_at = time.monotonic() + self.ttl_seconds
+            else:
+                self.expires_at = 0.0
+
+    def invalidate(self) -> None:
+        """Marcar como caducado, la siguiente solicitud lo recarga"""
+        with self._lock:
+            self.invalidaciones += 1
+            self.expires_at = 0.0
+
+
+# Catálogo vigente del proceso
+settings = get_settings()
+catalogo_cache = CatalogoCache(ttl_seconds=settings.CATALOGO_TTL_SECONDS)
+
+
+def _buscar(mapa: str, registro_id: int | None):
+    """Buscar en el catálogo vigente, si no está cargado entrega None, si falta el registro se invalida"""
+    catalogo = catalogo_cache.catalogo
+    if catalogo is None or registro_id is None:
+        return None
+    registro = getattr(catalogo, mapa).get(registro_id)
+    if registro is None:
+        catalogo_cache.invalidate()
+    return registro
+
+
+def get_autoridad(autoridad_id: int | None) -> AutoridadCatalogo | None:
+    """Autoridad del catálogo vigente, None si no está"""
+    return _buscar("autoridades", autoridad_id)
+
+
+def get_distrito(distrito_id: int | None) -> DistritoCatalogo | None:
+    """Distrito del catálogo vigente, None si no está"""
+    return _buscar("distritos", distrito_id)
+
+
+def get_distrito_de_autoridad(autoridad_id: int | None) -> DistritoCatalogo | None:
+    """Distrito de la autoridad en el catálogo vigente, None si no está"""
+    autoridad = get_autoridad(autoridad_id)
+    if autoridad is None:
+        return None
+    return get_distrito(autoridad.distrito_id)
+
+
+def get_materia(materia_id: int | None) -> MateriaCatalogo | None:
+    """Materia del catálogo vigente, None si no está"""
+    return _buscar("materias", materia_id)
+
+
+def get_materia_tipo_juicio(materia_tipo_juicio_id: int | None) -> MateriaTipoJuicioCatalogo | None:
+    """Tipo de juicio del catálogo vigente, None si no está"""
+    return _buscar("materias_tipos_juicios", materia_tipo_juicio_id)
+
+
+def get_materia_de_materia_tipo_juicio(materia_tipo_juicio_id: int | None) -> MateriaCatalogo | None:
+    """Materia del tipo de juicio en el catálogo vigente, None si no está"""
+    materia_tipo_juicio = get_materia_tipo_juicio(materia_tipo_juicio_id)
+    if materia_tipo_juicio is None:
+        return None
+    return get_materia(materia_tipo_juicio.materia_id)
+
+
+def get_modulo(modulo_id: int | None) -> ModuloCatalogo | None:
+    """Módulo del catálogo vigente, None si no está"""
+    return _buscar("modulos", modulo_id)
+
+
+def get_rol(rol_id: int | None) -> RolCatalogo | None:
+    """Rol del catálogo vigente, None si no está"""
+    return _buscar("roles", rol_id)
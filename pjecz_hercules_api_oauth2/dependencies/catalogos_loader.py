@@ -0,0 +1,115 @@
+"""
+Catálogos Loader
+
+Carga el catálogo vigente con una consulta por tabla y lo invalida cuando esta API cambia alguno de sus registros.
+Los registros se comparten entre workers con el caché de dos niveles, así sólo un proceso consulta la base de datos.
+"""
+
+import asyncio
+
+from sqlalchemy import ColumnElement, event, select
+
+from ..config.settings import get_settings
+from ..models.autoridades import Autoridad
+from ..models.distritos import Distrito
+from ..models.materias import Materia
+from ..models.materias_tipos_juicios import MateriaTipoJuicio
+from ..models.modulos import Modulo
+from ..models.roles import Rol
+from .catalogos import (
+    AutoridadCatalogo,
+    Catalogo,
+    DistritoCatalogo,
+    MateriaCatalogo,
+    MateriaTipoJuicioCatalogo,
+    ModuloCatalogo,
+    RolCatalogo,
+    catalogo_cache,
+)
+from .database import AsyncSession, async_session_maker
+from .response_cache import purge_response_cache
+from .two_level_cache import create_two_level_cache
+
+# Para que no se recargue varias veces cuando llegan solicitudes al mismo tiempo
+catalogo_lock = asyncio.Lock()
+
+# Registros de los catálogos compartidos entre workers
+settings = get_settings()
+registros_cache = create_two_level_cache("catalogo", max_size=1, ttl_seconds=settings.CATALOGO_TTL_SECONDS)
+
+
+async def _consultar(database: AsyncSession, registro, modelo) -> list:
+    """Consultar sólo las columnas del registro del catálogo"""
+    resultado = await database.execute(select(*[getattr(modelo, campo) for campo in registro._fields]))
+    return [registro._make(renglon) for renglon in resultado]
+
+
+async def load_registros(database: AsyncSession) -> dict:
+    """Consultar los registros de los catálogos, activos y eliminados"""
+    return {
+        "autoridades": await _consultar(database, AutoridadCatalogo, Autoridad),
+        "distritos": await _consultar(database, DistritoCatalogo, Distrito),
+        "materias": await _consultar(database, MateriaCatalogo, Materia),
+        "materias_tipos_juicios": await _consultar(database, MateriaTipoJuicioCatalogo, MateriaTipoJuicio),
+        "modulos": await _consultar(database, ModuloCatalogo, Modulo),
+        "roles": await _consultar(database, RolCatalogo, Rol),
+    }
+
+
+async def _load_registros_con_sesion() -> dict:
+    """Consultar los registros de los catálogos con una sesión propia"""
+    async with async_session_maker() as database:
+        return await load_registros(database)
+
+
+async def get_catalogo() -> Catalogo:
+    """Catálogo vigente, si caducó o se invalidó se recarga"""
+    if catalogo_cache.is_fresh():
+        return catalogo_cache.catalogo
+    async with catalogo_lock:
+        if not catalogo_cache.is_fresh():
+            invalidaciones = catalogo_cache.invalidaciones
+            # Si se invalidó, los registros compartidos también están atrasados
+            if invalidaciones != catalogo_cache.invalidaciones_cargadas:
+                await registros_cache.clear()
+            registros = await registros_cache.get_or_set("registros", _load_registros_con_sesion)
+            anterior = catalogo_cache.catalogo
+            version = anterior.version + 1 if anterior is not None else 1
+            catalogo_cache.set(Catalogo(version=version, **registros), invalidaciones)
+            # Si cambiaron los registros, las respuestas guardadas de los catálogos están atrasadas
+            if anterior is not None and anterior.digest != catalogo_cache.catalogo.digest:
+                purge_response_cache()
+    return catalogo_cache.catalogo
+
+
+def autoridad_activa_id(catalogo: Catalogo, clave: str) -> int | ColumnElement:
+    """ID de la autoridad activa para filtrar, si no está en el catálogo, como una recién creada, la subconsulta por su clave"""
+    autoridad = catalogo.autoridad_activa(clave)
+    if autoridad is not None:
+        return autoridad.id
+    # Si existe, al leer sus registros la propiedad no la encuentra en el catálogo y éste se recarga
+    return select(Autoridad.id).where(Autoridad.clave == clave).where(Autoridad.estatus == "A").scalar_subquery()
+
+
+@event.listens_for(Autoridad, "after_insert")
+@event.listens_for(Autoridad, "after_update")
+@event.listens_for(Autoridad, "after_delete")
+@event.listens_for(Distrito, "after_insert")
+@event.listens_for(Distrito, "after_update")
+@event.listens_for(Distrito, "after_delete")
+@event.listens_for(Materia, "after_insert")
+@event.listens_for(Materia, "after_update")
+@event.listens_for(Materia, "after_delete")
+@event.listens_for(MateriaTipoJuicio, "after_insert")
+@event.listens_for(MateriaTipoJuicio, "after_update")
+@event.listens_for(MateriaTipoJuicio, "after_delete")
+@event.listens_for(Modulo, "after_insert")
+@event.listens_for(Modulo, "after_update")
+@event.listens_for(Modulo, "after_delete")
+@event.listens_for(Rol, "after_insert")
+@event.listens_for(Rol, "after_update")
+@event.listens_for(Rol, "after_delete")
+def _on_catalogo_change(mapper, connection, target) -> None:
+    """Al cambiar un catálogo desde esta API, invalidarlo y purgar sus respuestas guardadas"""
+    catalogo_cache.invalidate()
+    purge_response_cache()
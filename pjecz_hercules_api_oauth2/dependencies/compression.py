@@ -0,0 +1,194 @@
+"""
+Compression
+
+Middleware que comprime las respuestas con zstd, br o gzip, según Accept-Encoding y los que estén instalados.
+Sólo se comprimen los tipos de texto como JSON, NDJSON y CSV, los ya comprimidos como PDF y Parquet se entregan tal cual.
+Una respuesta completa menor a COMPRESSION_MINIMUM_SIZE no se comprime. Las respuestas en flujo se comprimen
+por partes, cada parte se vacía al enviarla para que el cliente la reciba sin esperar al final.
+br requiere brotli y zstd requiere zstandard, que son opcionales.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tipos de contenido que se comprimen, los demás, como application/pdf, se entregan tal cual
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "application/xml", "application/javascript", "text/")
+
+# Sin códigos de estado con contenido no se comprime
+ESTADOS_SIN_CONTENIDO = (204, 304)
+
+
+class GzipCompressor:
+    """Compresor gzip"""
+
+    def __init__(self, nivel: int):
+        self.compresor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def comprimir(self, contenido: bytes, terminar: bool) -> bytes:
+        """Comprimir la parte, vaciarla si no es la última y cerrar si lo es"""
+        return self.compresor.compress(contenido) + self.compresor.flush(zlib.Z_FINISH if terminar else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliCompressor:
+    """Compresor br"""
+
+    def __init__(self, nivel: int):
+        self.compresor = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, contenido: bytes, terminar: bool) -> bytes:
+        """Comprimir la parte, vaciarla si no es la última y cerrar si lo es"""
+        comprimido = self.compresor.process(contenido)
+        return comprimido + (self.compresor.finish() if terminar else self.compresor.flush())
+
+
+class ZstdCompressor:
+    """Compresor zstd"""
+
+    def __init__(self, nivel: int):
+        self.compresor = zstandard.ZstdCompressor(level=nivel).compressobj()
+
+    def comprimir(self, contenido: bytes, terminar: bool) -> bytes:
+        """Comprimir la parte, vaciarla si no es la última y cerrar si lo es"""
+        modo = zstandard.COMPRESSOBJ_FLUSH_FINISH if terminar else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self.compresor.compress(contenido) + self.compresor.flush(modo)
+
+
+def available_encodings() -> dict:
+    """Compresores instalados, en el orden de preferencia del servidor"""
+    compresores = {}
+    if zstandard is not None:
+        compresores["zstd"] = ZstdCompressor
+    if brotli is not None:
+        compresores["br"] = BrotliCompressor
+    compresores["gzip"] = GzipCompressor
+    return compresores
+
+
+def negotiate_encoding(accept_encoding: str, disponibles) -> str | None:
+    """Elegir de Accept-Encoding el de mayor q, en empate el primero de disponibles, None si no acepta ninguno"""
+    pesos = {}
+    for elemento in accept_encoding.lower().split(","):
+        nombre, _, parametros = elemento.partition(";")
+        peso = 1.0
+        parametro, _, valor = parametros.strip().partition("=")
+        if parametro.strip() == "q":
+            try:
+                peso = float(valor)
+            except ValueError:
+                peso = 0.0
+        pesos[nombre.strip()] = peso
+    candidatos = [(pesos.get(nombre, pesos.get("*", 0.0)), nombre) for nombre in disponibles]
+    candidatos = [(peso, nombre) for peso, nombre in candidatos if peso > 0]
+    if not candidatos:
+        return None
+    return max(candidatos, key=lambda candidato: candidato[0])[1]
+
+
+def is_compressible(content_type: str) -> bool:
+    """¿Es un tipo de contenido de texto que conviene comprimir?"""
+    tipo = content_type.split(";")[0].strip().lower()
+    return tipo.startswith(TIPOS_COMPRIMIBLES) or tipo.endswith("+json")
+
+
+def _debilitar_etag(encabezados: MutableHeaders) -> None:
+    """El contenido comprimido es otra representación, el ETag pasa a débil y sigue sirviendo para If-None-Match"""
+    etag = encabezados.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        encabezados["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Comprimir las respuestas con la codificación que acepte el cliente"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, niveles: dict | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.niveles = {"gzip": 6, "br": 4, "zstd": 3} | (niveles or {})
+        self.compresores = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.compresores)
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+        respuesta = _RespuestaComprimida(self, codificacion, send)
+        await self.app(scope, receive, respuesta.send)
+
+
+class _RespuestaComprimida:
+    """Decidir con el inicio y la primera parte si se comprime y después comprimir cada parte"""
+
+    def __init__(self, middleware: CompressionMiddleware, codificacion: str, send: Send):
+        self.middleware = middleware
+        self.codificacion = codificacion
+        self.enviar = send
+        self.inicio: Message | None = None
+        self.compresor = None
+        self.decidido = False
+
+    def _conviene(self, encabezados: Headers, contenido: bytes, mas: bool) -> bool:
+        """¿Se comprime? Con contenido de texto, sin codificación previa y si está completo, desde el tamaño mínimo"""
+        if self.inicio["status"] in ESTADOS_SIN_CONTENIDO or "content-encoding" in encabezados:
+            return False
+        if not is_compressible(encabezados.get("content-type", "")):
+            return False
+        return mas or len(contenido) >= self.middleware.minimum_size
+
+    async def send(self, mensaje: Message) -> None:
+        if mensaje["type"] == "http.response.start":
+            self.inicio = mensaje
+            return
+        if mensaje["type"] != "http.response.body":
+            # Otras formas de enviar el contenido, como pathsend, no se comprimen
+            if not self.decidido:
+                self.decidido = True
+                await self.enviar(self.inicio)
+            await self.enviar(mensaje)
+            return
+        contenido = mensaje.get("body", b"")
+        mas = mensaje.get("more_body", False)
+
+        # Con la primera parte se decide, el inicio se envía hasta entonces para cambiar sus encabezados
+        if not self.decidido:
+            self.decidido = True
+            encabezados = MutableHeaders(scope=self.inicio)
+            # El 304 no sabe si el 200 se comprimiría, con una codificación negociada el ETag es débil en ambos
+            _debilitar_etag(encabezados)
+            encabezados.add_vary_header("Accept-Encoding")
+            if not self._conviene(encabezados, contenido, mas):
+                await self.enviar(self.inicio)
+                await self.enviar(mensaje)
+                return
+            self.compresor = self.middleware.compresores[self.codificacion](self.middleware.niveles[self.codificacion])
+            contenido = self.compresor.comprimir(contenido, terminar=not mas)
+            encabezados["Content-Encoding"] = self.codificacion
+            if mas:
+                del encabezados["Content-Length"]
+            else:
+                encabezados["Content-Length"] = str(len(contenido))
+            await self.enviar(self.inicio)
+            await self.enviar({"type": "http.response.body", "body": contenido, "more_body": mas})
+            return
+
+        # Las demás partes se comprimen si se decidió comprimir
+        if self.compresor is None:
+            await self.enviar(mensaje)
+            return
+        await self.enviar(
+            {"type": "http.response.body", "body": self.compresor.comprimir(contenido, terminar=not mas), "more_body": mas}
+        )
@@ -0,0 +1,140 @@
+"""
+Conditional Requests
+
+Validadores ETag y Last-Modified a partir de la columna modificado, para responder 304 sin serializar.
+En el detalle se calculan con el ID y modificado del registro, en el paginado con la cantidad y el máximo de
+modificado de la consulta filtrada. También se incluye la huella del catálogo, porque las respuestas llevan
+nombres y claves de autoridades, distritos y materias que no cambian el modificado del registro.
+En el paginado sólo con el total exacto y sin cursor, porque la cantidad se cuenta de todos modos, en cada
+solicitud en la misma consulta que el máximo, así el ETag fuerte nunca está atrasado; con cursor o con otro total
+no hay validadores.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple
+
+import pytz
+from fastapi import Request, Response, status
+from sqlalchemy import Select, func
+
+from ..config.settings import get_settings
+from .catalogos import catalogo_cache
+from .database import AsyncSession
+from .fastapi_pagination_custom_page import conteos_cache, count_cache_key
+
+settings = get_settings()
+
+
+class Validators(NamedTuple):
+    """ETag fuerte y fecha de la última modificación, en UTC"""
+
+    etag: str
+    last_modified: datetime | None
+
+
+def _to_utc(modificado: datetime | None) -> datetime | None:
+    """La columna modificado no tiene zona horaria, se guarda con la hora local TZ"""
+    if modificado is None:
+        return None
+    if modificado.tzinfo is None:
+        modificado = pytz.timezone(settings.TZ).localize(modificado)
+    return modificado.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag(request: Request, *partes) -> str:
+    """ETag fuerte con la ruta, los parámetros, la huella del catálogo y las partes"""
+    catalogo = catalogo_cache.catalogo
+    huella = hashlib.sha256()
+    huella.update(request.url.path.encode("utf-8"))
+    huella.update(repr(sorted(request.query_params.multi_items())).encode("utf-8"))
+    huella.update(catalogo.digest.encode("ascii") if catalogo is not None else b"")
+    huella.update(repr(partes).encode("utf-8"))
+    return f'"{huella.hexdigest()[:32]}"'
+
+
+def record_validators(request: Request, registro) -> Validators:
+    """Validadores del detalle de un registro"""
+    return Validators(
+        etag=_etag(request, registro.__tablename__, registro.id, registro.modificado),
+        last_modified=_to_utc(registro.modificado),
+    )
+
+
+async def page_validators(request: Request, database: AsyncSession, consulta: Select, modelo) -> Validators | None:
+    """Validadores del paginado con total exacto y sin cursor, la cantidad pasa a la caché de los conteos"""
+    if request.query_params.get("cursor") or request.query_params.get("total", "exact") != "exact":
+        return None
+    cantidad, modificado = (
+        await database.execute(consulta.with_only_columns(func.count(), func.max(modelo.modificado)).order_by(None))
+    ).one()
+    conteos_cache.set(count_cache_key(database, consulta), cantidad)
+    return Validators(
+        etag=_etag(request, modelo.__tablename__, cantidad, modificado),
+        last_modified=_to_utc(modificado),
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match, como indica el RFC 9110 para GET"""
+    if if_none_match.strip() == "*":
+        return True
+    etiquetas = [etiqueta.strip() for etiqueta in if_none_match.split(",")]
+    return etag in [etiqueta[2:] if etiqueta.startswith("W/") else etiqueta for etiqueta in etiquetas]
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime | None) -> bool:
+    """¿No ha cambiado desde la fecha de If-Modified-Since?"""
+    if last_modified is None:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        return False
+    return last_modified <= desde
+
+
+def validators_headers(validators: Validators) -> dict:
+    """Encabezados de la respuesta con los validadores"""
+    headers = {"ETag": validators.etag, "Cache-Control": "private, no-cache"}
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """¿El cliente ya tiene esta versión? Si viene If-None-Match se ignora If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+    return _not_modified_since(request.headers.get("if-modified-since", ""), validators.last_modified)
+
+
+def not_modified(request: Request, response: Response, validators: Validators | None) -> Response | None:
+    """Agregar los validadores a la respuesta, si el cliente ya tiene esta versión entrega la respuesta 304"""
+    if validators is None:
+        return None
+    headers = validators_headers(validators)
+    response.headers.update(headers)
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
+def record_not_modified(request: Request, response: Response, registro) -> Response | None:
+    """Validar el detalle de un registro, entrega la respuesta 304 o None"""
+    return not_modified(request, response, record_validators(request, registro))
+
+
+async def page_not_modified(
+    request: Request,
+    response: Response,
+    database: AsyncSession,
+    consulta: Select,
+    modelo,
+) -> Response | None:
+    """Validar el paginado, entrega la respuesta 304 o None"""
+    return not_modified(request, response, await page_validators(request, database, consulta, modelo))
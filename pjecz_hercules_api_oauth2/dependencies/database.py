@@ -6,29 +6,86 @@ from typing import Annotated
 
 from fastapi import Depends
 from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
 from ..config.settings import Settings, get_settings
+from .database_pool import MeteredAsyncAdaptedQueuePool, MeteredQueuePool
 
 Base = declarative_base()
 
 
+def get_pool_options(settings: Settings) -> dict:
+    """Opciones del pool de conexiones, iguales para los engines síncrono y asíncrono"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 def get_engine(settings: Settings = get_settings()) -> Engine:
     """Database engine"""
     return create_engine(
-        f"postgresql+psycopg2://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+        f"postgresql+psycopg2://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}",
+        connect_args={
+            "application_name": settings.DB_APPLICATION_NAME,
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}",
+        },
+        poolclass=MeteredQueuePool,
+        **get_pool_options(settings),
+    )
+
+
+def get_async_engine(settings: Settings = get_settings(), host: str = "", port: int = 0) -> AsyncEngine:
+    """Database async engine, con host y port se conecta a otro servidor, como la réplica de lectura"""
+    host = host or settings.DB_HOST
+    port = port or settings.DB_PORT
+    return create_async_engine(
+        f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}@{host}:{port}/{settings.DB_NAME}",
+        connect_args={
+            "server_settings": {
+                "application_name": settings.DB_APPLICATION_NAME,
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+            },
+        },
+        poolclass=MeteredAsyncAdaptedQueuePool,
+        **get_pool_options(settings),
     )
 
 
+def get_async_replica_engine(settings: Settings = get_settings()) -> AsyncEngine | None:
+    """Database async engine de la réplica de lectura, entrega None si no está definido DB_REPLICA_HOST"""
+    if settings.DB_REPLICA_HOST == "":
+        return None
+    return get_async_engine(settings, host=settings.DB_REPLICA_HOST, port=settings.DB_REPLICA_PORT)
+
+
 engine = get_engine()
 session_maker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = get_async_engine()
+async_session_maker = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
+
+async_replica_engine = get_async_replica_engine()
+async_replica_session_maker = None
+if async_replica_engine is not None:
+    async_replica_session_maker = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_replica_engine)
+
 
 def get_db(settings: Annotated[Settings, Depends(get_settings)]) -> Session:
-    """Database session"""
+    """Database session, síncrona, para el login y los programas que no usan asyncio"""
     database = session_maker()
     try:
         yield database
     finally:
         database.close()
+
+
+async def get_async_db(settings: Annotated[Settings, Depends(get_settings)]) -> AsyncSession:
+    """Database async session, para las rutas"""
+    async with async_session_maker() as database:
+        yield database
@@ -0,0 +1,81 @@
+"""
+Database Pool
+
+Pools de conexiones que miden cuánto esperan las solicitudes por una conexión.
+"""
+
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """Contadores de las esperas por una conexión"""
+
+    def __init__(self):
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, wait_seconds: float, timeout: bool = False) -> None:
+        """Registrar una espera"""
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            if timeout:
+                self.timeouts += 1
+
+    def stats(self) -> dict:
+        """Entregar los contadores"""
+        with self._lock:
+            return {
+                "waits": self.waits,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "timeouts": self.timeouts,
+            }
+
+
+class MeteredPoolMixin:
+    """Medir el tiempo de espera al tomar una conexión del pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metrics.record(time.perf_counter() - inicio)
+        return conexion
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    """QueuePool con métricas, para el engine síncrono"""
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con métricas, para el engine asíncrono"""
+
+
+def get_pool_status(nombre: str, pool: Pool) -> dict:
+    """Entregar las conexiones en uso, inactivas y de desborde, y las esperas del pool"""
+    status = {"nombre": nombre, "size": 0, "checked_out": 0, "idle": 0, "overflow": 0}
+    if isinstance(pool, QueuePool):
+        status["size"] = pool.size()
+        status["checked_out"] = pool.checkedout()
+        status["idle"] = pool.checkedin()
+        status["overflow"] = max(0, pool.overflow())
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.stats())
+    return status
@@ -0,0 +1,190 @@
+"""
+Database Read
+
+Las rutas de sólo lectura usan la réplica si está definido DB_REPLICA_HOST, si falla se usa el primario.
+Después de que un usuario escribe, sus lecturas van al primario por READ_YOUR_WRITES_SECONDS,
+así ve sus cambios aunque la réplica vaya atrasada. La conexión a la réplica se toma en la primera consulta,
+una solicitud que se responde desde la caché no la ocupa.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from typing import Annotated
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config.settings import get_settings
+from ..schemas.usuarios import UsuarioInDB
+from .authentications import get_current_active_user
+from .database import AsyncSession, async_engine, async_replica_session_maker, async_session_maker
+from .redis_connection import get_redis
+from .ttl_cache import TTLCache
+
+
+class WriteMarkStore(ABC):
+    """Almacén de las marcas de los usuarios que acaban de escribir"""
+
+    @abstractmethod
+    async def mark(self, username: str) -> None:
+        """Marcar que el usuario acaba de escribir"""
+
+    @abstractmethod
+    async def is_marked(self, username: str) -> bool:
+        """¿Escribió el usuario hace menos de READ_YOUR_WRITES_SECONDS?"""
+
+
+class MemoryWriteMarkStore(WriteMarkStore):
+    """Marcas en la memoria del proceso, también sirve para las pruebas"""
+
+    def __init__(self, ttl_seconds: int, max_size: int = 10000):
+        self.marks = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    async def mark(self, username: str) -> None:
+        self.marks.set(username, True)
+
+    async def is_marked(self, username: str) -> bool:
+        return self.marks.get(username) is not None
+
+
+class RedisWriteMarkStore(WriteMarkStore):
+    """Marcas en Redis, compartidas entre workers e instancias"""
+
+    def __init__(self, redis: Redis, fallback: WriteMarkStore, ttl_seconds: int, prefix: str = "write_mark"):
+        self.redis = redis
+        self.fallback = fallback
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def mark(self, username: str) -> None:
+        # También se marca en este proceso, por si Redis no responde
+        await self.fallback.mark(username)
+        try:
+            await self.redis.set(f"{self.prefix}:{username}", 1, ex=self.ttl_seconds)
+        except RedisError:
+            pass
+
+    async def is_marked(self, username: str) -> bool:
+        if await self.fallback.is_marked(username):
+            return True
+        try:
+            return await self.redis.exists(f"{self.prefix}:{username}") > 0
+        except RedisError:
+            # Si Redis no responde no se sabe si escribió en otro worker, se lee del primario
+            return True
+
+
+class ReplicaHealth:
+    """Si falla la conexión a la réplica se deja de intentar por unos segundos"""
+
+    def __init__(self, retry_seconds: int):
+        self.retry_seconds = retry_seconds
+        self.retry_at = 0.0
+
+    def is_available(self) -> bool:
+        """¿Se puede intentar usar la réplica?"""
+        return time.monotonic() >= self.retry_at
+
+    def mark_failed(self) -> None:
+        """Marcar que falló la réplica"""
+        self.retry_at = time.monotonic() + self.retry_seconds
+
+
+class ReplicaAsyncSession(AsyncSession):
+    """Sesión con la réplica que se conecta en la primera consulta, si falla la conexión sigue con el primario"""
+
+    conectada = False
+
+    async def _conectar(self) -> None:
+        """Tomar la conexión a la réplica, si falla se marca y se cambia al primario"""
+        if self.conectada:
+            return
+        self.conectada = True
+        try:
+            await self.connection()
+        except (DBAPIError, OSError, PoolTimeoutError):
+            await self.close()
+            replica_health.mark_failed()
+            self.sync_session.bind = async_engine.sync_engine
+
+    async def execute(self, *args, **kwargs):
+        await self._conectar()
+        return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        await self._conectar()
+        return await super().scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        await self._conectar()
+        return await super().scalars(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._conectar()
+        return await super().get(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        await self._conectar()
+        return await super().stream(*args, **kwargs)
+
+    async def stream_scalars(self, *args, **kwargs):
+        await self._conectar()
+        return await super().stream_scalars(*args, **kwargs)
+
+    async def run_sync(self, *args, **kwargs):
+        await self._conectar()
+        return await super().run_sync(*args, **kwargs)
+
+
+# Marcas de escritura, usa Redis si está definido REDIS_URL, de lo contrario la memoria del proceso
+settings = get_settings()
+memory_write_mark_store = MemoryWriteMarkStore(ttl_seconds=settings.READ_YOUR_WRITES_SECONDS)
+redis_client = get_redis()
+if redis_client is None:
+    write_mark_store = memory_write_mark_store
+else:
+    write_mark_store = RedisWriteMarkStore(
+        redis_client, fallback=memory_write_mark_store, ttl_seconds=settings.READ_YOUR_WRITES_SECONDS
+    )
+replica_health = ReplicaHealth(retry_seconds=settings.DB_REPLICA_RETRY_SECONDS)
+replica_session_maker = None
+if async_replica_session_maker is not None:
+    replica_session_maker = async_sessionmaker(class_=ReplicaAsyncSession, **async_replica_session_maker.kw)
+
+
+def get_write_mark_store() -> WriteMarkStore:
+    """Almacén de las marcas de escritura, se puede reemplazar en las pruebas con dependency_overrides"""
+    return write_mark_store
+
+
+async def open_replica_session() -> AsyncSession | None:
+    """Abrir una sesión con la réplica, entrega None si no está definida o si está en espera de reintentar"""
+    if replica_session_maker is None or not replica_health.is_available():
+        return None
+    return replica_session_maker()
+
+
+async def open_read_session(usuario_email: str, write_marks: WriteMarkStore) -> AsyncSession:
+    """Abrir una sesión de sólo lectura, con la réplica salvo que el usuario acabe de escribir"""
+    database = None
+    if replica_session_maker is not None and not await write_marks.is_marked(usuario_email):
+        database = await open_replica_session()
+    if database is None:
+        database = async_session_maker()
+    return database
+
+
+async def get_db_read(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
+) -> AsyncSession:
+    """Database async session para las rutas de sólo lectura, usa la réplica salvo que el usuario acabe de escribir"""
+    database = await open_read_session(current_user.email, write_marks)
+    try:
+        yield database
+    finally:
+        await database.close()
@@ -67,6 +67,14 @@ class MyTimeoutError(MyAnyError):
     """Excepción porque se agoto el tiempo de espera"""
 
 
+class MyTooManyRequestsError(MyAnyError):
+    """Excepción porque se rebasó el límite de solicitudes"""
+
+    def __init__(self, message: str, retry_after: int = 60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class MyUnknownError(MyAnyError):
     """Excepción porque hubo un error desconocido"""
 
@@ -0,0 +1,184 @@
+"""
+Exports
+
+Exportar todos los registros de un filtro en un flujo, sin paginar, en NDJSON, CSV o Parquet.
+Se consulta con un cursor del lado del servidor en lotes de EXPORT_YIELD_PER registros, cada lote se convierte
+y se envía antes de traer el siguiente, así la memoria no depende de la cantidad y si el cliente lee lento se espera.
+La sesión se abre dentro del generador porque la de las dependencias se cierra antes de enviar el contenido.
+Los tres formatos se generan de renglones de Core, sin objetos del ORM, cada lote es un row group de Parquet.
+Parquet requiere pyarrow, que es opcional.
+"""
+
+import csv
+import io
+from datetime import date, datetime
+from importlib.util import find_spec
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from ..config.settings import get_settings
+from .database import AsyncSession
+from .database_read import WriteMarkStore, open_read_session
+
+settings = get_settings()
+
+# Tipo de contenido de los formatos en columnas, la extensión es la clave
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_disponible() -> bool:
+    """¿Está instalado pyarrow para exportar en Parquet?"""
+    return find_spec("pyarrow") is not None
+
+
+def _ndjson(esquema: type[BaseModel], renglones: list) -> bytes:
+    """Convertir un lote de renglones a líneas JSON"""
+    serializador = esquema.__pydantic_serializer__
+    return b"".join(serializador.to_json(esquema.model_validate(renglon)) + b"\n" for renglon in renglones)
+
+
+async def ndjson_chunks(database: AsyncSession, consulta: Select, esquema: type[BaseModel]) -> AsyncIterator[bytes]:
+    """Entregar las líneas JSON por lotes, la consulta de Core debe tener las columnas del esquema"""
+    resultado = await database.stream(consulta.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+    async for renglones in resultado.partitions():
+        yield _ndjson(esquema, renglones)
+
+
+async def csv_chunks(database: AsyncSession, consulta: Select) -> AsyncIterator[bytes]:
+    """Entregar el encabezado y los renglones en CSV por lotes"""
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(consulta.selected_columns.keys())
+    resultado = await database.stream(consulta.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+    async for renglones in resultado.partitions():
+        escritor.writerows(renglones)
+        yield salida.getvalue().encode("utf-8")
+        salida.seek(0)
+        salida.truncate()
+    if salida.tell() > 0:
+        yield salida.getvalue().encode("utf-8")
+
+
+class _Drenaje(io.RawIOBase):
+    """Archivo de sólo escritura que guarda lo escrito hasta que se drena, lleva la posición para Parquet"""
+
+    def __init__(self):
+        super().__init__()
+        self.partes = []
+        self.posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, contenido) -> int:
+        contenido = bytes(contenido)
+        self.partes.append(contenido)
+        self.posicion += len(contenido)
+        return len(contenido)
+
+    def tell(self) -> int:
+        return self.posicion
+
+    def drenar(self) -> bytes:
+        """Entregar y olvidar lo escrito"""
+        contenido = b"".join(self.partes)
+        self.partes = []
+        return contenido
+
+
+def parquet_schema(consulta: Select):
+    """Esquema de Arrow a partir de los tipos de las columnas de la consulta"""
+    import pyarrow as pa
+
+    tipos = {bool: pa.bool_(), date: pa.date32(), datetime: pa.timestamp("us"), int: pa.int64(), str: pa.string()}
+    return pa.schema([(columna.key, tipos[columna.type.python_type]) for columna in consulta.selected_columns])
+
+
+async def parquet_chunks(database: AsyncSession, consulta: Select) -> AsyncIterator[bytes]:
+    """Entregar el archivo Parquet por partes, un row group por lote y al final el pie con los metadatos"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = parquet_schema(consulta)
+    salida = _Drenaje()
+    escritor = pq.ParquetWriter(salida, esquema)
+    try:
+        resultado = await database.stream(consulta.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+        async for renglones in resultado.partitions():
+            columnas = [pa.array(valores, type=campo.type) for valores, campo in zip(zip(*renglones), esquema)]
+            escritor.write_table(pa.Table.from_arrays(columnas, schema=esquema))
+            yield salida.drenar()
+    finally:
+        escritor.close()
+    yield salida.drenar()
+
+
+def columnar_chunks(database: AsyncSession, consulta: Select, formato: str) -> AsyncIterator[bytes]:
+    """Entregar el contenido en CSV o en Parquet por partes"""
+    if formato == "parquet":
+        return parquet_chunks(database, consulta)
+    return csv_chunks(database, consulta)
+
+
+async def _con_sesion_de_lectura(
+    usuario_email: str,
+    write_marks: WriteMarkStore,
+    chunks: Callable[[AsyncSession], AsyncIterator[bytes]],
+) -> AsyncIterator[bytes]:
+    """Abrir la sesión de lectura, entregar las partes y cerrarla al terminar o si el cliente se desconecta"""
+    database = await open_read_session(usuario_email, write_marks)
+    try:
+        async for parte in chunks(database):
+            yield parte
+    finally:
+        await database.close()
+
+
+def ndjson_response(
+    usuario_email: str,
+    write_marks: WriteMarkStore,
+    consulta: Select,
+    esquema: type[BaseModel],
+    nombre: str,
+) -> StreamingResponse:
+    """Respuesta NDJSON, un registro por línea, la consulta de Core debe tener su orden"""
+    return StreamingResponse(
+        _con_sesion_de_lectura(usuario_email, write_marks, lambda database: ndjson_chunks(database, consulta, esquema)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.ndjson"'},
+    )
+
+
+def columnar_response(
+    usuario_email: str,
+    write_marks: WriteMarkStore,
+    consulta: Select,
+    formato: str,
+    nombre: str,
+) -> StreamingResponse:
+    """Respuesta CSV o Parquet con los renglones de una consulta de Core, la consulta debe tener su orden"""
+    if formato == "parquet" and not parquet_disponible():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Parquet requiere pyarrow")
+    return StreamingResponse(
+        _con_sesion_de_lectura(usuario_email, write_marks, lambda database: columnar_chunks(database, consulta, formato)),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
+
+
+async def columnar_file(database: AsyncSession, consulta: Select, formato: str, ruta: Path) -> int:
+    """Escribir en un archivo CSV o Parquet los renglones de una consulta de Core, entrega los bytes escritos"""
+    cantidad = 0
+    with ruta.open("wb") as archivo:
+        async for parte in columnar_chunks(database, consulta, formato):
+            archivo.write(parte)
+            cantidad += len(parte)
+    return cantidad
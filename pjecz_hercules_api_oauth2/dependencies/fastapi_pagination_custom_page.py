@@ -2,15 +2,38 @@
 FastAPI Pagination Custom Page
 """
 
+import base64
+import json
 from abc import ABC
+from datetime import date, datetime
+from functools import partial
 from typing import Any, Generic, Optional, Sequence, TypeVar
 
-from fastapi import Query
-from fastapi_pagination.bases import AbstractPage, AbstractParams
+from fastapi import HTTPException, Query, status
+from fastapi_pagination.api import create_page, resolve_params
+from fastapi_pagination.bases import AbstractPage, AbstractParams, RawParams
+from fastapi_pagination.ext.sqlalchemy import create_count_query
 from fastapi_pagination.limit_offset import LimitOffsetParams
 from fastapi_pagination.types import GreaterEqualOne, GreaterEqualZero
+from pydantic import ValidationError
+from sqlalchemy import Executable, Select, and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ClauseElement, ColumnElement, UnaryExpression
+from sqlalchemy.util import greenlet_spawn
 from typing_extensions import Self
 
+from ..config.settings import get_settings
+from .catalogos import CatalogRow, catalogo_cache
+from .ttl_cache import TTLCache
+
+# Conteos memorizados por el SQL y sus parámetros
+settings = get_settings()
+conteos_cache = TTLCache(
+    max_size=settings.PAGINATION_COUNT_CACHE_MAX_SIZE, ttl_seconds=settings.PAGINATION_COUNT_CACHE_TTL_SECONDS
+)
+
 
 class CustomPageParams(LimitOffsetParams):
     """
@@ -19,6 +42,14 @@ class CustomPageParams(LimitOffsetParams):
 
     offset: int = Query(0, ge=0, description="Page offset")
     limit: int = Query(10, ge=1, le=100, description="Page size limit")
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente, se usa en lugar de offset")
+    total: str = Query("exact", pattern="^(none|estimate|exact)$", description="Total exacto, estimado o sin total")
+
+    def to_raw_params(self) -> RawParams:
+        """Con cursor no se usa offset, el filtro por la clave de orden lo sustituye"""
+        if self.cursor:
+            return RawParams(limit=self.limit, offset=0)
+        return super().to_raw_params()
 
 
 T = TypeVar("T")
@@ -36,6 +67,8 @@ class CustomPage(AbstractPage[T], Generic[T], ABC):
     total: Optional[GreaterEqualZero]
     limit: Optional[GreaterEqualOne]
     offset: Optional[GreaterEqualZero]
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
 
     __params_type__ = CustomPageParams
 
@@ -52,22 +85,217 @@ class CustomPage(AbstractPage[T], Generic[T], ABC):
         """
         raw_params = params.to_raw_params().as_limit_offset()
 
-        if total is None or total == 0:
+        # Con el orden se puede entregar el cursor de la página siguiente
+        orden = kwargs.pop("orden", None)
+        has_more = kwargs.pop("has_more", None)
+        offset = None if getattr(params, "cursor", None) else raw_params.offset
+
+        if len(items) == 0 and not total:
             return cls(
                 success=False,
                 message="No se encontraron registros",
                 data=[],
-                total=0,
+                total=total,
                 limit=raw_params.limit,
-                offset=raw_params.offset,
+                offset=offset,
+                has_more=False,
             )
 
+        next_cursor = None
+        if orden is not None and has_more:
+            next_cursor = encode_cursor(orden, items[-1])
+
         return cls(
             success=True,
             message="Success",
             data=items,
             total=total,
             limit=raw_params.limit,
-            offset=raw_params.offset,
+            offset=offset,
+            next_cursor=next_cursor,
+            has_more=has_more,
             **kwargs,
         )
+
+
+def _orden_columna(expresion: ColumnElement) -> tuple[ColumnElement, bool]:
+    """Entregar la columna y si es descendente a partir de una expresión de order_by"""
+    if isinstance(expresion, UnaryExpression) and expresion.modifier in (operators.desc_op, operators.asc_op):
+        return expresion.element, expresion.modifier is operators.desc_op
+    return expresion, False
+
+
+def encode_cursor(orden: Sequence[ColumnElement], item: Any) -> str:
+    """Codificar en base64 los valores de la clave de orden del último registro"""
+    valores = []
+    for expresion in orden:
+        columna, _ = _orden_columna(expresion)
+        valor = getattr(item, columna.key)
+        if isinstance(valor, (date, datetime)):
+            valor = valor.isoformat()
+        valores.append(valor)
+    return base64.urlsafe_b64encode(json.dumps(valores).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(orden: Sequence[ColumnElement], cursor: str) -> list:
+    """Decodificar el cursor a los valores de la clave de orden, provoca ValueError si no es válido"""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as error:
+        raise ValueError("No es válido el cursor") from error
+    if not isinstance(valores, list) or len(valores) != len(orden):
+        raise ValueError("No es válido el cursor")
+    resultado = []
+    for expresion, valor in zip(orden, valores):
+        columna, _ = _orden_columna(expresion)
+        tipo = columna.type.python_type
+        if tipo in (date, datetime):
+            # Las fechas vienen como texto ISO, otro tipo de JSON no es válido
+            if not isinstance(valor, str):
+                raise ValueError("No es válido el cursor")
+            valor = tipo.fromisoformat(valor)
+        elif not isinstance(valor, tipo) or (isinstance(valor, bool) and tipo is not bool):
+            # En JSON true y false son bool, que en Python también es int
+            raise ValueError("No es válido el cursor")
+        resultado.append(valor)
+    return resultado
+
+
+def filter_after_cursor(consulta: Select, orden: Sequence[ColumnElement], valores: list) -> Select:
+    """Filtrar los registros que siguen a la clave de orden del cursor"""
+    columnas = [_orden_columna(expresion) for expresion in orden]
+
+    # Si todas las columnas tienen la misma dirección se compara la tupla, que aprovecha el índice compuesto
+    descendentes = {desc for _, desc in columnas}
+    if len(descendentes) == 1:
+        izquierda = tuple_(*[columna for columna, _ in columnas])
+        derecha = tuple_(*valores)
+        return consulta.filter(izquierda < derecha if descendentes.pop() else izquierda > derecha)
+
+    # Con direcciones mezcladas se expande la comparación lexicográfica
+    condiciones = []
+    for i, (columna, desc) in enumerate(columnas):
+        iguales = [columnas[j][0] == valores[j] for j in range(i)]
+        siguiente = columna < valores[i] if desc else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return consulta.filter(or_(*condiciones))
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de una consulta, para leer la estimación de renglones del planificador"""
+
+    inherit_cache = False
+
+    def __init__(self, consulta: Select):
+        self.consulta = consulta
+
+
+@compiles(Explain, "postgresql")
+def _compilar_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.consulta, **kw)
+
+
+def count_cache_key(database: AsyncSession, consulta: Select) -> tuple:
+    """Llave de la caché de los conteos, el SQL de la consulta y sus parámetros"""
+    compilado = consulta.compile(dialect=database.bind.dialect)
+    return str(compilado), tuple(sorted((nombre, repr(valor)) for nombre, valor in compilado.params.items()))
+
+
+async def count_exact(database: AsyncSession, consulta: Select) -> int:
+    """Contar los registros, memorizado por el SQL y sus parámetros por unos segundos"""
+    clave = count_cache_key(database, consulta)
+    total = conteos_cache.get(clave)
+    if total is None:
+        total = await database.scalar(create_count_query(consulta))
+        conteos_cache.set(clave, total)
+    return total
+
+
+async def count_estimate(database: AsyncSession, consulta: Select) -> int:
+    """Estimar la cantidad de registros con el planificador de PostgreSQL, en otras bases de datos se cuenta"""
+    if database.bind.dialect.name != "postgresql":
+        return await count_exact(database, consulta)
+    plan = await database.scalar(Explain(consulta.order_by(None)))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _es_entidad(consulta: Select) -> bool:
+    """¿Es una consulta de un solo modelo? como select(Modelo), entonces se entregan los objetos y no los renglones"""
+    descripciones = consulta.column_descriptions
+    return len(descripciones) == 1 and descripciones[0]["expr"] is descripciones[0]["entity"]
+
+
+async def apaginate_custom_page(
+    database: AsyncSession,
+    consulta: Select,
+    orden: Sequence[ColumnElement],
+    tipo: type[CustomPage] | None = None,
+    opciones: Sequence = (),
+    columnas: Select | None = None,
+) -> CustomPage:
+    """
+    Paginar con offset o con cursor, el orden debe ser total, por ejemplo terminar con el id
+    Con tipo se usa ese tipo de página en lugar del de response_model, las opciones son sólo para consultar los registros
+    Con columnas, una consulta de Core sin JOIN, los registros son renglones con el WHERE de la consulta que leen el catálogo
+    """
+    params = resolve_params()
+    raw_params = params.to_raw_params().as_limit_offset()
+
+    # Calcular el total antes de filtrar por el cursor, según lo solicitado
+    total_modo = getattr(params, "total", "exact")
+    if total_modo == "none":
+        total = None
+    elif total_modo == "estimate":
+        total = await count_estimate(database, consulta)
+    else:
+        total = await count_exact(database, consulta)
+
+    # Los registros se consultan con las columnas si las hay, el total y el ETag siguen con la consulta
+    registros = consulta
+    if columnas is not None:
+        registros = columnas if consulta.whereclause is None else columnas.where(consulta.whereclause)
+
+    # Filtrar por el cursor
+    if getattr(params, "cursor", None):
+        try:
+            valores = decode_cursor(orden, params.cursor)
+        except ValueError as error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+        registros = filter_after_cursor(registros, orden, valores)
+
+    # Consultar un registro más del límite para saber si hay más
+    resultado = await database.execute(
+        registros.options(*opciones).order_by(*orden).limit(raw_params.limit + 1).offset(raw_params.offset)
+    )
+    renglones = resultado.unique().all()
+    if _es_entidad(registros):
+        items = [renglon[0] for renglon in renglones]
+    elif columnas is not None:
+        # Los renglones sólo traen las llaves foráneas, las propiedades del modelo las leen del catálogo
+        modelo = registros.column_descriptions[0]["entity"]
+        items = [CatalogRow(modelo, renglon) for renglon in renglones]
+    else:
+        items = renglones
+    has_more = len(items) > raw_params.limit
+
+    # Crear la página dentro de greenlet_spawn, para que al validar los esquemas se puedan cargar las relaciones
+    crear = partial(
+        create_page if tipo is None else tipo.create,
+        items[: raw_params.limit],
+        total=total,
+        params=params,
+        orden=orden,
+        has_more=has_more,
+    )
+    try:
+        return await greenlet_spawn(crear)
+    except ValidationError:
+        # Si a un renglón le faltó un registro nuevo del catálogo, éste quedó invalidado, se recarga y se intenta de nuevo
+        if columnas is None or catalogo_cache.is_fresh():
+            raise
+        from .catalogos_loader import get_catalogo  # Al cargar importa response_cache, que importa este módulo
+
+        await get_catalogo()
+        return await greenlet_spawn(crear)
@@ -0,0 +1,69 @@
+"""
+JSON Response
+
+Las respuestas se convierten a JSON con orjson, los modelos de pydantic con su propio serializador.
+Con FastJSONRoute, si la función entrega el modelo de response_model, que ya se validó al crearlo,
+se entrega tal cual, sin que FastAPI lo vuelva a convertir a diccionario y a validar.
+"""
+
+import functools
+import inspect
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+# Con estas opciones de la ruta FastAPI cambia el contenido, entonces no se usa el atajo
+OPCIONES_RESPONSE_MODEL = (
+    "response_model_include",
+    "response_model_exclude",
+    "response_model_exclude_unset",
+    "response_model_exclude_defaults",
+    "response_model_exclude_none",
+)
+
+
+class ModelJSONResponse(ORJSONResponse):
+    """Respuesta JSON, con un modelo de pydantic usa su serializador y con otro contenido orjson"""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return super().render(content)
+
+
+def _entregar_modelo(endpoint, response_model: type[BaseModel]):
+    """Envolver la función para que entregue el modelo ya validado como respuesta"""
+
+    @functools.wraps(endpoint)
+    async def envoltura(*args, **kwargs):
+        contenido = await endpoint(*args, **kwargs)
+        # Los esquemas parciales de fields se marcan con sparse_of, el esquema completo que sustituyen
+        if type(contenido) is not response_model and getattr(type(contenido), "sparse_of", None) is not response_model:
+            return contenido
+        respuesta = ModelJSONResponse(contenido)
+        # FastAPI no agrega a una respuesta los encabezados del parámetro Response, como ETag, se copian aquí
+        for valor in kwargs.values():
+            if isinstance(valor, Response):
+                respuesta.headers.raw.extend(valor.headers.raw)
+                if valor.status_code:
+                    respuesta.status_code = valor.status_code
+        return respuesta
+
+    return envoltura
+
+
+class FastJSONRoute(APIRoute):
+    """Ruta que entrega sin validar otra vez el modelo de response_model"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        if (
+            inspect.isclass(response_model)
+            and issubclass(response_model, BaseModel)
+            and inspect.iscoroutinefunction(endpoint)
+            and not any(kwargs.get(opcion) for opcion in OPCIONES_RESPONSE_MODEL)
+        ):
+            endpoint = _entregar_modelo(endpoint, response_model)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,134 @@
+"""
+Rate Limiter por cubetas de fichas (token buckets)
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+
+from fastapi import Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..config.settings import get_settings
+from .exceptions import MyTooManyRequestsError
+from .redis_connection import get_redis
+from .ttl_cache import TTLCache
+
+# Script de Redis para consumir una ficha de forma atómica, entrega los segundos a esperar
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return tostring(wait)
+"""
+
+
+class TokenBucketBackend(ABC):
+    """Almacén de las cubetas de fichas"""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Consumir una ficha, entrega cero si se permite o los segundos a esperar"""
+
+
+class MemoryTokenBucketBackend(TokenBucketBackend):
+    """Cubetas en la memoria del proceso, también sirve para las pruebas"""
+
+    def __init__(self, max_size: int = 10000):
+        self.buckets = TTLCache(max_size=max_size, ttl_seconds=3600)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        ahora = time.monotonic()
+        tokens, updated = self.buckets.get(key, (capacity, ahora))
+        tokens = min(capacity, tokens + max(0.0, ahora - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        # Al caducar la cubeta se considera llena
+        self.buckets.set(key, (tokens, ahora), ttl_seconds=capacity / rate)
+        return wait
+
+
+class RedisTokenBucketBackend(TokenBucketBackend):
+    """Cubetas en Redis, compartidas entre workers e instancias"""
+
+    def __init__(self, redis: Redis, fallback: TokenBucketBackend, prefix: str = "rate_limiter"):
+        self.redis = redis
+        self.fallback = fallback
+        self.prefix = prefix
+        self.script = redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        try:
+            wait = await self.script(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, time.time()])
+        except RedisError:
+            # Si Redis no responde se limita sólo en este proceso
+            return await self.fallback.take(key, capacity, rate)
+        return float(wait)
+
+
+class LoginRateLimiter:
+    """Limitar los intentos de login por nombre de usuario y por IP"""
+
+    def __init__(self, backend: TokenBucketBackend, username_per_minute: int, ip_per_minute: int):
+        self.backend = backend
+        self.username_per_minute = username_per_minute
+        self.ip_per_minute = ip_per_minute
+
+    async def check(self, username: str, ip: str) -> None:
+        """Provocar MyTooManyRequestsError si se rebasa el límite, un límite en cero lo desactiva"""
+        limites = (
+            (f"login:username:{username.strip().lower()}", self.username_per_minute),
+            (f"login:ip:{ip}", self.ip_per_minute),
+        )
+        for key, per_minute in limites:
+            if per_minute <= 0:
+                continue
+            wait = await self.backend.take(key, capacity=per_minute, rate=per_minute / 60)
+            if wait > 0:
+                segundos = math.ceil(wait)
+                raise MyTooManyRequestsError(f"Demasiados intentos, espere {segundos} segundos", retry_after=segundos)
+
+
+def get_client_ip(request: Request, trusted_proxy_hops: int) -> str:
+    """Entregar la IP del cliente, sólo se lee X-Forwarded-For si hay proxies de confianza delante de la API"""
+    if trusted_proxy_hops > 0:
+        # Cada proxy agrega la IP de quien le llamó, las de la izquierda las pudo escribir el cliente
+        forwarded_for = request.headers.get("X-Forwarded-For", "")
+        ips = [ip.strip() for ip in forwarded_for.split(",") if ip.strip() != ""]
+        if len(ips) >= trusted_proxy_hops:
+            return ips[-trusted_proxy_hops]
+    if request.client is not None:
+        return request.client.host
+    return ""
+
+
+# Limitador de login, usa Redis si está definido REDIS_URL, de lo contrario la memoria del proceso
+settings = get_settings()
+memory_backend = MemoryTokenBucketBackend()
+redis_client = get_redis()
+login_rate_limiter = LoginRateLimiter(
+    backend=memory_backend if redis_client is None else RedisTokenBucketBackend(redis_client, fallback=memory_backend),
+    username_per_minute=settings.LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE,
+    ip_per_minute=settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE,
+)
+
+
+def get_login_rate_limiter() -> LoginRateLimiter:
+    """Limitador de login, se puede reemplazar en las pruebas con dependency_overrides"""
+    return login_rate_limiter
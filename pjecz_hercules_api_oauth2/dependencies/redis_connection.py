@@ -0,0 +1,23 @@
+"""
+Redis Connection
+"""
+
+from functools import lru_cache
+
+from redis.asyncio import Redis
+
+from ..config.settings import get_settings
+
+
+@lru_cache()
+def get_redis() -> Redis | None:
+    """Cliente asíncrono de Redis, entrega None si no está definido REDIS_URL, con fakeredis:// usa fakeredis"""
+    settings = get_settings()
+    if settings.REDIS_URL == "":
+        return None
+    if settings.REDIS_URL.startswith("fakeredis://"):
+        # Redis en la memoria del proceso para desarrollo y pruebas, requiere fakeredis de las dependencias de desarrollo
+        from fakeredis import FakeAsyncRedis
+
+        return FakeAsyncRedis()
+    return Redis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
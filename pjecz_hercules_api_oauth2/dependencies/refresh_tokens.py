@@ -0,0 +1,168 @@
+"""
+Refresh Tokens
+
+Cada refresh token se usa una sola vez y al usarse se entrega otro de la misma familia.
+La familia vive REFRESH_TOKEN_EXPIRE_SECONDS desde el login, sin importar cuántas veces se rote.
+Si un refresh token ya usado se presenta de nuevo se revoca toda la familia.
+En el almacén sólo se guarda el HMAC del refresh token, nunca el token.
+Sin REDIS_URL no se entregan refresh tokens, con varios workers cada uno tendría su propio almacén.
+"""
+
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from abc import ABC, abstractmethod
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..config.settings import Settings
+from .exceptions import MyAuthenticationError, MyConnectionError
+from .redis_connection import get_redis
+from .ttl_cache import TTLCache
+
+
+class RefreshTokenStore(ABC):
+    """Almacén de los refresh tokens"""
+
+    @abstractmethod
+    async def get(self, token_hash: str) -> dict | None:
+        """Entregar los datos del refresh token"""
+
+    @abstractmethod
+    async def set(self, token_hash: str, datos: dict, ttl_seconds: int) -> None:
+        """Guardar los datos del refresh token"""
+
+    @abstractmethod
+    async def mark_used(self, token_hash: str, ttl_seconds: int) -> bool:
+        """Marcar como usado de forma atómica, entrega False si ya estaba usado"""
+
+    @abstractmethod
+    async def revoke_family(self, family: str, ttl_seconds: int) -> None:
+        """Revocar la familia"""
+
+    @abstractmethod
+    async def is_family_revoked(self, family: str) -> bool:
+        """¿Está revocada la familia?"""
+
+
+class MemoryRefreshTokenStore(RefreshTokenStore):
+    """Refresh tokens en la memoria del proceso, para las pruebas, no se comparten entre workers"""
+
+    def __init__(self, max_size: int = 100000, ttl_seconds: int = 2592000):
+        self.tokens = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.used = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.revoked = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    async def get(self, token_hash: str) -> dict | None:
+        return self.tokens.get(token_hash)
+
+    async def set(self, token_hash: str, datos: dict, ttl_seconds: int) -> None:
+        self.tokens.set(token_hash, datos, ttl_seconds=ttl_seconds)
+
+    async def mark_used(self, token_hash: str, ttl_seconds: int) -> bool:
+        # No hay await entre consultar y guardar, así que es atómico dentro del ciclo de eventos
+        if self.used.get(token_hash) is not None:
+            return False
+        self.used.set(token_hash, True, ttl_seconds=ttl_seconds)
+        return True
+
+    async def revoke_family(self, family: str, ttl_seconds: int) -> None:
+        self.revoked.set(family, True, ttl_seconds=ttl_seconds)
+
+    async def is_family_revoked(self, family: str) -> bool:
+        return self.revoked.get(family) is not None
+
+
+class RedisRefreshTokenStore(RefreshTokenStore):
+    """Refresh tokens en Redis, compartidos entre workers e instancias"""
+
+    def __init__(self, redis: Redis, prefix: str = "refresh_token"):
+        self.redis = redis
+        self.prefix = prefix
+
+    async def get(self, token_hash: str) -> dict | None:
+        try:
+            valor = await self.redis.get(f"{self.prefix}:token:{token_hash}")
+        except RedisError as error:
+            raise MyConnectionError("No se pudo consultar el refresh token") from error
+        if valor is None:
+            return None
+        return json.loads(valor)
+
+    async def set(self, token_hash: str, datos: dict, ttl_seconds: int) -> None:
+        try:
+            await self.redis.set(f"{self.prefix}:token:{token_hash}", json.dumps(datos), ex=ttl_seconds)
+        except RedisError as error:
+            raise MyConnectionError("No se pudo guardar el refresh token") from error
+
+    async def mark_used(self, token_hash: str, ttl_seconds: int) -> bool:
+        try:
+            return bool(await self.redis.set(f"{self.prefix}:used:{token_hash}", 1, ex=ttl_seconds, nx=True))
+        except RedisError as error:
+            raise MyConnectionError("No se pudo usar el refresh token") from error
+
+    async def revoke_family(self, family: str, ttl_seconds: int) -> None:
+        try:
+            await self.redis.set(f"{self.prefix}:revoked:{family}", 1, ex=ttl_seconds)
+        except RedisError as error:
+            raise MyConnectionError("No se pudo revocar la familia del refresh token") from error
+
+    async def is_family_revoked(self, family: str) -> bool:
+        try:
+            return await self.redis.exists(f"{self.prefix}:revoked:{family}") > 0
+        except RedisError as error:
+            raise MyConnectionError("No se pudo consultar la familia del refresh token") from error
+
+
+def hash_refresh_token(settings: Settings, refresh_token: str) -> str:
+    """HMAC del refresh token con SECRET_KEY"""
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), refresh_token.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+async def issue_refresh_token(
+    settings: Settings, store: RefreshTokenStore, username: str, family: str = "", issued_at: float | None = None
+) -> tuple[str, int]:
+    """Crear un refresh token, entrega también sus segundos de vida, que terminan con la vida de la familia"""
+    if issued_at is None:
+        issued_at = time.time()
+    ttl_seconds = round(issued_at + settings.REFRESH_TOKEN_EXPIRE_SECONDS - time.time())
+    if ttl_seconds <= 0:
+        raise MyAuthenticationError("Caducó el refresh token, debe iniciar sesión de nuevo")
+    refresh_token = secrets.token_urlsafe(32)
+    if family == "":
+        family = secrets.token_urlsafe(16)
+    datos = {"username": username, "family": family, "issued_at": issued_at}
+    await store.set(hash_refresh_token(settings, refresh_token), datos, ttl_seconds=ttl_seconds)
+    return refresh_token, ttl_seconds
+
+
+async def rotate_refresh_token(settings: Settings, store: RefreshTokenStore, refresh_token: str) -> tuple[str, str, int]:
+    """Usar el refresh token, entrega el username, el nuevo refresh token de la misma familia y sus segundos de vida"""
+    token_hash = hash_refresh_token(settings, refresh_token)
+    datos = await store.get(token_hash)
+    if datos is None:
+        raise MyAuthenticationError("No es válido el refresh token")
+    if await store.is_family_revoked(datos["family"]):
+        raise MyAuthenticationError("Fue revocado el refresh token")
+    if not await store.mark_used(token_hash, ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_SECONDS):
+        # Reuso detectado, se revoca toda la familia
+        await store.revoke_family(datos["family"], ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_SECONDS)
+        raise MyAuthenticationError("Fue usado de nuevo el refresh token, se revocan todos los de su familia")
+    # El nuevo hereda el inicio de la familia, rotar no extiende la sesión más allá de REFRESH_TOKEN_EXPIRE_SECONDS
+    nuevo_refresh_token, ttl_seconds = await issue_refresh_token(
+        settings, store, datos["username"], datos["family"], datos.get("issued_at", time.time())
+    )
+    return datos["username"], nuevo_refresh_token, ttl_seconds
+
+
+# Almacén de refresh tokens, requiere REDIS_URL, en la memoria de cada worker de gunicorn no se comparten
+redis_client = get_redis()
+refresh_token_store = None if redis_client is None else RedisRefreshTokenStore(redis_client)
+
+
+def get_refresh_token_store() -> RefreshTokenStore | None:
+    """Almacén de refresh tokens, None si no hay Redis, se puede reemplazar en las pruebas con dependency_overrides"""
+    return refresh_token_store
@@ -0,0 +1,60 @@
+"""
+Response Cache
+
+Caché de las respuestas de los catálogos ya convertidas a JSON, por ruta, parámetros y nivel del permiso.
+La ruta valida el permiso antes de consultarla. Se purga al cambiar el catálogo, o con purge_response_cache,
+y si no al caducar RESPONSE_CACHE_TTL_SECONDS.
+"""
+
+from typing import NamedTuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+from ..config.settings import get_settings
+from .conditional_requests import Validators, is_not_modified, validators_headers
+from .two_level_cache import create_two_level_cache
+
+settings = get_settings()
+respuestas_cache = create_two_level_cache(
+    "respuestas", max_size=settings.RESPONSE_CACHE_MAX_SIZE, ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+class CachedResponse(NamedTuple):
+    """Contenido JSON y validadores de una respuesta"""
+
+    body: bytes
+    validators: Validators | None
+
+
+def response_cache_key(request: Request, permiso: int) -> str:
+    """Llave con la ruta, los parámetros ordenados y el nivel del permiso"""
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}#{permiso}"
+
+
+async def get_cached_response(request: Request, clave: str) -> Response | None:
+    """Entregar la respuesta guardada, o la respuesta 304 si el cliente ya la tiene, None si no está"""
+    guardada = await respuestas_cache.get(clave)
+    if guardada is None:
+        return None
+    if guardada.validators is None:
+        return Response(content=guardada.body, media_type="application/json")
+    headers = validators_headers(guardada.validators)
+    if is_not_modified(request, guardada.validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=guardada.body, media_type="application/json", headers=headers)
+
+
+async def cache_response(clave: str, validators: Validators | None, contenido: BaseModel) -> Response:
+    """Convertir a JSON, guardar y entregar la respuesta, los paginados con cursor no tienen validadores"""
+    body = contenido.model_dump_json().encode("utf-8")
+    await respuestas_cache.set(clave, CachedResponse(body, validators))
+    headers = validators_headers(validators) if validators is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def purge_response_cache() -> None:
+    """Eliminar todas las respuestas guardadas"""
+    respuestas_cache.clear_nowait()
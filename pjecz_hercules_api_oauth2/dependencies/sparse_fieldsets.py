@@ -0,0 +1,136 @@
+"""
+Sparse Fieldsets
+
+Con el parámetro fields, los nombres separados por comas, se entregan sólo esos campos del esquema.
+Se consultan sólo sus columnas con load_only, o en las consultas de Core sólo esas columnas.
+Los esquemas parciales se crean una vez por combinación de campos.
+
+Los campos como autoridad_clave son propiedades del modelo que leen primero el catálogo en memoria
+y la relación sólo si el catálogo no está al día. Sin fields, load_options del modelo carga con JOIN todas
+sus relaciones; con fields, relaciones_campos del modelo indica por el prefijo del campo qué relación
+usa, por ejemplo "distrito_": "autoridad.distrito", y sólo se cargan las de los campos solicitados.
+Los paginados no hacen JOIN, consultan las llaves foráneas, como autoridad_id, y los renglones se leen con CatalogRow.
+"""
+
+from functools import lru_cache
+from typing import Sequence, get_args
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+from sqlalchemy import Select, inspect, select
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+
+from .fastapi_pagination_custom_page import CustomPage
+
+# Columnas que siempre se consultan, para saber si es activo y para ETag y Last-Modified
+COLUMNAS_SIEMPRE = ("id", "estatus", "modificado")
+
+
+def parse_fields(esquema: type[BaseModel], fields: str) -> tuple[str, ...] | None:
+    """Validar los campos solicitados contra los del esquema, en su orden, entrega None si no se solicitaron"""
+    solicitados = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    if not solicitados:
+        return None
+    no_validos = solicitados - esquema.model_fields.keys()
+    if no_validos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"No son válidos los campos: {', '.join(sorted(no_validos))}"
+        )
+    return tuple(campo for campo in esquema.model_fields if campo in solicitados)
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(esquema: type[BaseModel], campos: tuple[str, ...] | None) -> type[BaseModel]:
+    """Esquema con sólo los campos solicitados, sin campos el mismo esquema"""
+    if campos is None:
+        return esquema
+    return create_model(
+        f"{esquema.__name__}Fields",
+        __config__=esquema.model_config,
+        **{campo: (esquema.model_fields[campo].annotation, esquema.model_fields[campo]) for campo in campos},
+    )
+
+
+@lru_cache(maxsize=256)
+def sparse_one_schema(esquema: type[BaseModel], campos: tuple[str, ...] | None) -> type[BaseModel]:
+    """Esquema de un registro, como OneSentenciaOut, con data parcial, se marca para entregarlo como si fuera el completo"""
+    if campos is None:
+        return esquema
+    data = next(tipo for tipo in get_args(esquema.model_fields["data"].annotation) if tipo is not type(None))
+    definiciones = {nombre: (campo.annotation, campo) for nombre, campo in esquema.model_fields.items() if nombre != "data"}
+    modelo = create_model(f"{esquema.__name__}Fields", **definiciones, data=(sparse_schema(data, campos) | None, None))
+    modelo.sparse_of = esquema
+    return modelo
+
+
+@lru_cache(maxsize=256)
+def sparse_page(esquema: type[BaseModel], campos: tuple[str, ...] | None) -> type[CustomPage] | None:
+    """Tipo de página con el esquema parcial, se marca para entregarla como si fuera la completa, sin campos None"""
+    if campos is None:
+        return None
+    pagina = CustomPage[sparse_schema(esquema, campos)]
+    pagina.sparse_of = CustomPage[esquema]
+    return pagina
+
+
+def _ruta_relacion(modelo, campo: str) -> str | None:
+    """Ruta de la relación que usa la propiedad del campo, por el prefijo más largo de relaciones_campos"""
+    prefijos = [prefijo for prefijo in getattr(modelo, "relaciones_campos", {}) if campo.startswith(prefijo)]
+    if not prefijos:
+        return None
+    return modelo.relaciones_campos[max(prefijos, key=len)]
+
+
+def _columnas_y_rutas(modelo, campos: tuple[str, ...], orden: Sequence[ColumnElement]) -> tuple[set[str], set[str]]:
+    """Columnas propias de los campos y del orden, con las llaves foráneas de las propiedades, y las rutas de sus relaciones"""
+    mapper = inspect(modelo)
+    columnas = {(expresion.element if isinstance(expresion, UnaryExpression) else expresion).key for expresion in orden}
+    rutas = set()
+    for campo in campos:
+        if campo in mapper.column_attrs:
+            columnas.add(campo)
+            continue
+        ruta = _ruta_relacion(modelo, campo)
+        if ruta is not None:
+            rutas.add(ruta)
+            columnas.update(columna.key for columna in mapper.relationships[ruta.split(".")[0]].local_columns)
+    return columnas, rutas
+
+
+def _load_options(modelo, campos: tuple[str, ...], orden: Sequence[ColumnElement], con_relaciones: bool) -> list:
+    """load_only con las columnas de los campos, las del orden y las que usan las propiedades, y sus joinedload"""
+    columnas, rutas = _columnas_y_rutas(modelo, campos, orden)
+    columnas.update(columna for columna in COLUMNAS_SIEMPRE if columna in inspect(modelo).column_attrs)
+    opciones = [load_only(*[getattr(modelo, columna) for columna in sorted(columnas)])]
+    if con_relaciones:
+        for ruta in sorted(rutas):
+            clase, opcion = modelo, None
+            for nombre in ruta.split("."):
+                atributo = getattr(clase, nombre)
+                opcion = joinedload(atributo) if opcion is None else opcion.joinedload(atributo)
+                clase = atributo.property.mapper.class_
+            opciones.append(opcion)
+    return opciones
+
+
+def record_load_options(modelo, campos: tuple[str, ...] | None) -> list:
+    """Opciones para el detalle, sin campos las load_options del modelo"""
+    if campos is None:
+        return modelo.load_options() if hasattr(modelo, "load_options") else []
+    return _load_options(modelo, campos, (), con_relaciones=True)
+
+
+def page_load_options(modelo, campos: tuple[str, ...] | None, orden: Sequence[ColumnElement]) -> list:
+    """Opciones para el paginado, las propiedades usan el catálogo y no se cargan las relaciones, sin campos ninguna"""
+    if campos is None:
+        return []
+    return _load_options(modelo, campos, orden, con_relaciones=False)
+
+
+def page_columns(modelo, campos: tuple[str, ...] | None, orden: Sequence[ColumnElement]) -> Select:
+    """Consulta de Core del paginado sin JOIN, las columnas de los campos, las llaves foráneas y las del orden para el cursor"""
+    if campos is None:
+        campos = tuple(modelo.row_select().selected_columns.keys())
+    columnas, _ = _columnas_y_rutas(modelo, campos, orden)
+    return select(*[getattr(modelo, atributo.key) for atributo in inspect(modelo).column_attrs if atributo.key in columnas])
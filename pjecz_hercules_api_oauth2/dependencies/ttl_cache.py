@@ -0,0 +1,71 @@
+"""
+TTL Cache
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Caché en memoria con límite de elementos y caducidad por tiempo"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Entregar el valor si existe y no ha caducado"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        """Guardar el valor, si se rebasa el límite se elimina el menos usado"""
+        if self.max_size <= 0:
+            return
+        if ttl_seconds is None or ttl_seconds > self.ttl_seconds:
+            ttl_seconds = self.ttl_seconds
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Eliminar un valor"""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Eliminar los valores que cumplan con la condición, entrega la cantidad eliminada"""
+        with self._lock:
+            keys = [key for key, (_, value) in self._items.items() if predicate(value)]
+            for key in keys:
+                del self._items[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Eliminar todos los valores"""
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        """Entregar los contadores"""
+        with self._lock:
+            return {"size": len(self._items), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
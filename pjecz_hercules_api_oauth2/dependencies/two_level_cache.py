@@ -0,0 +1,256 @@
+"""
+Two Level Cache
+
+Caché de dos niveles: una LRU en la memoria del proceso delante de Redis, compartido entre workers e instancias.
+Las llaves van con el espacio de nombres, los valores se serializan con pickle y se firman con HMAC de SECRET_KEY,
+así nunca se deserializa algo que no escribió esta API. Las etiquetas permiten invalidar muchas llaves a la vez.
+Sin Redis, o si Redis no responde, funciona sólo con la memoria del proceso.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import pickle
+import time
+from typing import Any, Awaitable, Callable, Iterable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..config.settings import get_settings
+from .redis_connection import get_redis
+from .ttl_cache import TTLCache
+
+# Para distinguir un valor None guardado de una llave que no existe
+_FALTA = object()
+
+
+class TwoLevelCache:
+    """Caché de dos niveles, memoria del proceso y Redis"""
+
+    def __init__(
+        self,
+        namespace: str,
+        redis: Redis | None,
+        secret_key: str,
+        max_size: int,
+        ttl_seconds: float,
+        local_ttl_seconds: float | None = None,
+        lock_seconds: float = 5.0,
+        poll_seconds: float = 0.05,
+        prefix: str = "cache",
+    ):
+        self.namespace = namespace
+        self.redis = redis
+        self.secret_key = secret_key.encode("utf-8")
+        self.ttl_seconds = ttl_seconds
+        self.local = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds if local_ttl_seconds is None else local_ttl_seconds)
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+        self.prefix = f"{prefix}:{namespace}"
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._cargas: dict[str, asyncio.Task] = {}
+        self._tareas: set[asyncio.Task] = set()
+
+    def _redis_key(self, key: str) -> str:
+        """Llave en Redis, si es muy larga se usa su hash"""
+        if len(key) > 128:
+            key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        """Llave en Redis del conjunto de llaves de la etiqueta"""
+        return f"{self.prefix}:tag:{tag}"
+
+    def _dumps(self, value: Any, tags: frozenset) -> bytes:
+        """Serializar y firmar"""
+        payload = pickle.dumps((value, tags), protocol=pickle.HIGHEST_PROTOCOL)
+        return hmac.new(self.secret_key, payload, hashlib.sha256).digest() + payload
+
+    def _loads(self, data: bytes) -> tuple[Any, frozenset]:
+        """Validar la firma y deserializar, provoca ValueError si la firma no es válida"""
+        firma, payload = data[:32], data[32:]
+        if not hmac.compare_digest(firma, hmac.new(self.secret_key, payload, hashlib.sha256).digest()):
+            raise ValueError("No es válida la firma del valor en caché")
+        return pickle.loads(payload)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Entregar el valor, primero de la memoria del proceso, luego de Redis"""
+        item = self.local.get(key, _FALTA)
+        if item is not _FALTA:
+            return item[0]
+        if self.redis is None:
+            return default
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                data, pttl = await pipe.get(self._redis_key(key)).pttl(self._redis_key(key)).execute()
+        except RedisError:
+            self.redis_errors += 1
+            return default
+        if data is None:
+            self.redis_misses += 1
+            return default
+        try:
+            value, tags = self._loads(data)
+        except (ValueError, pickle.UnpicklingError):
+            self.redis_misses += 1
+            return default
+        self.redis_hits += 1
+        # En la memoria del proceso no debe durar más de lo que le queda en Redis
+        self.local.set(key, (value, tags), ttl_seconds=pttl / 1000 if pttl > 0 else None)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float | None = None, tags: Iterable[str] = ()) -> None:
+        """Guardar el valor en los dos niveles, con etiquetas para invalidarlo junto con otros"""
+        if ttl_seconds is None or ttl_seconds > self.ttl_seconds:
+            ttl_seconds = self.ttl_seconds
+        if ttl_seconds <= 0:
+            return
+        tags = frozenset(tags) | {self.namespace}
+        self.local.set(key, (value, tags), ttl_seconds=ttl_seconds)
+        if self.redis is None:
+            return
+        milisegundos = max(1, int(ttl_seconds * 1000))
+        redis_key = self._redis_key(key)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(redis_key, self._dumps(value, tags), px=milisegundos)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), redis_key)
+                    pipe.pexpire(self._tag_key(tag), int(self.ttl_seconds * 1000))
+                await pipe.execute()
+        except RedisError:
+            self.redis_errors += 1
+
+    async def delete(self, key: str) -> None:
+        """Eliminar el valor de los dos niveles"""
+        self.local.delete(key)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self._redis_key(key))
+        except RedisError:
+            self.redis_errors += 1
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: float | None = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Entregar el valor o cargarlo, aunque lleguen muchas solicitudes a la vez se carga una sola vez"""
+        value = await self.get(key, _FALTA)
+        if value is not _FALTA:
+            return value
+        # En este proceso, las solicitudes de la misma llave esperan a la misma carga
+        tarea = self._cargas.get(key)
+        if tarea is None:
+            tarea = asyncio.ensure_future(self._cargar(key, loader, ttl_seconds, tuple(tags)))
+            self._cargas[key] = tarea
+            tarea.add_done_callback(lambda _: self._cargas.pop(key, None))
+        return await asyncio.shield(tarea)
+
+    async def _cargar(self, key: str, loader: Callable[[], Awaitable[Any]], ttl_seconds: float | None, tags: tuple) -> Any:
+        """Cargar con el candado de Redis, si otro proceso tiene el candado se espera su valor"""
+        candado = await self._adquirir(key)
+        if candado is False:
+            value = await self._esperar(key)
+            if value is not _FALTA:
+                return value
+        try:
+            value = await loader()
+            await self.set(key, value, ttl_seconds=ttl_seconds, tags=tags)
+        finally:
+            if candado:
+                await self._liberar(key)
+        return value
+
+    async def _adquirir(self, key: str) -> bool | None:
+        """Tomar el candado de la llave en Redis, entrega None si no hay Redis"""
+        if self.redis is None:
+            return None
+        try:
+            return bool(await self.redis.set(self._redis_key(key) + ":lock", 1, px=int(self.lock_seconds * 1000), nx=True))
+        except RedisError:
+            self.redis_errors += 1
+            return None
+
+    async def _liberar(self, key: str) -> None:
+        """Soltar el candado de la llave en Redis"""
+        try:
+            await self.redis.delete(self._redis_key(key) + ":lock")
+        except RedisError:
+            self.redis_errors += 1
+
+    async def _esperar(self, key: str) -> Any:
+        """Esperar a que otro proceso guarde el valor, hasta que caduque su candado"""
+        limite = time.monotonic() + self.lock_seconds
+        while time.monotonic() < limite:
+            await asyncio.sleep(self.poll_seconds)
+            value = await self.get(key, _FALTA)
+            if value is not _FALTA:
+                return value
+        return _FALTA
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Eliminar las llaves con la etiqueta en los dos niveles, entrega la cantidad eliminada en este proceso"""
+        cantidad = self.local.delete_where(lambda item: tag in item[1])
+        if self.redis is None:
+            return cantidad
+        try:
+            redis_keys = await self.redis.smembers(self._tag_key(tag))
+            await self.redis.delete(self._tag_key(tag), *redis_keys)
+        except RedisError:
+            self.redis_errors += 1
+        return cantidad
+
+    def invalidate_tag_nowait(self, tag: str) -> int:
+        """Para el código síncrono, como los eventos de SQLAlchemy: se elimina ya en este proceso y en Redis en segundo plano"""
+        cantidad = self.local.delete_where(lambda item: tag in item[1])
+        if self.redis is not None:
+            try:
+                tarea = asyncio.get_running_loop().create_task(self.invalidate_tag(tag))
+                self._tareas.add(tarea)
+                tarea.add_done_callback(self._tareas.discard)
+            except RuntimeError:
+                # Sin ciclo de eventos no se puede usar Redis, en los otros procesos caduca por su tiempo
+                pass
+        return cantidad
+
+    async def clear(self) -> None:
+        """Eliminar todas las llaves del espacio de nombres"""
+        await self.invalidate_tag(self.namespace)
+
+    def clear_nowait(self) -> None:
+        """Eliminar todas las llaves del espacio de nombres, desde código síncrono"""
+        self.invalidate_tag_nowait(self.namespace)
+
+    def stats(self) -> dict:
+        """Entregar los contadores"""
+        return {
+            **self.local.stats(),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors,
+        }
+
+
+def create_two_level_cache(
+    namespace: str,
+    max_size: int,
+    ttl_seconds: float,
+    local_ttl_seconds: float | None = None,
+) -> TwoLevelCache:
+    """Crear un caché de dos niveles con REDIS_URL y SECRET_KEY de la configuración"""
+    settings = get_settings()
+    return TwoLevelCache(
+        namespace=namespace,
+        redis=get_redis(),
+        secret_key=settings.SECRET_KEY,
+        max_size=max_size,
+        ttl_seconds=ttl_seconds,
+        local_ttl_seconds=local_ttl_seconds,
+    )
@@ -0,0 +1,71 @@
+"""
+Exportar
+
+Escribir en un archivo CSV o Parquet las sentencias o las listas de acuerdos activas, con los filtros de los paginados.
+Usa la réplica si está definido DB_REPLICA_HOST. Parquet requiere pyarrow.
+
+    python3 -m pjecz_hercules_api_oauth2.exportar sentencias --formato parquet --desde 2025-01-01
+"""
+
+import argparse
+import asyncio
+from datetime import date
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from .dependencies.catalogos_loader import get_catalogo
+from .dependencies.database import async_engine, async_replica_engine, async_session_maker
+from .dependencies.database_read import open_replica_session
+from .dependencies.exports import FORMATOS, columnar_file, parquet_disponible
+from .main import app  # noqa: F401, para que se registren todos los modelos
+from .models.listas_de_acuerdos import ListaDeAcuerdo
+from .models.sentencias import Sentencia
+from .routers.listas_de_acuerdos import filtrar_listas_de_acuerdos
+from .routers.sentencias import filtrar_sentencias
+
+# Filtro, modelo y orden de cada tabla, los mismos que en los paginados
+TABLAS = {
+    "listas_de_acuerdos": (filtrar_listas_de_acuerdos, ListaDeAcuerdo, (ListaDeAcuerdo.fecha.desc(), ListaDeAcuerdo.id.desc())),
+    "sentencias": (filtrar_sentencias, Sentencia, (Sentencia.id,)),
+}
+
+
+async def exportar(tabla: str, formato: str, salida: Path, autoridad_clave: str, desde: date, hasta: date) -> int:
+    """Consultar y escribir el archivo, entrega los bytes escritos"""
+    filtrar, modelo, orden = TABLAS[tabla]
+    catalogo = await get_catalogo()
+    consulta = filtrar(catalogo, autoridad_clave, None, desde, hasta)
+    columnas = modelo.row_select().where(consulta.whereclause).order_by(*orden)
+    database = await open_replica_session() or async_session_maker()
+    try:
+        return await columnar_file(database, columnas, formato, salida)
+    finally:
+        await database.close()
+        await async_engine.dispose()
+        if async_replica_engine is not None:
+            await async_replica_engine.dispose()
+
+
+def main():
+    """Leer los argumentos y exportar"""
+    parser = argparse.ArgumentParser(description="Exportar sentencias o listas de acuerdos en CSV o Parquet")
+    parser.add_argument("tabla", choices=sorted(TABLAS), help="Tabla a exportar")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="csv", help="Formato del archivo")
+    parser.add_argument("--salida", type=Path, help="Archivo a escribir, por defecto la tabla con la extensión del formato")
+    parser.add_argument("--autoridad-clave", default="", help="Clave de la autoridad")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Fecha inicial AAAA-MM-DD, creado o fecha según la tabla")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Fecha final AAAA-MM-DD, creado o fecha según la tabla")
+    args = parser.parse_args()
+    if args.formato == "parquet" and not parquet_disponible():
+        parser.error("Parquet requiere pyarrow")
+    salida = args.salida or Path(f"{args.tabla}.{args.formato}")
+    try:
+        cantidad = asyncio.run(exportar(args.tabla, args.formato, salida, args.autoridad_clave, args.desde, args.hasta))
+    except HTTPException as error:
+        parser.error(error.detail)
+    print(f"{salida} {cantidad} bytes")
+
+
+if __name__ == "__main__":
+    main()
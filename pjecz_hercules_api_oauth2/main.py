@@ -4,21 +4,38 @@ PJECZ Hércules API OAuth2
 
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Form, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.responses import JSONResponse
 from fastapi_pagination import add_pagination
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.concurrency import run_in_threadpool
 
 from .config.settings import Settings, get_settings
-from .dependencies.authentications import TOKEN_EXPIRES_SECONDS, authenticate_user, encode_token
+from .dependencies.authentications import (
+    TOKEN_EXPIRES_SECONDS,
+    authenticate_user_in_executor,
+    encode_token,
+    get_usuario_with_email,
+)
+from .dependencies.compression import CompressionMiddleware
 from .dependencies.database import Session, get_db
-from .dependencies.exceptions import MyAnyError
+from .dependencies.exceptions import MyAnyError, MyConnectionError, MyTooManyRequestsError
+from .dependencies.json_response import ModelJSONResponse
+from .dependencies.rate_limiter import LoginRateLimiter, get_client_ip, get_login_rate_limiter
+from .dependencies.refresh_tokens import (
+    RefreshTokenStore,
+    get_refresh_token_store,
+    issue_refresh_token,
+    rotate_refresh_token,
+)
 from .routers.autoridades import autoridades
 from .routers.distritos import distritos
 from .routers.edictos import edictos
 from .routers.listas_de_acuerdos import listas_de_acuerdos
 from .routers.materias import materias
 from .routers.materias_tipos_juicios import materias_tipos_juicios
+from .routers.metricas import metricas
 from .routers.modulos import modulos
 from .routers.permisos import permisos
 from .routers.roles import roles
@@ -33,6 +50,7 @@ app = FastAPI(
     description="Esta API es usada por los sistemas y aplicaciones. No es para cuentas personales.",
     docs_url="/docs",
     redoc_url=None,
+    default_response_class=ModelJSONResponse,
 )
 
 # CORSMiddleware
@@ -45,6 +63,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# CompressionMiddleware
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    niveles={
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    },
+)
+
 # Rutas
 app.include_router(autoridades)
 app.include_router(distritos)
@@ -52,6 +81,7 @@ app.include_router(edictos)
 app.include_router(listas_de_acuerdos)
 app.include_router(materias)
 app.include_router(materias_tipos_juicios)
+app.include_router(metricas)
 app.include_router(modulos)
 app.include_router(permisos)
 app.include_router(roles)
@@ -63,6 +93,16 @@ app.include_router(usuarios_roles)
 add_pagination(app)
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, error: PoolTimeoutError) -> JSONResponse:
+    """Entregar 503 cuando se agota el pool de conexiones, en lugar de dejar esperando la solicitud"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servicio saturado, no hay conexiones disponibles a la base de datos"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/")
 async def root() -> dict:
     """Mensaje de bienvenida"""
@@ -73,20 +113,80 @@ async def root() -> dict:
 async def login(
     database: Annotated[Session, Depends(get_db)],
     settings: Annotated[Settings, Depends(get_settings)],
-    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    rate_limiter: Annotated[LoginRateLimiter, Depends(get_login_rate_limiter)],
+    refresh_token_store: Annotated[RefreshTokenStore | None, Depends(get_refresh_token_store)],
+    request: Request,
+    grant_type: Annotated[str, Form(pattern="^(password|refresh_token)$")] = "password",
+    username: Annotated[str, Form()] = "",
+    password: Annotated[str, Form()] = "",
+    refresh_token: Annotated[str, Form()] = "",
 ) -> Token:
-    """Login para recibir el formulario OAuth2PasswordRequestForm y entregar el token"""
+    """Login con grant_type password (formulario OAuth2) o refresh_token para entregar el token"""
+
+    # Con refresh_token se valida con HMAC en el almacén, sin cifrar la contraseña
+    if grant_type == "refresh_token":
+        if refresh_token_store is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No están habilitados los refresh tokens, requieren REDIS_URL",
+            )
+        try:
+            username, nuevo_refresh_token, refresh_expires_in = await rotate_refresh_token(
+                settings, refresh_token_store, refresh_token
+            )
+            usuario = await run_in_threadpool(get_usuario_with_email, database, username)
+        except MyConnectionError as error:
+            # Sin el almacén no se puede validar el refresh token, no es que no sea válido
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(error),
+                headers={"Retry-After": "1"},
+            )
+        except MyAnyError as error:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=str(error),
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return Token(
+            access_token=await run_in_threadpool(encode_token, settings, usuario, database),
+            expires_in=TOKEN_EXPIRES_SECONDS,
+            token_type="bearer",
+            username=usuario.email,
+            refresh_token=nuevo_refresh_token,
+            refresh_expires_in=refresh_expires_in,
+        )
+
+    # Con password se limitan los intentos antes de consultar la base de datos
+    try:
+        await rate_limiter.check(username=username, ip=get_client_ip(request, settings.TRUSTED_PROXY_HOPS))
+    except MyTooManyRequestsError as error:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)},
+        )
     try:
-        usuario = authenticate_user(username=form_data.username, password=form_data.password, database=database)
+        usuario = await authenticate_user_in_executor(username=username, password=password, database=database)
     except MyAnyError as error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(error),
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Si no se puede guardar el refresh token, la contraseña sí es válida y se entrega sólo el token de acceso
+    nuevo_refresh_token, refresh_expires_in = None, None
+    if refresh_token_store is not None:
+        try:
+            nuevo_refresh_token, refresh_expires_in = await issue_refresh_token(settings, refresh_token_store, usuario.email)
+        except MyConnectionError:
+            pass
     return Token(
-        access_token=encode_token(settings=settings, usuario=usuario),
+        access_token=await run_in_threadpool(encode_token, settings, usuario, database),
         expires_in=TOKEN_EXPIRES_SECONDS,
         token_type="bearer",
         username=usuario.email,
+        refresh_token=nuevo_refresh_token,
+        refresh_expires_in=refresh_expires_in,
     )
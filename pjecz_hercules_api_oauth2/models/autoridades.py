@@ -5,8 +5,9 @@ Autoridades, modelos
 from typing import List
 
 from sqlalchemy import Enum, ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_distrito, get_materia
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
 
@@ -60,30 +61,38 @@ class Autoridad(Base, UniversalMixin):
     sentencias: Mapped[List["Sentencia"]] = relationship("Sentencia", back_populates="autoridad")
     usuarios: Mapped[List["Usuario"]] = relationship("Usuario", back_populates="autoridad")
 
+    # Los campos distrito_* y materia_* vienen de estas relaciones
+    relaciones_campos = {"distrito_": "distrito", "materia_": "materia"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN el distrito y la materia de la autoridad"""
+        return [joinedload(cls.distrito), joinedload(cls.materia)]
+
     @property
     def distrito_clave(self):
         """Clave del distrito"""
-        return self.distrito.clave
+        return (get_distrito(self.distrito_id) or self.distrito).clave
 
     @property
     def distrito_nombre(self):
         """Nombre del distrito"""
-        return self.distrito.nombre
+        return (get_distrito(self.distrito_id) or self.distrito).nombre
 
     @property
     def distrito_nombre_corto(self):
         """Nombre corto del distrito"""
-        return self.distrito.nombre_corto
+        return (get_distrito(self.distrito_id) or self.distrito).nombre_corto
 
     @property
     def materia_clave(self):
         """Clave de la materia"""
-        return self.materia.clave
+        return (get_materia(self.materia_id) or self.materia).clave
 
     @property
     def materia_nombre(self):
         """Nombre de la materia"""
-        return self.materia.nombre
+        return (get_materia(self.materia_id) or self.materia).nombre
 
     def __repr__(self):
         """Representación"""
@@ -5,11 +5,14 @@ Edictos, modelos
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import JSON, ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import JSON, ForeignKey, Index, Select, String, select, text
+from sqlalchemy.orm import Mapped, defer, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_autoridad, get_distrito_de_autoridad
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
+from ..models.autoridades import Autoridad
+from ..models.distritos import Distrito
 
 
 class Edicto(Base, UniversalMixin):
@@ -18,6 +21,13 @@ class Edicto(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "edictos"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_edictos_activos_id", "id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_edictos_activos_autoridad_id", "autoridad_id", "id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_edictos_activos_creado", "creado", "id", postgresql_where=text("estatus = 'A'")),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -42,35 +52,78 @@ class Edicto(Base, UniversalMixin):
     rag_fue_categorizado_tiempo: Mapped[Optional[datetime]]
     rag_categorias: Mapped[Optional[dict]] = mapped_column(JSON)
 
+    # Los campos autoridad_* y distrito_* vienen de la autoridad del edicto
+    relaciones_campos = {"autoridad_": "autoridad", "distrito_": "autoridad.distrito"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN la autoridad del edicto y el distrito de la autoridad"""
+        return [joinedload(cls.autoridad).joinedload(Autoridad.distrito)]
+
+    @classmethod
+    def defer_rag_options(cls) -> list:
+        """Opciones para no cargar las columnas JSON de RAG en los paginados, sólo se entregan en el detalle"""
+        return [
+            defer(cls.rag_analisis, raiseload=True),
+            defer(cls.rag_sintesis, raiseload=True),
+            defer(cls.rag_categorias, raiseload=True),
+        ]
+
+    @classmethod
+    def row_select(cls) -> Select:
+        """Consulta de Core de las columnas de EdictoOut con JOIN a los catálogos, para exportar sin el ORM"""
+        return (
+            select(
+                cls.id,
+                cls.creado,
+                Distrito.clave.label("distrito_clave"),
+                Distrito.nombre.label("distrito_nombre"),
+                Autoridad.clave.label("autoridad_clave"),
+                Autoridad.descripcion.label("autoridad_descripcion"),
+                cls.fecha,
+                cls.descripcion,
+                cls.expediente,
+                cls.numero_publicacion,
+                cls.archivo,
+                cls.url,
+                cls.es_declaracion_de_ausencia,
+                cls.rag_fue_analizado_tiempo,
+                cls.rag_fue_sintetizado_tiempo,
+                cls.rag_fue_categorizado_tiempo,
+            )
+            .join(cls.autoridad)
+            .join(Autoridad.distrito)
+        )
+
     @property
     def distrito_clave(self):
         """Distrito clave"""
-        return self.autoridad.distrito.clave
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).clave
 
     @property
     def distrito_nombre(self):
         """Distrito nombre"""
-        return self.autoridad.distrito.nombre
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre
 
     @property
     def distrito_nombre_corto(self):
         """Distrito nombre corto"""
-        return self.autoridad.distrito.nombre_corto
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre_corto
 
     @property
     def autoridad_clave(self):
         """Autoridad clave"""
-        return self.autoridad.clave
+        return (get_autoridad(self.autoridad_id) or self.autoridad).clave
 
     @property
     def autoridad_descripcion(self):
         """Autoridad descripción"""
-        return self.autoridad.descripcion
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion
 
     @property
     def autoridad_descripcion_corta(self):
         """Autoridad descripción corta"""
-        return self.autoridad.descripcion_corta
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion_corta
 
     def __repr__(self):
         """Representación"""
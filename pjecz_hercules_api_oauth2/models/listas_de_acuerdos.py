@@ -5,11 +5,14 @@ Listas de Acuerdos, modelos
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import JSON, ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import JSON, ForeignKey, Index, Select, String, select, text
+from sqlalchemy.orm import Mapped, defer, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_autoridad, get_distrito_de_autoridad
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
+from ..models.autoridades import Autoridad
+from ..models.distritos import Distrito
 
 
 class ListaDeAcuerdo(Base, UniversalMixin):
@@ -18,6 +21,18 @@ class ListaDeAcuerdo(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "listas_de_acuerdos"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_listas_de_acuerdos_activas_fecha", "fecha", "id", postgresql_where=text("estatus = 'A'")),
+        Index(
+            "ix_listas_de_acuerdos_activas_autoridad_id_fecha",
+            "autoridad_id",
+            "fecha",
+            "id",
+            postgresql_where=text("estatus = 'A'"),
+        ),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -39,35 +54,75 @@ class ListaDeAcuerdo(Base, UniversalMixin):
     rag_fue_categorizado_tiempo: Mapped[Optional[datetime]]
     rag_categorias: Mapped[Optional[dict]] = mapped_column(JSON)
 
+    # Los campos autoridad_* y distrito_* vienen de la autoridad de la lista
+    relaciones_campos = {"autoridad_": "autoridad", "distrito_": "autoridad.distrito"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN la autoridad de la lista de acuerdos y su distrito"""
+        return [joinedload(cls.autoridad).joinedload(Autoridad.distrito)]
+
+    @classmethod
+    def defer_rag_options(cls) -> list:
+        """Opciones para no cargar las columnas JSON de RAG en los paginados, sólo se entregan en el detalle"""
+        return [
+            defer(cls.rag_analisis, raiseload=True),
+            defer(cls.rag_sintesis, raiseload=True),
+            defer(cls.rag_categorias, raiseload=True),
+        ]
+
+    @classmethod
+    def row_select(cls) -> Select:
+        """Consulta de Core de las columnas de ListaDeAcuerdoOut con JOIN a los catálogos, para exportar sin el ORM"""
+        return (
+            select(
+                cls.id,
+                cls.creado,
+                Distrito.clave.label("distrito_clave"),
+                Distrito.nombre.label("distrito_nombre"),
+                Autoridad.clave.label("autoridad_clave"),
+                Autoridad.descripcion.label("autoridad_descripcion"),
+                cls.fecha,
+                cls.descripcion,
+                cls.archivo,
+                cls.url,
+                cls.rag_fue_analizado_tiempo,
+                cls.rag_fue_sintetizado_tiempo,
+                cls.rag_fue_categorizado_tiempo,
+            )
+            .join(cls.autoridad)
+            .join(Autoridad.distrito)
+        )
+
     @property
     def distrito_clave(self):
         """Distrito clave"""
-        return self.autoridad.distrito.clave
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).clave
 
     @property
     def distrito_nombre(self):
         """Distrito nombre"""
-        return self.autoridad.distrito.nombre
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre
 
     @property
     def distrito_nombre_corto(self):
         """Distrito nombre corto"""
-        return self.autoridad.distrito.nombre_corto
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre_corto
 
     @property
     def autoridad_clave(self):
         """Autoridad clave"""
-        return self.autoridad.clave
+        return (get_autoridad(self.autoridad_id) or self.autoridad).clave
 
     @property
     def autoridad_descripcion(self):
         """Autoridad descripción"""
-        return self.autoridad.descripcion
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion
 
     @property
     def autoridad_descripcion_corta(self):
         """Autoridad descripción corta"""
-        return self.autoridad.descripcion_corta
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion_corta
 
     def __repr__(self):
         """Representación"""
@@ -5,8 +5,9 @@ Materias Tipos de Juicios, modelos
 from typing import List
 
 from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_materia
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
 
@@ -30,15 +31,23 @@ class MateriaTipoJuicio(Base, UniversalMixin):
     # Hijos
     sentencias: Mapped[List["Sentencia"]] = relationship("Sentencia", back_populates="materia_tipo_juicio")
 
+    # Los campos materia_* vienen de la materia
+    relaciones_campos = {"materia_": "materia"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN la materia del tipo de juicio"""
+        return [joinedload(cls.materia)]
+
     @property
     def materia_clave(self):
         """Clave de la materia"""
-        return self.materia.clave
+        return (get_materia(self.materia_id) or self.materia).clave
 
     @property
     def materia_nombre(self):
         """Nombre de la materia"""
-        return self.materia.nombre
+        return (get_materia(self.materia_id) or self.materia).nombre
 
     def __repr__(self):
         """Representación"""
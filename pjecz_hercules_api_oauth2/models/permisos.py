@@ -2,9 +2,10 @@
 Permisos, modelos
 """
 
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, String, text
+from sqlalchemy.orm import Mapped, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_modulo, get_rol
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
 
@@ -27,6 +28,12 @@ class Permiso(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "permisos"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_permisos_activos_rol_id", "rol_id", "modulo_id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_permisos_activos_modulo_id", "modulo_id", "id", postgresql_where=text("estatus = 'A'")),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -40,15 +47,23 @@ class Permiso(Base, UniversalMixin):
     nombre: Mapped[str] = mapped_column(String(256), unique=True)
     nivel: Mapped[int]
 
+    # Los campos rol_* y modulo_* vienen del rol y del módulo
+    relaciones_campos = {"rol_": "rol", "modulo_": "modulo"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN el rol y el módulo del permiso"""
+        return [joinedload(cls.rol), joinedload(cls.modulo)]
+
     @property
     def rol_nombre(self):
         """Nombre del rol"""
-        return self.rol.nombre
+        return (get_rol(self.rol_id) or self.rol).nombre
 
     @property
     def modulo_nombre(self):
         """Nombre del módulo"""
-        return self.modulo.nombre
+        return (get_modulo(self.modulo_id) or self.modulo).nombre
 
     @property
     def nivel_descrito(self):
@@ -5,11 +5,21 @@ Sentencias, modelos
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import JSON, Date, ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-
+from sqlalchemy import JSON, Date, ForeignKey, Index, Select, String, select, text
+from sqlalchemy.orm import Mapped, defer, joinedload, mapped_column, relationship
+
+from ..dependencies.catalogos import (
+    get_autoridad,
+    get_distrito_de_autoridad,
+    get_materia_de_materia_tipo_juicio,
+    get_materia_tipo_juicio,
+)
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
+from ..models.autoridades import Autoridad
+from ..models.distritos import Distrito
+from ..models.materias import Materia
+from ..models.materias_tipos_juicios import MateriaTipoJuicio
 
 
 class Sentencia(Base, UniversalMixin):
@@ -18,6 +28,13 @@ class Sentencia(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "sentencias"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_sentencias_activas_id", "id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_sentencias_activas_autoridad_id", "autoridad_id", "id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_sentencias_activas_creado", "creado", "id", postgresql_where=text("estatus = 'A'")),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -47,50 +64,110 @@ class Sentencia(Base, UniversalMixin):
     rag_fue_categorizado_tiempo: Mapped[Optional[datetime]]
     rag_categorias: Mapped[Optional[dict]] = mapped_column(JSON)
 
+    # La autoridad y el tipo de juicio, con su distrito y su materia, dan los campos con estos prefijos
+    relaciones_campos = {
+        "autoridad_": "autoridad",
+        "distrito_": "autoridad.distrito",
+        "materia_tipo_juicio_": "materia_tipo_juicio",
+        "materia_": "materia_tipo_juicio.materia",
+    }
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN la autoridad con su distrito y el tipo de juicio con su materia"""
+        return [
+            joinedload(cls.autoridad).joinedload(Autoridad.distrito),
+            joinedload(cls.materia_tipo_juicio).joinedload(MateriaTipoJuicio.materia),
+        ]
+
+    @classmethod
+    def defer_rag_options(cls) -> list:
+        """Opciones para no cargar las columnas JSON de RAG en los paginados, sólo se entregan en el detalle"""
+        return [
+            defer(cls.rag_analisis, raiseload=True),
+            defer(cls.rag_sintesis, raiseload=True),
+            defer(cls.rag_categorias, raiseload=True),
+        ]
+
+    @classmethod
+    def row_select(cls) -> Select:
+        """Consulta de Core de las columnas de SentenciaOut con JOIN a los catálogos, para exportar sin el ORM"""
+        return (
+            select(
+                cls.id,
+                cls.creado,
+                Distrito.clave.label("distrito_clave"),
+                Distrito.nombre.label("distrito_nombre"),
+                Autoridad.clave.label("autoridad_clave"),
+                Autoridad.descripcion.label("autoridad_descripcion"),
+                Materia.clave.label("materia_clave"),
+                Materia.nombre.label("materia_nombre"),
+                cls.materia_tipo_juicio_id,
+                MateriaTipoJuicio.descripcion.label("materia_tipo_juicio_descripcion"),
+                cls.sentencia,
+                cls.sentencia_fecha,
+                cls.expediente,
+                cls.expediente_anio,
+                cls.expediente_num,
+                cls.fecha,
+                cls.descripcion,
+                cls.es_perspectiva_genero,
+                cls.archivo,
+                cls.url,
+                cls.rag_fue_analizado_tiempo,
+                cls.rag_fue_sintetizado_tiempo,
+                cls.rag_fue_categorizado_tiempo,
+            )
+            .join(cls.autoridad)
+            .join(Autoridad.distrito)
+            .join(cls.materia_tipo_juicio)
+            .join(MateriaTipoJuicio.materia)
+        )
+
     @property
     def distrito_clave(self):
         """Distrito clave"""
-        return self.autoridad.distrito.clave
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).clave
 
     @property
     def distrito_nombre(self):
         """Distrito nombre"""
-        return self.autoridad.distrito.nombre
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre
 
     @property
     def distrito_nombre_corto(self):
         """Distrito nombre corto"""
-        return self.autoridad.distrito.nombre_corto
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre_corto
 
     @property
     def autoridad_clave(self):
         """Autoridad clave"""
-        return self.autoridad.clave
+        return (get_autoridad(self.autoridad_id) or self.autoridad).clave
 
     @property
     def autoridad_descripcion(self):
         """Autoridad descripción"""
-        return self.autoridad.descripcion
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion
 
     @property
     def autoridad_descripcion_corta(self):
         """Autoridad descripción corta"""
-        return self.autoridad.descripcion_corta
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion_corta
 
     @property
     def materia_clave(self):
         """Clave de la materia"""
-        return self.materia_tipo_juicio.materia.clave
+        return (get_materia_de_materia_tipo_juicio(self.materia_tipo_juicio_id) or self.materia_tipo_juicio.materia).clave
 
     @property
     def materia_nombre(self):
         """Nombre de la materia"""
-        return self.materia_tipo_juicio.materia.nombre
+        return (get_materia_de_materia_tipo_juicio(self.materia_tipo_juicio_id) or self.materia_tipo_juicio.materia).nombre
 
     @property
     def materia_tipo_juicio_descripcion(self):
         """Descripción del tipo de juicio"""
-        return self.materia_tipo_juicio.descripcion
+        return (get_materia_tipo_juicio(self.materia_tipo_juicio_id) or self.materia_tipo_juicio).descripcion
 
     def __repr__(self):
         """Representación"""
@@ -5,12 +5,16 @@ Usuarios, modelos
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, Select, String, func, select, text
+from sqlalchemy.orm import Mapped, joinedload, mapped_column, object_session, relationship
 
+from ..dependencies.catalogos import get_autoridad, get_distrito_de_autoridad
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
+from ..models.autoridades import Autoridad
+from ..models.modulos import Modulo
 from ..models.permisos import Permiso
+from ..models.usuarios_roles import UsuarioRol
 
 
 class Usuario(Base, UniversalMixin):
@@ -19,6 +23,11 @@ class Usuario(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "usuarios"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_usuarios_activos_autoridad_id", "autoridad_id", "email", postgresql_where=text("estatus = 'A'")),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -40,35 +49,43 @@ class Usuario(Base, UniversalMixin):
     # Propiedades
     permisos_consultados = {}
 
+    # Los campos autoridad_* y distrito_* vienen de la autoridad del usuario
+    relaciones_campos = {"autoridad_": "autoridad", "distrito_": "autoridad.distrito"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN la autoridad del usuario y su distrito, también al autentificar"""
+        return [joinedload(cls.autoridad).joinedload(Autoridad.distrito)]
+
     @property
     def autoridad_clave(self):
         """Clave de la autoridad"""
-        return self.autoridad.clave
+        return (get_autoridad(self.autoridad_id) or self.autoridad).clave
 
     @property
     def autoridad_descripcion(self):
         """Descripción de la autoridad"""
-        return self.autoridad.descripcion
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion
 
     @property
     def autoridad_descripcion_corta(self):
         """Descripción corta de la autoridad"""
-        return self.autoridad.descripcion_corta
+        return (get_autoridad(self.autoridad_id) or self.autoridad).descripcion_corta
 
     @property
     def distrito_clave(self):
         """Clave del distrito"""
-        return self.autoridad.distrito.clave
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).clave
 
     @property
     def distrito_nombre(self):
         """Nombre del distrito"""
-        return self.autoridad.distrito.nombre
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre
 
     @property
     def distrito_nombre_corto(self):
         """Nombre corto del distrito"""
-        return self.autoridad.distrito.nombre_corto
+        return (get_distrito_de_autoridad(self.autoridad_id) or self.autoridad.distrito).nombre_corto
 
     @property
     def nombre(self):
@@ -80,16 +97,23 @@ class Usuario(Base, UniversalMixin):
         """Entrega un diccionario con todos los permisos"""
         if len(self.permisos_consultados) > 0:
             return self.permisos_consultados
-        self.permisos_consultados = {}
-        for usuario_rol in self.usuarios_roles:
-            if usuario_rol.estatus == "A":
-                for permiso in usuario_rol.rol.permisos:
-                    if permiso.estatus == "A":
-                        etiqueta = permiso.modulo.nombre
-                        if etiqueta not in self.permisos_consultados or permiso.nivel > self.permisos_consultados[etiqueta]:
-                            self.permisos_consultados[etiqueta] = permiso.nivel
+        self.permisos_consultados = dict(object_session(self).execute(self.select_permissions(self.id)).all())
         return self.permisos_consultados
 
+    @staticmethod
+    def select_permissions(usuario_id: int) -> Select:
+        """Consulta que entrega el nombre del módulo y el nivel máximo de los permisos activos de los roles activos"""
+        return (
+            select(Modulo.nombre, func.max(Permiso.nivel))
+            .select_from(UsuarioRol)
+            .join(Permiso, Permiso.rol_id == UsuarioRol.rol_id)
+            .join(Modulo, Modulo.id == Permiso.modulo_id)
+            .where(UsuarioRol.usuario_id == usuario_id)
+            .where(UsuarioRol.estatus == "A")
+            .where(Permiso.estatus == "A")
+            .group_by(Modulo.nombre)
+        )
+
     def can(self, modulo_nombre: str, permission: int):
         """¿Tiene permiso?"""
         if modulo_nombre in self.permisos:
@@ -2,9 +2,10 @@
 Usuarios-Roles, modelos
 """
 
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, String, text
+from sqlalchemy.orm import Mapped, joinedload, mapped_column, relationship
 
+from ..dependencies.catalogos import get_rol
 from ..dependencies.database import Base
 from ..dependencies.universal_mixin import UniversalMixin
 
@@ -15,6 +16,12 @@ class UsuarioRol(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "usuarios_roles"
 
+    # Índices parciales para los registros activos, según los filtros y el orden de los paginados
+    __table_args__ = (
+        Index("ix_usuarios_roles_activos_usuario_id", "usuario_id", "rol_id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_usuarios_roles_activos_rol_id", "rol_id", "id", postgresql_where=text("estatus = 'A'")),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -27,10 +34,18 @@ class UsuarioRol(Base, UniversalMixin):
     # Columnas
     descripcion: Mapped[str] = mapped_column(String(256))
 
+    # rol_nombre viene del rol y usuario_email del usuario, que no está en el catálogo
+    relaciones_campos = {"rol_": "rol", "usuario_": "usuario"}
+
+    @classmethod
+    def load_options(cls) -> list:
+        """Cargar con JOIN el rol y el usuario, el email del usuario no está en el catálogo"""
+        return [joinedload(cls.rol), joinedload(cls.usuario)]
+
     @property
     def rol_nombre(self):
         """Nombre del rol"""
-        return self.rol.nombre
+        return (get_rol(self.rol_id) or self.rol).nombre
 
     @property
     def usuario_email(self):
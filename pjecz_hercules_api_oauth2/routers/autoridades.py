@@ -4,65 +4,114 @@ Autoridades
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import false, select
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import get_catalogo
+from ..dependencies.conditional_requests import not_modified, page_validators, record_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
 from ..dependencies.safe_string import safe_clave
+from ..dependencies.sparse_fieldsets import (
+    page_load_options,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.autoridades import Autoridad
-from ..models.distritos import Distrito
-from ..models.materias import Materia
 from ..models.permisos import Permiso
 from ..schemas.autoridades import AutoridadOut, OneAutoridadOut
 from ..schemas.usuarios import UsuarioInDB
 
-autoridades = APIRouter(prefix="/api/v5/autoridades", tags=["autoridades"])
+autoridades = APIRouter(
+    prefix="/api/v5/autoridades", tags=["autoridades"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute
+)
 
 
 @autoridades.get("/{clave}", response_model=OneAutoridadOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     clave: str,
+    fields: str = "",
 ):
     """Detalle de un autoridad a partir de su clave"""
     if current_user.permissions.get("AUTORIDADES", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    campos = parse_fields(AutoridadOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["AUTORIDADES"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
     try:
         clave = safe_clave(clave)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
     try:
-        autoridad = database.query(Autoridad).filter(Autoridad.clave == clave).one()
+        autoridad = (
+            await database.execute(
+                select(Autoridad).options(*record_load_options(Autoridad, campos)).filter(Autoridad.clave == clave)
+            )
+        ).scalar_one()
     except (MultipleResultsFound, NoResultFound):
         return OneAutoridadOut(success=False, message="No existe esa autoridad")
     if autoridad.estatus != "A":
         return OneAutoridadOut(success=False, message="No es activa ese autoridad, está eliminada")
-    return OneAutoridadOut(success=True, message="Detalle de una autoridad", data=AutoridadOut.model_validate(autoridad))
+    validadores = record_validators(request, autoridad)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    return await cache_response(
+        cache_key,
+        validadores,
+        sparse_one_schema(OneAutoridadOut, campos)(
+            success=True, message="Detalle de una autoridad", data=sparse_schema(AutoridadOut, campos).model_validate(autoridad)
+        ),
+    )
 
 
 @autoridades.get("", response_model=CustomPage[AutoridadOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     distrito_clave: str = "",
     es_jurisdiccional: bool | None = None,
     es_notaria: bool | None = None,
     materia_clave: str = "",
+    fields: str = "",
 ):
     """Paginado de autoridades"""
     if current_user.permissions.get("AUTORIDADES", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(Autoridad)
+    campos = parse_fields(AutoridadOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["AUTORIDADES"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(Autoridad)
     if distrito_clave:
         try:
             distrito_clave = safe_clave(distrito_clave)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave del distrito")
-        consulta = consulta.join(Distrito).filter(Distrito.clave == distrito_clave).filter(Distrito.estatus == "A")
+        distrito = catalogo.distrito_activo(distrito_clave)
+        if distrito is None:
+            consulta = consulta.filter(false())  # No existe o no es activo, la página queda vacía
+        else:
+            consulta = consulta.filter(Autoridad.distrito_id == distrito.id)
     if es_jurisdiccional is not None:
         consulta = consulta.filter(Autoridad.es_jurisdiccional == es_jurisdiccional)
     if es_notaria is not None:
@@ -72,5 +121,18 @@ async def paginado(
             materia_clave = safe_clave(materia_clave)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave del materia")
-        consulta = consulta.join(Materia).filter(Materia.clave == materia_clave).filter(Materia.estatus == "A")
-    return paginate(consulta.filter(Autoridad.estatus == "A").order_by(Autoridad.clave))
+        materia = catalogo.materia_activa(materia_clave)
+        if materia is None:
+            consulta = consulta.filter(false())  # No existe o no es activa, la página queda vacía
+        else:
+            consulta = consulta.filter(Autoridad.materia_id == materia.id)
+    consulta = consulta.filter(Autoridad.estatus == "A")
+    validadores = await page_validators(request, database, consulta, Autoridad)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Autoridad.clave]
+    pagina = await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(AutoridadOut, campos), opciones=page_load_options(Autoridad, campos, orden)
+    )
+    return await cache_response(cache_key, validadores, pagina)
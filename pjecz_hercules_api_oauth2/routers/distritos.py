@@ -4,57 +4,108 @@ Distritos
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.conditional_requests import not_modified, page_validators, record_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
 from ..dependencies.safe_string import safe_clave
+from ..dependencies.sparse_fieldsets import (
+    page_load_options,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.distritos import Distrito
 from ..models.permisos import Permiso
 from ..schemas.distritos import DistritoOut, OneDistritoOut
 from ..schemas.usuarios import UsuarioInDB
 
-distritos = APIRouter(prefix="/api/v5/distritos", tags=["distritos"])
+distritos = APIRouter(prefix="/api/v5/distritos", tags=["distritos"], route_class=FastJSONRoute)
 
 
 @distritos.get("/{clave}", response_model=OneDistritoOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     clave: str,
+    fields: str = "",
 ):
     """Detalle de un distrito a partir de su clave"""
     if current_user.permissions.get("AUTORIDADES", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    campos = parse_fields(DistritoOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["AUTORIDADES"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
     try:
         clave = safe_clave(clave)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
     try:
-        distrito = database.query(Distrito).filter(Distrito.clave == clave).one()
+        distrito = (
+            await database.execute(
+                select(Distrito).options(*record_load_options(Distrito, campos)).filter(Distrito.clave == clave)
+            )
+        ).scalar_one()
     except (MultipleResultsFound, NoResultFound):
         return OneDistritoOut(success=False, message="No existe distrito")
     if distrito.estatus != "A":
         return OneDistritoOut(success=False, message="No es activo ese distrito, está eliminado")
-    return OneDistritoOut(success=True, message="Detalle de un distrito", data=DistritoOut.model_validate(distrito))
+    validadores = record_validators(request, distrito)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    return await cache_response(
+        cache_key,
+        validadores,
+        sparse_one_schema(OneDistritoOut, campos)(
+            success=True, message="Detalle de un distrito", data=sparse_schema(DistritoOut, campos).model_validate(distrito)
+        ),
+    )
 
 
 @distritos.get("", response_model=CustomPage[DistritoOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     es_distrito: bool | None = None,
     es_jurisdiccional: bool | None = None,
+    fields: str = "",
 ):
     """Paginado de distritos"""
     if current_user.permissions.get("DISTRITOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(Distrito)
+    campos = parse_fields(DistritoOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["DISTRITOS"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(Distrito)
     if es_distrito is not None:
         consulta = consulta.filter_by(es_distrito=es_distrito)
     if es_jurisdiccional is not None:
         consulta = consulta.filter_by(es_jurisdiccional=es_jurisdiccional)
-    return paginate(consulta.filter_by(estatus="A").order_by(Distrito.clave))
+    consulta = consulta.filter_by(estatus="A")
+    validadores = await page_validators(request, database, consulta, Distrito)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Distrito.clave]
+    pagina = await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(DistritoOut, campos), opciones=page_load_options(Distrito, campos, orden)
+    )
+    return await cache_response(cache_key, validadores, pagina)
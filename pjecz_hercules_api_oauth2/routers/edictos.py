@@ -6,83 +6,153 @@ from datetime import date, datetime
 from typing import Annotated
 
 import pytz
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import Select, select
 
+from ..config.settings import Settings, get_settings
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import autoridad_activa_id, get_catalogo
+from ..dependencies.conditional_requests import page_not_modified, record_not_modified
+from ..dependencies.database import AsyncSession, get_async_db
+from ..dependencies.database_read import WriteMarkStore, get_db_read, get_write_mark_store
+from ..dependencies.exports import ndjson_response
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
 from ..dependencies.safe_string import safe_clave
-from ..models.autoridades import Autoridad
+from ..dependencies.sparse_fieldsets import (
+    page_columns,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.edictos import Edicto
 from ..models.permisos import Permiso
 from ..schemas.edictos import EdictoOut, EdictoRAGIn, EdictoRAGOut, OneEdictoOut
 from ..schemas.usuarios import UsuarioInDB
 
-edictos = APIRouter(prefix="/api/v5/edictos", tags=["edictos"])
+edictos = APIRouter(prefix="/api/v5/edictos", tags=["edictos"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute)
+
+
+def filtrar_edictos(
+    catalogo: Catalogo,
+    autoridad_clave: str = "",
+    creado: date | None = None,
+    creado_desde: date | None = None,
+    creado_hasta: date | None = None,
+) -> Select:
+    """Consulta de los edictos activos con los filtros del paginado y de la exportación"""
+    consulta = select(Edicto).options(*Edicto.defer_rag_options())
+    if autoridad_clave:
+        try:
+            autoridad_clave = safe_clave(autoridad_clave)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
+        consulta = consulta.filter(Edicto.autoridad_id == autoridad_activa_id(catalogo, autoridad_clave))
+    if creado is not None:
+        consulta = consulta.filter(Edicto.creado >= datetime(creado.year, creado.month, creado.day, 0, 0, 0))
+        consulta = consulta.filter(Edicto.creado <= datetime(creado.year, creado.month, creado.day, 23, 59, 59))
+    else:
+        if creado_desde is not None:
+            consulta = consulta.filter(
+                Edicto.creado >= datetime(creado_desde.year, creado_desde.month, creado_desde.day, 0, 0, 0)
+            )
+        if creado_hasta is not None:
+            consulta = consulta.filter(
+                Edicto.creado <= datetime(creado_hasta.year, creado_hasta.month, creado_hasta.day, 23, 59, 59)
+            )
+    return consulta.filter(Edicto.estatus == "A")
+
+
+@edictos.get("/export")
+async def exportar(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
+    autoridad_clave: str = "",
+    creado: date | None = None,
+    creado_desde: date | None = None,
+    creado_hasta: date | None = None,
+):
+    """Exportar en NDJSON, un registro por línea, todos los edictos del filtro"""
+    if current_user.permissions.get("EDICTOS", 0) < settings.EXPORT_PERMISSION_LEVEL:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    consulta = filtrar_edictos(catalogo, autoridad_clave, creado, creado_desde, creado_hasta)
+    columnas = Edicto.row_select().where(consulta.whereclause).order_by(Edicto.id.desc())
+    return ndjson_response(current_user.email, write_marks, columnas, EdictoOut, "edictos")
 
 
 @edictos.get("/{edicto_id}", response_model=OneEdictoOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     edicto_id: int,
+    fields: str = "",
 ):
     """Detalle de una edicto a partir de su ID"""
     if current_user.permissions.get("EDICTOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    edicto = database.query(Edicto).get(edicto_id)
+    campos = parse_fields(EdictoRAGOut, fields)
+    edicto = await database.get(Edicto, edicto_id, options=record_load_options(Edicto, campos))
     if edicto is None:
         return OneEdictoOut(success=False, message="No existe esa edicto")
     if edicto.estatus != "A":
         return OneEdictoOut(success=False, message="No es activa esa edicto, está eliminada")
-    return OneEdictoOut(success=True, message="Detalle de una edicto", data=EdictoRAGOut.model_validate(edicto))
+    no_modificado = record_not_modified(request, response, edicto)
+    if no_modificado is not None:
+        return no_modificado
+    return sparse_one_schema(OneEdictoOut, campos)(
+        success=True, message="Detalle de una edicto", data=sparse_schema(EdictoRAGOut, campos).model_validate(edicto)
+    )
 
 
 @edictos.get("", response_model=CustomPage[EdictoOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     autoridad_clave: str = "",
     creado: date | None = None,
     creado_desde: date | None = None,
     creado_hasta: date | None = None,
+    fields: str = "",
 ):
     """Paginado de edictos"""
     if current_user.permissions.get("EDICTOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(Edicto)
-    if autoridad_clave:
-        try:
-            autoridad_clave = safe_clave(autoridad_clave)
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
-        consulta = consulta.join(Autoridad).filter(Autoridad.clave == autoridad_clave).filter(Autoridad.estatus == "A")
-    if creado is not None:
-        consulta = consulta.filter(Edicto.creado >= datetime(creado.year, creado.month, creado.day, 0, 0, 0))
-        consulta = consulta.filter(Edicto.creado <= datetime(creado.year, creado.month, creado.day, 23, 59, 59))
-    else:
-        if creado_desde is not None:
-            consulta = consulta.filter(
-                Edicto.creado >= datetime(creado_desde.year, creado_desde.month, creado_desde.day, 0, 0, 0)
-            )
-        if creado_hasta is not None:
-            consulta = consulta.filter(
-                Edicto.creado <= datetime(creado_hasta.year, creado_hasta.month, creado_hasta.day, 23, 59, 59)
-            )
-    return paginate(consulta.filter(Edicto.estatus == "A").order_by(Edicto.id.desc()))
+    campos = parse_fields(EdictoOut, fields)
+    consulta = filtrar_edictos(catalogo, autoridad_clave, creado, creado_desde, creado_hasta)
+    no_modificado = await page_not_modified(request, response, database, consulta, Edicto)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Edicto.id.desc()]
+    return await apaginate_custom_page(
+        database,
+        consulta,
+        orden,
+        tipo=sparse_page(EdictoOut, campos),
+        columnas=page_columns(Edicto, campos, orden),
+    )
 
 
 @edictos.put("/rag", response_model=OneEdictoOut)
 async def actualizar_rag(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_async_db)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
     rag: EdictoRAGIn,
 ):
     """Actualizar Retrieval-Augmented Generation (RAG) de un edicto"""
     if current_user.permissions.get("SENTENCIAS", 0) < Permiso.MODIFICAR:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    sentencia = database.query(Edicto).get(rag.id)
+    sentencia = await database.get(Edicto, rag.id, options=Edicto.load_options())
     if sentencia is None:
         return OneEdictoOut(success=False, message="No existe esa sentencia")
     if sentencia.estatus != "A":
@@ -90,15 +160,15 @@ async def actualizar_rag(
     hay_cambios = False
     if rag.analisis is not None and sentencia.rag_analisis != rag.analisis:
         sentencia.rag_analisis = rag.analisis
-        sentencia.rag_fue_analizado_tiempo = datetime.now(tz=pytz.utc)
+        sentencia.rag_fue_analizado_tiempo = datetime.now(tz=pytz.utc).replace(tzinfo=None)
         hay_cambios = True
     if rag.sintesis is not None and sentencia.rag_sintesis != rag.sintesis:
         sentencia.rag_sintesis = rag.sintesis
-        sentencia.rag_fue_sintetizado_tiempo = datetime.now(tz=pytz.utc)
+        sentencia.rag_fue_sintetizado_tiempo = datetime.now(tz=pytz.utc).replace(tzinfo=None)
         hay_cambios = True
     if rag.categorias is not None and sentencia.rag_categorias != rag.categorias:
         sentencia.rag_categorias = rag.categorias
-        sentencia.rag_fue_categorizado_tiempo = datetime.now(tz=pytz.utc)
+        sentencia.rag_fue_categorizado_tiempo = datetime.now(tz=pytz.utc).replace(tzinfo=None)
         hay_cambios = True
     if hay_cambios is False:
         return OneEdictoOut(
@@ -107,7 +177,8 @@ async def actualizar_rag(
             data=EdictoRAGOut.model_validate(sentencia),
         )
     database.add(sentencia)
-    database.commit()
+    await database.commit()
+    await write_marks.mark(current_user.email)
     return OneEdictoOut(
         success=True,
         message="Se actualizó la sentencia",
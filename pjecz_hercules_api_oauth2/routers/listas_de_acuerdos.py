@@ -6,21 +6,36 @@ import locale
 from datetime import date, datetime, timedelta
 from io import BytesIO
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 from urllib.parse import unquote, urlparse
 
 import pytz
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
 from fastapi.responses import StreamingResponse
-from fastapi_pagination.ext.sqlalchemy import paginate
 from google.cloud import storage
 from hashids import Hashids
+from sqlalchemy import Select, select
+from starlette.concurrency import run_in_threadpool
 
 from ..config.settings import Settings, get_settings
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import autoridad_activa_id, get_catalogo
+from ..dependencies.conditional_requests import page_not_modified, record_not_modified
+from ..dependencies.database import AsyncSession, get_async_db
+from ..dependencies.database_read import WriteMarkStore, get_db_read, get_write_mark_store
+from ..dependencies.exports import columnar_response, ndjson_response
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
 from ..dependencies.safe_string import safe_clave, safe_string
+from ..dependencies.sparse_fieldsets import (
+    page_columns,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.autoridades import Autoridad
 from ..models.listas_de_acuerdos import ListaDeAcuerdo
 from ..models.permisos import Permiso
@@ -29,20 +44,93 @@ from ..schemas.usuarios import UsuarioInDB
 
 LIMITE_DIAS = 365  # Un año
 
-listas_de_acuerdos = APIRouter(prefix="/api/v5/listas_de_acuerdos", tags=["listas de acuerdos"])
+listas_de_acuerdos = APIRouter(
+    prefix="/api/v5/listas_de_acuerdos",
+    tags=["listas de acuerdos"],
+    dependencies=[Depends(get_catalogo)],
+    route_class=FastJSONRoute,
+)
+
+
+def filtrar_listas_de_acuerdos(
+    catalogo: Catalogo,
+    autoridad_clave: str = "",
+    fecha: date | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+) -> Select:
+    """Consulta de las listas de acuerdos activas con los filtros del paginado y de la exportación"""
+    consulta = select(ListaDeAcuerdo).options(*ListaDeAcuerdo.defer_rag_options())
+    if autoridad_clave:
+        try:
+            autoridad_clave = safe_clave(autoridad_clave)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
+        consulta = consulta.filter(ListaDeAcuerdo.autoridad_id == autoridad_activa_id(catalogo, autoridad_clave))
+    if fecha is not None:
+        consulta = consulta.filter(ListaDeAcuerdo.fecha == fecha)
+    else:
+        if fecha_desde is not None:
+            consulta = consulta.filter(ListaDeAcuerdo.fecha >= fecha_desde)
+        if fecha_hasta is not None:
+            consulta = consulta.filter(ListaDeAcuerdo.fecha <= fecha_hasta)
+    return consulta.filter(ListaDeAcuerdo.estatus == "A")
+
+
+@listas_de_acuerdos.get("/export")
+async def exportar(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
+    autoridad_clave: str = "",
+    fecha: date | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+):
+    """Exportar en NDJSON, un registro por línea, todas las listas de acuerdos del filtro"""
+    if current_user.permissions.get("LISTAS DE ACUERDOS", 0) < settings.EXPORT_PERMISSION_LEVEL:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    consulta = filtrar_listas_de_acuerdos(catalogo, autoridad_clave, fecha, fecha_desde, fecha_hasta)
+    columnas = (
+        ListaDeAcuerdo.row_select().where(consulta.whereclause).order_by(ListaDeAcuerdo.fecha.desc(), ListaDeAcuerdo.id.desc())
+    )
+    return ndjson_response(current_user.email, write_marks, columnas, ListaDeAcuerdoOut, "listas_de_acuerdos")
+
+
+@listas_de_acuerdos.get("/export/{formato}")
+async def exportar_columnas(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
+    formato: Literal["csv", "parquet"],
+    autoridad_clave: str = "",
+    fecha: date | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+):
+    """Exportar en CSV o Parquet, con renglones de Core, todas las listas de acuerdos del filtro"""
+    if current_user.permissions.get("LISTAS DE ACUERDOS", 0) < settings.EXPORT_PERMISSION_LEVEL:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    consulta = filtrar_listas_de_acuerdos(catalogo, autoridad_clave, fecha, fecha_desde, fecha_hasta)
+    columnas = (
+        ListaDeAcuerdo.row_select().where(consulta.whereclause).order_by(ListaDeAcuerdo.fecha.desc(), ListaDeAcuerdo.id.desc())
+    )
+    return columnar_response(current_user.email, write_marks, columnas, formato, "listas_de_acuerdos")
 
 
 @listas_de_acuerdos.get("/listas_de_acuerdos/visualizar/{lista_de_acuerdo_id}")
 async def visualizar(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
     settings: Annotated[Settings, Depends(get_settings)],
     lista_de_acuerdo_id: int,
 ):
     """Visualizar el archivo de una lista de acuerdos en un iframe a partir de su ID"""
     if current_user.permissions.get("LISTAS DE ACUERDOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    lista_de_acuerdo = database.query(ListaDeAcuerdo).get(lista_de_acuerdo_id)
+    lista_de_acuerdo = await database.get(ListaDeAcuerdo, lista_de_acuerdo_id, options=ListaDeAcuerdo.load_options())
     if lista_de_acuerdo is None:
         return OneListaDeAcuerdoOut(success=False, message="No existe esa lista de acuerdos")
     if lista_de_acuerdo.estatus != "A":
@@ -60,8 +148,8 @@ async def visualizar(
     # Obtener el archivo desde Google Cloud Storage
     storage_client = storage.Client()
     try:
-        bucket = storage_client.get_bucket(settings.CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS)
-        blob = bucket.get_blob(blob_name)
+        bucket = await run_in_threadpool(storage_client.get_bucket, settings.CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS)
+        blob = await run_in_threadpool(bucket.get_blob, blob_name)
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -78,7 +166,7 @@ async def visualizar(
     # Descargar el archivo en memoria
     archivo_contenido = BytesIO()
     try:
-        archivo_contenido.write(blob.download_as_bytes())
+        archivo_contenido.write(await run_in_threadpool(blob.download_as_bytes))
         archivo_contenido.seek(0)  # Volver al inicio del archivo
     except Exception as error:
         raise HTTPException(
@@ -87,7 +175,7 @@ async def visualizar(
         )
 
     # Definir el nombre del archivo para la respuesta
-    autoridad_clave = lista_de_acuerdo.autoridad.clave
+    autoridad_clave = lista_de_acuerdo.autoridad_clave
     fecha_str = lista_de_acuerdo.fecha.strftime("%Y-%m-%d")
     archivo_nombre = f"lista_de_acuerdos_{autoridad_clave}_{fecha_str}.pdf"
 
@@ -102,55 +190,69 @@ async def visualizar(
 @listas_de_acuerdos.get("/{lista_de_acuerdo_id}", response_model=OneListaDeAcuerdoOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     lista_de_acuerdo_id: int,
+    fields: str = "",
 ):
     """Detalle de una lista de acuerdos a partir de su ID"""
     if current_user.permissions.get("LISTAS DE ACUERDOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    lista_de_acuerdo = database.query(ListaDeAcuerdo).get(lista_de_acuerdo_id)
+    campos = parse_fields(ListaDeAcuerdoRAGOut, fields)
+    lista_de_acuerdo = await database.get(
+        ListaDeAcuerdo, lista_de_acuerdo_id, options=record_load_options(ListaDeAcuerdo, campos)
+    )
     if lista_de_acuerdo is None:
         return OneListaDeAcuerdoOut(success=False, message="No existe esa lista de acuerdos")
     if lista_de_acuerdo.estatus != "A":
         return OneListaDeAcuerdoOut(success=False, message="No es activa esa lista de acuerdos, está eliminada")
-    return OneListaDeAcuerdoOut(
-        success=True, message="Detalle de una lista de acuerdos", data=ListaDeAcuerdoRAGOut.model_validate(lista_de_acuerdo)
+    no_modificado = record_not_modified(request, response, lista_de_acuerdo)
+    if no_modificado is not None:
+        return no_modificado
+    return sparse_one_schema(OneListaDeAcuerdoOut, campos)(
+        success=True,
+        message="Detalle de una lista de acuerdos",
+        data=sparse_schema(ListaDeAcuerdoRAGOut, campos).model_validate(lista_de_acuerdo),
     )
 
 
 @listas_de_acuerdos.get("", response_model=CustomPage[ListaDeAcuerdoOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     autoridad_clave: str = "",
     fecha: date | None = None,
     fecha_desde: date | None = None,
     fecha_hasta: date | None = None,
+    fields: str = "",
 ):
     """Paginado de listas_de_acuerdos"""
     if current_user.permissions.get("LISTAS DE ACUERDOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(ListaDeAcuerdo)
-    if autoridad_clave:
-        try:
-            autoridad_clave = safe_clave(autoridad_clave)
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave")
-        consulta = consulta.join(Autoridad).filter(Autoridad.clave == autoridad_clave).filter(Autoridad.estatus == "A")
-    if fecha is not None:
-        consulta = consulta.filter(ListaDeAcuerdo.fecha == fecha)
-    else:
-        if fecha_desde is not None:
-            consulta = consulta.filter(ListaDeAcuerdo.fecha >= fecha_desde)
-        if fecha_hasta is not None:
-            consulta = consulta.filter(ListaDeAcuerdo.fecha <= fecha_hasta)
-    return paginate(consulta.filter(ListaDeAcuerdo.estatus == "A").order_by(ListaDeAcuerdo.fecha.desc()))
+    campos = parse_fields(ListaDeAcuerdoOut, fields)
+    consulta = filtrar_listas_de_acuerdos(catalogo, autoridad_clave, fecha, fecha_desde, fecha_hasta)
+    no_modificado = await page_not_modified(request, response, database, consulta, ListaDeAcuerdo)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [ListaDeAcuerdo.fecha.desc(), ListaDeAcuerdo.id.desc()]
+    return await apaginate_custom_page(
+        database,
+        consulta,
+        orden,
+        tipo=sparse_page(ListaDeAcuerdoOut, campos),
+        columnas=page_columns(ListaDeAcuerdo, campos, orden),
+    )
 
 
 @listas_de_acuerdos.post("", response_model=OneListaDeAcuerdoOut)
 async def insertar(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_async_db)],
+    write_marks: Annotated[WriteMarkStore, Depends(get_write_mark_store)],
     settings: Annotated[Settings, Depends(get_settings)],
     archivo: UploadFile = File(...),
     autoridad_clave: str = Form(...),
@@ -166,7 +268,14 @@ async def insertar(
         autoridad_clave = safe_clave(autoridad_clave)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave de la autoridad")
-    autoridad = database.query(Autoridad).filter(Autoridad.clave == autoridad_clave).filter(Autoridad.estatus == "A").first()
+    autoridad = (
+        await database.execute(
+            select(Autoridad)
+            .options(*Autoridad.load_options())
+            .filter(Autoridad.clave == autoridad_clave)
+            .filter(Autoridad.estatus == "A")
+        )
+    ).scalar()
     if autoridad is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No existe esa autoridad o no está activa")
 
@@ -208,25 +317,26 @@ async def insertar(
 
     # Consultar si existe una lista de acuerdos con la misma fecha y autoridad
     anterior_lista_de_acuerdo = (
-        database.query(ListaDeAcuerdo)
-        .filter(ListaDeAcuerdo.autoridad_id == autoridad.id)
-        .filter(ListaDeAcuerdo.fecha == fecha_dt)
-        .filter(ListaDeAcuerdo.estatus == "A")
-        .first()
-    )
+        await database.execute(
+            select(ListaDeAcuerdo)
+            .filter(ListaDeAcuerdo.autoridad_id == autoridad.id)
+            .filter(ListaDeAcuerdo.fecha == fecha_dt)
+            .filter(ListaDeAcuerdo.estatus == "A")
+        )
+    ).scalar()
 
     # Insertar el registro de la lista de acuerdos para que tenga un ID
     nueva_lista_de_acuerdo = ListaDeAcuerdo(
-        autoridad_id=autoridad.id,
-        fecha=fecha,
+        autoridad=autoridad,
+        fecha=fecha_dt,
         descripcion=descripcion,
         estatus="B",
     )
     database.add(nueva_lista_de_acuerdo)
-    database.commit()
+    await database.commit()
 
     # Cargar el archivo en memoria
-    archivo_en_memoria = archivo.file.read()
+    archivo_en_memoria = await archivo.read()
 
     # Definir la materia para el nombre del archivo
     materia = safe_string(autoridad.materia.nombre)
@@ -253,12 +363,13 @@ async def insertar(
     # Subir el archivo PDF a Google Cloud Storage
     storage_client = storage.Client()
     try:
-        bucket = storage_client.get_bucket(settings.CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS)
+        bucket = await run_in_threadpool(storage_client.get_bucket, settings.CLOUD_STORAGE_DEPOSITO_LISTAS_DE_ACUERDOS)
         blob = bucket.blob(archivo_ruta)
-        blob.upload_from_string(archivo_en_memoria, content_type="application/pdf")
+        await run_in_threadpool(blob.upload_from_string, archivo_en_memoria, content_type="application/pdf")
     except Exception as error:
         # Eliminar el registro de la lista de acuerdos porque no se pudo subir el archivo
-        nueva_lista_de_acuerdo.delete()
+        await database.delete(nueva_lista_de_acuerdo)
+        await database.commit()
         return OneListaDeAcuerdoOut(
             success=False,
             message=f"No se pudo subir el archivo a Google Cloud Storage: {error}",
@@ -268,13 +379,24 @@ async def insertar(
     nueva_lista_de_acuerdo.archivo = archivo_nombre
     nueva_lista_de_acuerdo.url = blob.public_url
     database.add(nueva_lista_de_acuerdo)
-    database.commit()
+    await database.commit()
 
     # Si la hubo, esta debe cambiar a estatus "B" (eliminada)
     if anterior_lista_de_acuerdo is not None:
         anterior_lista_de_acuerdo.estatus = "B"
         database.add(anterior_lista_de_acuerdo)
-        database.commit()
+        await database.commit()
+
+    # Las siguientes lecturas del usuario van al primario, así ve la lista de acuerdos aunque la réplica vaya atrasada
+    await write_marks.mark(current_user.email)
+
+    # Volver a consultar para tener las columnas que define la base de datos, como creado
+    nueva_lista_de_acuerdo = await database.get(
+        ListaDeAcuerdo,
+        nueva_lista_de_acuerdo.id,
+        options=ListaDeAcuerdo.load_options(),
+        populate_existing=True,
+    )
 
     # Entregar
     return OneListaDeAcuerdoOut(
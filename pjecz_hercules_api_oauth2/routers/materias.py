@@ -4,50 +4,101 @@ Materias
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.conditional_requests import not_modified, page_validators, record_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
 from ..dependencies.safe_string import safe_clave
+from ..dependencies.sparse_fieldsets import (
+    page_load_options,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.materias import Materia
 from ..models.permisos import Permiso
 from ..schemas.materias import MateriaOut, OneMateriaOut
 from ..schemas.usuarios import UsuarioInDB
 
-materias = APIRouter(prefix="/api/v5/materias", tags=["materias"])
+materias = APIRouter(prefix="/api/v5/materias", tags=["materias"], route_class=FastJSONRoute)
 
 
 @materias.get("/{clave}", response_model=OneMateriaOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     clave: str,
+    fields: str = "",
 ):
     """Detalle de un materia a partir de su clave"""
     if current_user.permissions.get("MATERIAS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    campos = parse_fields(MateriaOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["MATERIAS"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
     try:
         clave = safe_clave(clave)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave de la materia")
     try:
-        materia = database.query(Materia).filter(Materia.clave == clave).one()
+        materia = (
+            await database.execute(
+                select(Materia).options(*record_load_options(Materia, campos)).filter(Materia.clave == clave)
+            )
+        ).scalar_one()
     except (MultipleResultsFound, NoResultFound):
         return OneMateriaOut(success=False, message="No existe esa materia")
     if materia.estatus != "A":
         return OneMateriaOut(success=False, message="No es activa esa materia, está eliminada")
-    return OneMateriaOut(success=True, message="Detalle de un materia", data=MateriaOut.model_validate(materia))
+    validadores = record_validators(request, materia)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    return await cache_response(
+        cache_key,
+        validadores,
+        sparse_one_schema(OneMateriaOut, campos)(
+            success=True, message="Detalle de un materia", data=sparse_schema(MateriaOut, campos).model_validate(materia)
+        ),
+    )
 
 
 @materias.get("", response_model=CustomPage[MateriaOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    fields: str = "",
 ):
     """Paginado de materias"""
     if current_user.permissions.get("MATERIAS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(database.query(Materia).filter_by(estatus="A").order_by(Materia.clave))
+    campos = parse_fields(MateriaOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["MATERIAS"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(Materia).filter_by(estatus="A")
+    validadores = await page_validators(request, database, consulta, Materia)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Materia.clave]
+    pagina = await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(MateriaOut, campos), opciones=page_load_options(Materia, campos, orden)
+    )
+    return await cache_response(cache_key, validadores, pagina)
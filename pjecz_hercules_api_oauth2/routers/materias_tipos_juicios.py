@@ -4,36 +4,73 @@ Materias Tipos de Juicios
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import false, select
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import get_catalogo
+from ..dependencies.conditional_requests import not_modified, page_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
 from ..dependencies.safe_string import safe_clave
-from ..models.materias import Materia
+from ..dependencies.sparse_fieldsets import page_load_options, parse_fields, sparse_page
 from ..models.materias_tipos_juicios import MateriaTipoJuicio
 from ..models.permisos import Permiso
 from ..schemas.materias_tipos_juicios import MateriaTipoJuicioOut
 from ..schemas.usuarios import UsuarioInDB
 
-materias_tipos_juicios = APIRouter(prefix="/api/v5/materias_tipos_juicios", tags=["materias"])
+materias_tipos_juicios = APIRouter(
+    prefix="/api/v5/materias_tipos_juicios", tags=["materias"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute
+)
 
 
 @materias_tipos_juicios.get("", response_model=CustomPage[MateriaTipoJuicioOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     materia_clave: str = "",
+    fields: str = "",
 ):
     """Paginado de materias_tipos_juicios"""
     if current_user.permissions.get("MATERIAS TIPOS JUICIOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(MateriaTipoJuicio)
+    campos = parse_fields(MateriaTipoJuicioOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["MATERIAS TIPOS JUICIOS"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(MateriaTipoJuicio)
     if materia_clave:
         try:
             materia_clave = safe_clave(materia_clave)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válida la clave de la materia")
-        consulta = consulta.join(Materia).filter(Materia.clave == materia_clave).filter(Materia.estatus == "A")
-    return paginate(consulta.filter(MateriaTipoJuicio.estatus == "A").order_by(MateriaTipoJuicio.descripcion))
+        materia = catalogo.materia_activa(materia_clave)
+        if materia is None:
+            consulta = consulta.filter(false())  # No existe o no es activa, la página queda vacía
+        else:
+            consulta = consulta.filter(MateriaTipoJuicio.materia_id == materia.id)
+    consulta = consulta.filter(MateriaTipoJuicio.estatus == "A")
+    validadores = await page_validators(request, database, consulta, MateriaTipoJuicio)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [MateriaTipoJuicio.descripcion, MateriaTipoJuicio.id]
+    return await cache_response(
+        cache_key,
+        validadores,
+        await apaginate_custom_page(
+            database,
+            consulta,
+            orden,
+            tipo=sparse_page(MateriaTipoJuicioOut, campos),
+            opciones=page_load_options(MateriaTipoJuicio, campos, orden),
+        ),
+    )
@@ -0,0 +1,53 @@
+"""
+Métricas
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..dependencies.authentications import get_current_active_user, usuarios_cache, versiones_cache
+from ..dependencies.catalogos_loader import registros_cache
+from ..dependencies.database import async_engine, async_replica_engine, engine
+from ..dependencies.database_pool import get_pool_status
+from ..dependencies.fastapi_pagination_custom_page import conteos_cache
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import respuestas_cache
+from ..models.permisos import Permiso
+from ..schemas.metricas import CacheOut, CachesOut, PoolOut, PoolsOut
+from ..schemas.usuarios import UsuarioInDB
+
+metricas = APIRouter(prefix="/api/v5/metricas", tags=["sistema"], route_class=FastJSONRoute)
+
+
+@metricas.get("/pool", response_model=PoolsOut)
+async def pool(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+):
+    """Conexiones en uso, inactivas y de desborde, y tiempos de espera de los pools de la base de datos"""
+    if current_user.permissions.get("USUARIOS", 0) < Permiso.ADMINISTRAR:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    data = [
+        PoolOut(**get_pool_status("asincrono", async_engine.pool)),
+        PoolOut(**get_pool_status("sincrono", engine.pool)),
+    ]
+    if async_replica_engine is not None:
+        data.append(PoolOut(**get_pool_status("replica", async_replica_engine.pool)))
+    return PoolsOut(success=True, message="Estado de los pools de conexiones", data=data)
+
+
+@metricas.get("/caches", response_model=CachesOut)
+async def caches(
+    current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
+):
+    """Aciertos y fallos de las cachés de este proceso, las de dos niveles también los de Redis"""
+    if current_user.permissions.get("USUARIOS", 0) < Permiso.ADMINISTRAR:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    data = [
+        CacheOut(nombre="usuarios", **usuarios_cache.stats()),
+        CacheOut(nombre="versiones", **versiones_cache.stats()),
+        CacheOut(nombre="catalogo", **registros_cache.stats()),
+        CacheOut(nombre="respuestas", **respuestas_cache.stats()),
+        CacheOut(nombre="conteos", **conteos_cache.stats()),
+    ]
+    return CachesOut(success=True, message="Contadores de las cachés", data=data)
@@ -4,26 +4,48 @@ Modulos
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.conditional_requests import not_modified, page_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
+from ..dependencies.sparse_fieldsets import page_load_options, parse_fields, sparse_page
 from ..models.modulos import Modulo
 from ..models.permisos import Permiso
 from ..schemas.modulos import ModuloOut
 from ..schemas.usuarios import UsuarioInDB
 
-modulos = APIRouter(prefix="/api/v5/modulos", tags=["sistema"])
+modulos = APIRouter(prefix="/api/v5/modulos", tags=["sistema"], route_class=FastJSONRoute)
 
 
 @modulos.get("", response_model=CustomPage[ModuloOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    fields: str = "",
 ):
     """Paginado de modulos"""
     if current_user.permissions.get("MODULOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(database.query(Modulo).filter_by(estatus="A").order_by(Modulo.nombre))
+    campos = parse_fields(ModuloOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["MODULOS"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(Modulo).filter_by(estatus="A")
+    validadores = await page_validators(request, database, consulta, Modulo)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Modulo.nombre]
+    pagina = await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(ModuloOut, campos), opciones=page_load_options(Modulo, campos, orden)
+    )
+    return await cache_response(cache_key, validadores, pagina)
@@ -4,34 +4,58 @@ Permisos
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import false, select
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
-from ..models.modulos import Modulo
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import get_catalogo
+from ..dependencies.conditional_requests import page_not_modified
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.sparse_fieldsets import page_load_options, parse_fields, sparse_page
 from ..models.permisos import Permiso
-from ..models.roles import Rol
 from ..schemas.permisos import PermisoOut
 from ..schemas.usuarios import UsuarioInDB
 
-permisos = APIRouter(prefix="/api/v5/permisos", tags=["sistema"])
+permisos = APIRouter(
+    prefix="/api/v5/permisos", tags=["sistema"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute
+)
 
 
 @permisos.get("", response_model=CustomPage[PermisoOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     modulo_id: int | None = None,
     rol_id: int | None = None,
+    fields: str = "",
 ):
     """Paginado de permisos"""
     if current_user.permissions.get("PERMISOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(Permiso)
+    campos = parse_fields(PermisoOut, fields)
+    consulta = select(Permiso)
     if modulo_id:
-        consulta = consulta.join(Modulo).filter(Modulo.id == modulo_id).filter(Modulo.estatus == "A")
+        if catalogo.modulo_activo(modulo_id) is None:
+            consulta = consulta.filter(false())  # No existe o no es activo, la página queda vacía
+        else:
+            consulta = consulta.filter(Permiso.modulo_id == modulo_id)
     if rol_id:
-        consulta = consulta.join(Rol).filter(Rol.id == rol_id).filter(Rol.estatus == "A")
-    return paginate(consulta.filter(Permiso.estatus == "A").order_by(Permiso.id))
+        if catalogo.rol_activo(rol_id) is None:
+            consulta = consulta.filter(false())  # No existe o no es activo, la página queda vacía
+        else:
+            consulta = consulta.filter(Permiso.rol_id == rol_id)
+    consulta = consulta.filter(Permiso.estatus == "A")
+    no_modificado = await page_not_modified(request, response, database, consulta, Permiso)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Permiso.id]
+    return await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(PermisoOut, campos), opciones=page_load_options(Permiso, campos, orden)
+    )
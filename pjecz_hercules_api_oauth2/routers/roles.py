@@ -4,26 +4,48 @@ Roles
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.conditional_requests import not_modified, page_validators
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
+from ..dependencies.response_cache import cache_response, get_cached_response, response_cache_key
+from ..dependencies.sparse_fieldsets import page_load_options, parse_fields, sparse_page
 from ..models.permisos import Permiso
 from ..models.roles import Rol
 from ..schemas.roles import RolOut
 from ..schemas.usuarios import UsuarioInDB
 
-roles = APIRouter(prefix="/api/v5/roles", tags=["sistema"])
+roles = APIRouter(prefix="/api/v5/roles", tags=["sistema"], route_class=FastJSONRoute)
 
 
 @roles.get("", response_model=CustomPage[RolOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    fields: str = "",
 ):
     """Paginado de roles"""
     if current_user.permissions.get("ROLES", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(database.query(Rol).filter_by(estatus="A").order_by(Rol.nombre))
+    campos = parse_fields(RolOut, fields)
+    cache_key = response_cache_key(request, current_user.permissions["ROLES"])
+    guardada = await get_cached_response(request, cache_key)
+    if guardada is not None:
+        return guardada
+    consulta = select(Rol).filter_by(estatus="A")
+    validadores = await page_validators(request, database, consulta, Rol)
+    no_modificado = not_modified(request, response, validadores)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Rol.nombre]
+    pagina = await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(RolOut, campos), opciones=page_load_options(Rol, campos, orden)
+    )
+    return await cache_response(cache_key, validadores, pagina)
@@ -4,56 +4,97 @@ Usuarios
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import false, select
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos import Catalogo
+from ..dependencies.catalogos_loader import get_catalogo
+from ..dependencies.conditional_requests import page_not_modified, record_not_modified
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
 from ..dependencies.safe_string import safe_clave, safe_email
-from ..models.autoridades import Autoridad
+from ..dependencies.sparse_fieldsets import (
+    page_load_options,
+    parse_fields,
+    record_load_options,
+    sparse_one_schema,
+    sparse_page,
+    sparse_schema,
+)
 from ..models.permisos import Permiso
 from ..models.usuarios import Usuario
 from ..schemas.usuarios import OneUsuarioOut, UsuarioInDB, UsuarioOut
 
-usuarios = APIRouter(prefix="/api/v5/usuarios", tags=["sistema"])
+usuarios = APIRouter(
+    prefix="/api/v5/usuarios", tags=["sistema"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute
+)
 
 
 @usuarios.get("/{email}", response_model=OneUsuarioOut)
 async def detalle(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     email: str,
+    fields: str = "",
 ):
     """Detalle de un usuario a partir de su e-mail"""
     if current_user.permissions.get("USUARIOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    campos = parse_fields(UsuarioOut, fields)
     try:
         email = safe_email(email)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válido el e-mail")
-    usuario = database.query(Usuario).filter(Usuario.email == email).first()
+    usuario = (
+        await database.execute(select(Usuario).options(*record_load_options(Usuario, campos)).filter(Usuario.email == email))
+    ).scalar()
     if usuario is None:
         return OneUsuarioOut(success=False, message="No existe ese usuario")
     if usuario.estatus != "A":
         return OneUsuarioOut(success=False, message="No es activo ese usuario, está eliminado")
-    return OneUsuarioOut(success=True, message="Detalle de un usuario", data=UsuarioOut.model_validate(usuario))
+    no_modificado = record_not_modified(request, response, usuario)
+    if no_modificado is not None:
+        return no_modificado
+    return sparse_one_schema(OneUsuarioOut, campos)(
+        success=True, message="Detalle de un usuario", data=sparse_schema(UsuarioOut, campos).model_validate(usuario)
+    )
 
 
 @usuarios.get("", response_model=CustomPage[UsuarioOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
+    catalogo: Annotated[Catalogo, Depends(get_catalogo)],
     autoridad_clave: str = "",
+    fields: str = "",
 ):
     """Paginado de usuarios"""
     if current_user.permissions.get("USUARIOS", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(Usuario)
+    campos = parse_fields(UsuarioOut, fields)
+    consulta = select(Usuario)
     if autoridad_clave:
         try:
-            clave = safe_clave(autoridad_clave)
+            autoridad_clave = safe_clave(autoridad_clave)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válido el e-mail")
-        consulta = consulta.join(Autoridad).filter(Autoridad.clave == clave).filter(Autoridad.estatus == "A")
-    return paginate(consulta.filter(Usuario.estatus == "A").order_by(Usuario.email))
+        autoridad = catalogo.autoridad_activa(autoridad_clave)
+        if autoridad is None:
+            consulta = consulta.filter(false())  # No existe o no es activa, la página queda vacía
+        else:
+            consulta = consulta.filter(Usuario.autoridad_id == autoridad.id)
+    consulta = consulta.filter(Usuario.estatus == "A")
+    no_modificado = await page_not_modified(request, response, database, consulta, Usuario)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [Usuario.email]
+    return await apaginate_custom_page(
+        database, consulta, orden, tipo=sparse_page(UsuarioOut, campos), opciones=page_load_options(Usuario, campos, orden)
+    )
@@ -4,39 +4,64 @@ Usuarios-Roles
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
 from ..dependencies.authentications import get_current_active_user
-from ..dependencies.database import Session, get_db
-from ..dependencies.fastapi_pagination_custom_page import CustomPage
+from ..dependencies.catalogos_loader import get_catalogo
+from ..dependencies.conditional_requests import page_not_modified
+from ..dependencies.database import AsyncSession
+from ..dependencies.database_read import get_db_read
+from ..dependencies.fastapi_pagination_custom_page import CustomPage, apaginate_custom_page
+from ..dependencies.json_response import FastJSONRoute
 from ..dependencies.safe_string import safe_email
+from ..dependencies.sparse_fieldsets import page_load_options, parse_fields, sparse_page
 from ..models.permisos import Permiso
 from ..models.usuarios import Usuario
 from ..models.usuarios_roles import UsuarioRol
 from ..schemas.usuarios import UsuarioInDB
 from ..schemas.usuarios_roles import UsuarioRolOut
 
-usuarios_roles = APIRouter(prefix="/api/v5/usuarios_roles", tags=["sistema"])
+usuarios_roles = APIRouter(
+    prefix="/api/v5/usuarios_roles", tags=["sistema"], dependencies=[Depends(get_catalogo)], route_class=FastJSONRoute
+)
 
 
 @usuarios_roles.get("", response_model=CustomPage[UsuarioRolOut])
 async def paginado(
     current_user: Annotated[UsuarioInDB, Depends(get_current_active_user)],
-    database: Annotated[Session, Depends(get_db)],
+    database: Annotated[AsyncSession, Depends(get_db_read)],
+    request: Request,
+    response: Response,
     rol_id: int | None = None,
     usuario_email: str = "",
+    fields: str = "",
 ):
     """Paginado de usuarios_roles"""
     if current_user.permissions.get("USUARIOS ROLES", 0) < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    consulta = database.query(UsuarioRol)
+    campos = parse_fields(UsuarioRolOut, fields)
+    consulta = select(UsuarioRol)
+    if campos is None or any(campo.startswith("usuario_") for campo in campos):
+        consulta = consulta.options(joinedload(UsuarioRol.usuario))  # Los usuarios no están en el catálogo
     if rol_id is not None:
-        consulta = consulta.filter(Permiso.rol_id == rol_id)
+        consulta = consulta.filter(UsuarioRol.rol_id == rol_id)
     if usuario_email:
         try:
             usuario_email = safe_email(usuario_email)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es válido el e-mail")
         consulta = consulta.join(Usuario).filter(Usuario.email == usuario_email).filter(Usuario.estatus == "A")
-    return paginate(consulta.filter(UsuarioRol.estatus == "A").order_by(UsuarioRol.id))
+    consulta = consulta.filter(UsuarioRol.estatus == "A")
+    no_modificado = await page_not_modified(request, response, database, consulta, UsuarioRol)
+    if no_modificado is not None:
+        return no_modificado
+    orden = [UsuarioRol.id]
+    return await apaginate_custom_page(
+        database,
+        consulta,
+        orden,
+        tipo=sparse_page(UsuarioRolOut, campos),
+        opciones=page_load_options(UsuarioRol, campos, orden),
+    )
@@ -0,0 +1,48 @@
+"""
+Métricas, esquemas de pydantic
+"""
+
+from pydantic import BaseModel
+
+
+class PoolOut(BaseModel):
+    """Esquema para entregar el estado de un pool de conexiones"""
+
+    nombre: str
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    waits: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    timeouts: int = 0
+
+
+class PoolsOut(BaseModel):
+    """Esquema para entregar el estado de los pools de conexiones"""
+
+    success: bool
+    message: str
+    data: list[PoolOut] | None = None
+
+
+class CacheOut(BaseModel):
+    """Esquema para entregar los contadores de una caché, los de Redis sólo en las de dos niveles"""
+
+    nombre: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    redis_hits: int = 0
+    redis_misses: int = 0
+    redis_errors: int = 0
+
+
+class CachesOut(BaseModel):
+    """Esquema para entregar los contadores de las cachés"""
+
+    success: bool
+    message: str
+    data: list[CacheOut] | None = None
@@ -12,6 +12,8 @@ class Token(BaseModel):
     expires_in: int
     token_type: str
     username: str
+    refresh_token: str | None = None
+    refresh_expires_in: int | None = None
 
 
 class UsuarioOut(BaseModel):
@@ -42,6 +44,7 @@ class OneUsuarioOut(BaseModel):
 class UsuarioInDB(UsuarioOut):
     """Usuario en base de datos"""
 
+    id: int
     username: str
     permissions: dict
     hashed_password: str
@@ -0,0 +1,226 @@
+"""
+Unit Tests Authentications
+"""
+
+import unittest
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from pjecz_hercules_api_oauth2.config.settings import get_settings
+from pjecz_hercules_api_oauth2.dependencies.authentications import (
+    decode_token,
+    encode_token,
+    get_current_active_user,
+    get_usuario_with_claims,
+    get_usuario_with_email,
+    invalidate_usuario,
+    invalidate_usuarios,
+    usuarios_cache,
+    versiones_cache,
+)
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine, engine, session_maker
+from pjecz_hercules_api_oauth2.dependencies.exceptions import MyAuthenticationError
+from pjecz_hercules_api_oauth2.main import app  # Para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.modulos import Modulo
+from pjecz_hercules_api_oauth2.models.permisos import Permiso
+from pjecz_hercules_api_oauth2.models.roles import Rol
+from pjecz_hercules_api_oauth2.models.usuarios import Usuario
+from pjecz_hercules_api_oauth2.models.usuarios_roles import UsuarioRol
+from pjecz_hercules_api_oauth2.schemas.usuarios import UsuarioInDB
+from tests import config
+
+
+class TestAuthentications(unittest.TestCase):
+    """Tests Authentications class"""
+
+    def contar_sentencias(self, database, usuario_email: str) -> tuple[list, object]:
+        """Consultar el usuario y entregar las sentencias SQL que se ejecutaron y el usuario"""
+        sentencias = []
+
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            usuario = get_usuario_with_email(database, usuario_email)
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+        return sentencias, usuario
+
+    def test_get_usuario_with_email_statements(self):
+        """Test que la consulta del usuario y sus permisos no dependa de la cantidad de roles"""
+        database = session_maker()
+        try:
+            # El usuario de las pruebas, con su autoridad y distrito, y los permisos agrupados
+            sentencias, usuario = self.contar_sentencias(database, config["username"])
+            self.assertEqual(len(sentencias), 2)
+            self.assertEqual(usuario.email, config["username"])
+            self.assertEqual(len(usuario.permissions) > 0, True)
+
+            # Usuarios con 1, 3 y 6 roles, cada rol con permisos en dos módulos, se descartan al terminar
+            autoridad_id = database.execute(select(Usuario.autoridad_id).filter_by(email=config["username"])).scalar_one()
+            for cantidad in (1, 3, 6):
+                with self.subTest(roles=cantidad):
+                    nuevo = Usuario(
+                        autoridad_id=autoridad_id,
+                        email=f"roles{cantidad}@pruebas.gob.mx",
+                        nombres="Pruebas",
+                        apellido_paterno="Roles",
+                        apellido_materno=str(cantidad),
+                        puesto="Pruebas",
+                        contrasena="",
+                    )
+                    database.add(nuevo)
+                    for numero in range(cantidad):
+                        rol = Rol(nombre=f"PRUEBAS {cantidad} ROL {numero}")
+                        database.add(UsuarioRol(usuario=nuevo, rol=rol, descripcion=f"PRUEBAS {cantidad} {numero}"))
+                        for letra in ("A", "B"):
+                            modulo = Modulo(
+                                nombre=f"PRUEBAS {cantidad} {numero} {letra}",
+                                nombre_corto="Pruebas",
+                                icono="",
+                                ruta="",
+                            )
+                            database.add(
+                                Permiso(rol=rol, modulo=modulo, nombre=f"PRUEBAS {cantidad} {numero} {letra}", nivel=1)
+                            )
+                    database.flush()
+                    sentencias, usuario = self.contar_sentencias(database, nuevo.email)
+                    self.assertEqual(len(sentencias), 2, sentencias)
+                    self.assertEqual(len(usuario.permissions), 2 * cantidad)
+        finally:
+            database.rollback()
+            database.close()
+
+    def test_token_con_permisos_caduca_al_cambiar_roles_permisos_o_modulos(self):
+        """Test el token con los permisos es válido hasta que cambia el rol, el permiso o el módulo del usuario"""
+        settings = get_settings().model_copy(update={"TOKEN_WITH_PERMISSIONS": True})
+        database = session_maker()
+        try:
+            # Un usuario con un rol con un permiso en un módulo, se descartan al terminar
+            autoridad_id = database.execute(select(Usuario.autoridad_id).filter_by(email=config["username"])).scalar_one()
+            nuevo = Usuario(
+                autoridad_id=autoridad_id,
+                email="version@pruebas.gob.mx",
+                nombres="Pruebas",
+                apellido_paterno="Version",
+                apellido_materno="",
+                puesto="Pruebas",
+                contrasena="",
+            )
+            rol = Rol(nombre="PRUEBAS VERSION")
+            modulo = Modulo(nombre="PRUEBAS VERSION", nombre_corto="Pruebas", icono="", ruta="")
+            permiso = Permiso(rol=rol, modulo=modulo, nombre="PRUEBAS VERSION", nivel=1)
+            database.add_all([nuevo, UsuarioRol(usuario=nuevo, rol=rol, descripcion="PRUEBAS VERSION"), permiso])
+            database.flush()
+            payload = decode_token(encode_token(settings, get_usuario_with_email(database, nuevo.email), database), settings)
+            self.assertEqual(get_usuario_with_claims(database, payload).email, nuevo.email)
+
+            # Se cambia con UPDATE, como desde otro sistema, y sin la versión en la caché, como al caducar
+            for modelo, registro_id in ((Rol, rol.id), (Permiso, permiso.id), (Modulo, modulo.id)):
+                with self.subTest(modelo=modelo.__name__):
+                    cambio = database.begin_nested()
+                    database.execute(
+                        update(modelo).where(modelo.id == registro_id).values(modificado=modelo.modificado + timedelta(days=1))
+                    )
+                    versiones_cache.clear()
+                    with self.assertRaises(MyAuthenticationError):
+                        get_usuario_with_claims(database, payload)
+                    cambio.rollback()
+                    versiones_cache.clear()
+                    self.assertEqual(get_usuario_with_claims(database, payload).email, nuevo.email)
+        finally:
+            database.rollback()
+            database.close()
+            versiones_cache.clear()
+
+    def test_pool_agotado_entrega_503(self):
+        """Test que si se agota el pool al autentificar se entregue 503 con Retry-After y no 401"""
+        async_engine.sync_engine.dispose(close=False)
+        with TestClient(app) as client:
+            response = client.post("/token", data={"username": config["username"], "password": config["password"]})
+            self.assertEqual(response.status_code, 200)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Sin el usuario en la caché se consulta la base de datos, que no tiene conexiones disponibles
+            usuarios_cache.clear_nowait()
+            with patch(
+                "pjecz_hercules_api_oauth2.dependencies.authentications.get_usuario_with_email",
+                side_effect=PoolTimeoutError("QueuePool limit reached"),
+            ):
+                response = client.get("/api/v5/roles", headers=headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual("retry-after" in response.headers, True)
+
+
+class TestUsuariosCache(unittest.IsolatedAsyncioTestCase):
+    """Tests de la caché de los usuarios autentificados, sin la base de datos"""
+
+    async def asyncSetUp(self):
+        self.settings = get_settings().model_copy(update={"TOKEN_WITH_PERMISSIONS": False})
+        self.usuario = UsuarioInDB(
+            id=1,
+            email="cache@pruebas.gob.mx",
+            nombres="Pruebas",
+            apellido_paterno="Cache",
+            apellido_materno="",
+            puesto="Pruebas",
+            autoridad_clave="ND",
+            autoridad_descripcion="No Definido",
+            autoridad_descripcion_corta="No Definido",
+            distrito_clave="ND",
+            distrito_nombre="No Definido",
+            distrito_nombre_corto="No Definido",
+            username="cache@pruebas.gob.mx",
+            permissions={"USUARIOS": 1},
+            hashed_password="xxx",
+            disabled=False,
+        )
+        self.token = encode_token(self.settings, self.usuario)
+        self.consultar = AsyncMock(return_value=self.usuario)
+        self.patcher = patch("pjecz_hercules_api_oauth2.dependencies.authentications.run_in_short_session", self.consultar)
+        self.patcher.start()
+        await usuarios_cache.clear()
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+        await usuarios_cache.clear()
+
+    async def test_acierto(self):
+        """Test el mismo token se consulta una sola vez, sin el hash de la contraseña"""
+        aciertos = usuarios_cache.stats()["hits"]
+        for _ in range(3):
+            usuario = await get_current_active_user(self.settings, self.token)
+        self.assertEqual(self.consultar.await_count, 1)
+        self.assertEqual(usuario.email, self.usuario.email)
+        self.assertEqual(usuario.hashed_password, "")
+        self.assertEqual(usuarios_cache.stats()["hits"], aciertos + 2)
+
+    async def test_invalidar_usuario(self):
+        """Test al invalidar al usuario se consulta de nuevo"""
+        await get_current_active_user(self.settings, self.token)
+        self.assertEqual(invalidate_usuario(self.usuario.email), 1)
+        await get_current_active_user(self.settings, self.token)
+        self.assertEqual(self.consultar.await_count, 2)
+
+        # Invalidar a otro usuario no lo elimina
+        self.assertEqual(invalidate_usuario("otro@pruebas.gob.mx"), 0)
+        await get_current_active_user(self.settings, self.token)
+        self.assertEqual(self.consultar.await_count, 2)
+
+    async def test_invalidar_usuarios(self):
+        """Test al cambiar roles o permisos se vacían las cachés de los usuarios y de las versiones"""
+        await get_current_active_user(self.settings, self.token)
+        versiones_cache.set(self.usuario.id, 1)
+        invalidate_usuarios()
+        self.assertIsNone(versiones_cache.get(self.usuario.id))
+        await get_current_active_user(self.settings, self.token)
+        self.assertEqual(self.consultar.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
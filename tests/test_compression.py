@@ -0,0 +1,179 @@
+"""
+Unit Tests Compression
+"""
+
+import unittest
+import zlib
+
+import requests
+
+from pjecz_hercules_api_oauth2.dependencies.compression import CompressionMiddleware, is_compressible, negotiate_encoding
+from tests import config, oauth2_token
+
+
+class TestCompression(unittest.TestCase):
+    """Tests Compression class"""
+
+    def get(self, ruta: str, accept_encoding: str, params: dict) -> requests.Response:
+        """Consultar la ruta con Accept-Encoding"""
+        try:
+            return requests.get(
+                url=f"{config['api_base_url']}/api/v5/{ruta}",
+                headers={"Authorization": f"Bearer {oauth2_token}", "Accept-Encoding": accept_encoding},
+                params=params,
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+
+    def test_gzip(self):
+        """Test una página grande se comprime con gzip y requests la descomprime"""
+        response = self.get("sentencias", "gzip", {"limit": 100})
+        self.assertEqual(response.status_code, 200)
+        if len(response.content) < 1000:
+            self.skipTest("La página es menor al tamaño mínimo")
+        self.assertEqual(response.headers.get("content-encoding"), "gzip")
+        self.assertIn("Accept-Encoding", response.headers.get("vary", ""))
+        self.assertEqual(response.json()["success"], True)
+
+    def test_sin_accept_encoding(self):
+        """Test sin aceptar compresión se entrega tal cual"""
+        response = self.get("sentencias", "identity", {"limit": 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(int(response.headers["content-length"]), len(response.content))
+
+    def test_pequena(self):
+        """Test una respuesta menor al tamaño mínimo no se comprime"""
+        response = self.get("sentencias", "gzip", {"limit": 1, "fields": "id"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("content-encoding", response.headers)
+
+
+class TestNegotiateEncoding(unittest.TestCase):
+    """Tests negotiate_encoding"""
+
+    disponibles = ["zstd", "br", "gzip"]
+
+    def test_preferencia_del_servidor(self):
+        """Test en empate gana el primero de los disponibles"""
+        self.assertEqual(negotiate_encoding("gzip, br, zstd", self.disponibles), "zstd")
+        self.assertEqual(negotiate_encoding("gzip, deflate", self.disponibles), "gzip")
+
+    def test_q(self):
+        """Test gana el de mayor q y q=0 lo rechaza"""
+        self.assertEqual(negotiate_encoding("zstd;q=0.5, gzip;q=0.9", self.disponibles), "gzip")
+        self.assertEqual(negotiate_encoding("zstd;q=0, br;q=0", self.disponibles), None)
+        self.assertEqual(negotiate_encoding("gzip;q=no", self.disponibles), None)
+
+    def test_asterisco(self):
+        """Test * aplica a los que no se mencionan"""
+        self.assertEqual(negotiate_encoding("*", self.disponibles), "zstd")
+        self.assertEqual(negotiate_encoding("*;q=0.1, gzip", self.disponibles), "gzip")
+        self.assertEqual(negotiate_encoding("zstd;q=0, *", self.disponibles), "br")
+        self.assertEqual(negotiate_encoding("*;q=0", self.disponibles), None)
+
+    def test_sin_accept_encoding(self):
+        """Test sin Accept-Encoding o con identity no se comprime"""
+        self.assertEqual(negotiate_encoding("", self.disponibles), None)
+        self.assertEqual(negotiate_encoding("identity", self.disponibles), None)
+
+
+class TestIsCompressible(unittest.TestCase):
+    """Tests is_compressible"""
+
+    def test_texto(self):
+        """Test los tipos de texto se comprimen"""
+        for tipo in ("application/json", "application/x-ndjson", "text/csv; charset=utf-8", "application/problem+json"):
+            self.assertTrue(is_compressible(tipo), tipo)
+
+    def test_ya_comprimidos(self):
+        """Test los ya comprimidos como PDF y Parquet se entregan tal cual"""
+        for tipo in ("application/pdf", "application/vnd.apache.parquet", "application/octet-stream", ""):
+            self.assertFalse(is_compressible(tipo), tipo)
+
+
+def aplicacion(status: int, headers: list[tuple[str, str]], partes: list[bytes]):
+    """Aplicación ASGI que entrega las partes con more_body en todas menos la última"""
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(k.encode(), v.encode()) for k, v in headers]})
+        for numero, parte in enumerate(partes, start=1):
+            await send({"type": "http.response.body", "body": parte, "more_body": numero < len(partes)})
+
+    return app
+
+
+class TestCompressionMiddleware(unittest.IsolatedAsyncioTestCase):
+    """Tests CompressionMiddleware con una aplicación ASGI sin base de datos"""
+
+    async def llamar(self, app, accept_encoding: str = "gzip") -> tuple[dict, list[bytes]]:
+        """Llamar al middleware y entregar los encabezados del inicio y las partes enviadas"""
+        mensajes = []
+
+        async def send(mensaje):
+            mensajes.append(mensaje)
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+        await CompressionMiddleware(app, minimum_size=100)(scope, receive, send)
+        self.assertEqual(mensajes[0]["type"], "http.response.start")
+        encabezados = {k.decode(): v.decode() for k, v in mensajes[0]["headers"]}
+        return encabezados, [mensaje["body"] for mensaje in mensajes[1:]]
+
+    async def test_comprime_con_etag_debil(self):
+        """Test una respuesta JSON completa se comprime y su ETag pasa a débil"""
+        contenido = b'{"success": true}' * 100
+        app = aplicacion(200, [("content-type", "application/json"), ("etag", '"abc"')], [contenido])
+        encabezados, partes = await self.llamar(app)
+        self.assertEqual(encabezados["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", encabezados["vary"])
+        self.assertEqual(encabezados["etag"], 'W/"abc"')
+        self.assertEqual(int(encabezados["content-length"]), len(partes[0]))
+        self.assertEqual(zlib.decompress(partes[0], 16 + zlib.MAX_WBITS), contenido)
+
+    async def test_304_con_etag_debil(self):
+        """Test el 304 lleva el mismo ETag débil que el 200 con la codificación negociada"""
+        encabezados, _ = await self.llamar(aplicacion(304, [("etag", '"abc"')], [b""]))
+        self.assertEqual(encabezados["etag"], 'W/"abc"')
+        self.assertNotIn("content-encoding", encabezados)
+
+        # Sin compresión negociada el ETag no cambia
+        encabezados, _ = await self.llamar(aplicacion(304, [("etag", '"abc"')], [b""]), "identity")
+        self.assertEqual(encabezados["etag"], '"abc"')
+
+    async def test_flujo(self):
+        """Test en flujo se comprime por partes y cada parte se puede descomprimir al recibirla"""
+        partes = [b'{"id": 1}\n', b'{"id": 2}\n', b'{"id": 3}\n']
+        app = aplicacion(200, [("content-type", "application/x-ndjson"), ("content-length", "30")], partes)
+        encabezados, recibidas = await self.llamar(app)
+        self.assertEqual(encabezados["content-encoding"], "gzip")
+        self.assertNotIn("content-length", encabezados)
+        self.assertEqual(len(recibidas), len(partes))
+        descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for parte, recibida in zip(partes, recibidas):
+            self.assertEqual(descompresor.decompress(recibida), parte)
+
+    async def test_pdf_tal_cual(self):
+        """Test un PDF se entrega tal cual aunque el cliente acepte gzip"""
+        contenido = b"%PDF-1.7" + b"0" * 1000
+        app = aplicacion(200, [("content-type", "application/pdf"), ("etag", '"abc"')], [contenido])
+        encabezados, partes = await self.llamar(app)
+        self.assertNotIn("content-encoding", encabezados)
+        self.assertEqual(partes, [contenido])
+
+    async def test_pequena(self):
+        """Test una respuesta completa menor al tamaño mínimo se entrega tal cual"""
+        app = aplicacion(200, [("content-type", "application/json"), ("etag", '"abc"')], [b"{}"])
+        encabezados, partes = await self.llamar(app)
+        self.assertNotIn("content-encoding", encabezados)
+        self.assertEqual(partes, [b"{}"])
+
+        # Con el mismo ETag débil que su 304, que no puede saber si se comprimiría
+        self.assertEqual(encabezados["etag"], 'W/"abc"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit Tests Conditional Requests
+"""
+
+import unittest
+from datetime import timedelta
+
+import requests
+from sqlalchemy import select, update
+
+from pjecz_hercules_api_oauth2.dependencies.database import session_maker
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.sentencias import Sentencia
+from tests import config, oauth2_token
+
+
+class TestConditionalRequests(unittest.TestCase):
+    """Tests Conditional Requests class"""
+
+    def consultar(self, url: str, headers: dict = None) -> requests.Response:
+        """Consultar con el token y los encabezados"""
+        try:
+            return requests.get(
+                url=f"{config['api_base_url']}{url}",
+                headers={"Authorization": f"Bearer {oauth2_token}", **(headers or {})},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+
+    def test_if_none_match(self):
+        """Test con el ETag de la respuesta se recibe 304 sin contenido"""
+        for url in ("/api/v5/roles", "/api/v5/modulos?limit=5", f"/api/v5/usuarios/{config['username']}"):
+            with self.subTest(url=url):
+                response = self.consultar(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual("etag" in response.headers, True)
+                self.assertEqual("last-modified" in response.headers, True)
+
+                # Con el mismo ETag no se entrega el contenido
+                response_304 = self.consultar(url, {"If-None-Match": response.headers["etag"]})
+                self.assertEqual(response_304.status_code, 304)
+                self.assertEqual(response_304.content, b"")
+                self.assertEqual(response_304.headers["etag"], response.headers["etag"])
+
+                # Con otro ETag se entrega el contenido
+                response_200 = self.consultar(url, {"If-None-Match": '"otro"'})
+                self.assertEqual(response_200.status_code, 200)
+
+    def test_if_modified_since(self):
+        """Test con la fecha de la última modificación se recibe 304"""
+        response = self.consultar("/api/v5/roles")
+        self.assertEqual(response.status_code, 200)
+        response_304 = self.consultar("/api/v5/roles", {"If-Modified-Since": response.headers["last-modified"]})
+        self.assertEqual(response_304.status_code, 304)
+        response_200 = self.consultar("/api/v5/roles", {"If-Modified-Since": "Mon, 01 Jan 1990 00:00:00 GMT"})
+        self.assertEqual(response_200.status_code, 200)
+
+    def test_parametros_cambian_etag(self):
+        """Test otra página tiene otro ETag"""
+        primera = self.consultar("/api/v5/modulos?limit=1&offset=0")
+        segunda = self.consultar("/api/v5/modulos?limit=1&offset=1")
+        self.assertNotEqual(primera.headers["etag"], segunda.headers["etag"])
+
+    def test_sin_validadores_con_cursor_o_sin_total(self):
+        """Test con cursor o sin el total exacto el paginado no entrega validadores"""
+        primera = self.consultar("/api/v5/modulos?limit=1")
+        self.assertEqual("etag" in primera.headers, True)
+        cursor = primera.json()["next_cursor"]
+        for url in (f"/api/v5/modulos?limit=1&cursor={cursor}", "/api/v5/modulos?limit=1&total=none"):
+            with self.subTest(url=url):
+                response = self.consultar(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual("etag" in response.headers, False)
+                self.assertEqual("last-modified" in response.headers, False)
+
+    def test_etag_del_paginado_cambia_al_modificar(self):
+        """Test el ETag del paginado cambia en cuanto se modifica un registro, aunque sea desde otro sistema"""
+        url = "/api/v5/sentencias?limit=1"
+        antes = self.consultar(url)
+        self.assertEqual(antes.status_code, 200)
+        with session_maker() as database:
+            sentencia_id, modificado = database.execute(
+                select(Sentencia.id, Sentencia.modificado).filter_by(estatus="A").order_by(Sentencia.id.desc()).limit(1)
+            ).one()
+            try:
+                database.execute(
+                    update(Sentencia).where(Sentencia.id == sentencia_id).values(modificado=modificado + timedelta(seconds=1))
+                )
+                database.commit()
+                response = self.consultar(url, {"If-None-Match": antes.headers["etag"]})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers["etag"], antes.headers["etag"])
+            finally:
+                database.execute(update(Sentencia).where(Sentencia.id == sentencia_id).values(modificado=modificado))
+                database.commit()
+
+
+if __name__ == "__main__":
+    unittest.main()
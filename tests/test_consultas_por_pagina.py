@@ -0,0 +1,69 @@
+"""
+Unit Tests Consultas por Página
+
+Valida que la cantidad de sentencias SQL por página no dependa de la cantidad de renglones.
+"""
+
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, event
+
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine
+from pjecz_hercules_api_oauth2.main import app
+from tests import config
+
+# Sentencias SQL máximas por página: el conteo y los renglones con sus relaciones
+MAX_SENTENCIAS = 2
+
+RUTAS = [
+    "/api/v5/autoridades",
+    "/api/v5/edictos",
+    "/api/v5/listas_de_acuerdos",
+    "/api/v5/materias_tipos_juicios",
+    "/api/v5/permisos",
+    "/api/v5/sentencias",
+    "/api/v5/usuarios",
+    "/api/v5/usuarios_roles",
+]
+
+
+class TestConsultasPorPagina(unittest.TestCase):
+    """Tests Consultas por Pagina class"""
+
+    def setUp(self):
+        """Cada TestClient tiene su propio ciclo de eventos, no se pueden reusar las conexiones asíncronas de otro"""
+        async_engine.sync_engine.dispose(close=False)
+
+    def test_paginados(self):
+        """Test que cada paginado de 100 renglones no rebase MAX_SENTENCIAS"""
+
+        # Contar las sentencias SQL que se ejecutan en todos los engines
+        sentencias = []
+
+        def contar_sentencias(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        with TestClient(app) as client:
+            # Hacer el login en la aplicación, no en el servidor
+            response = client.post("/token", data={"username": config["username"], "password": config["password"]})
+            self.assertEqual(response.status_code, 200)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Consultar una vez para que el usuario quede en la caché y no se cuenten sus consultas
+            client.get(RUTAS[0], headers=headers, params={"limit": 1})
+
+            for ruta in RUTAS:
+                with self.subTest(ruta=ruta):
+                    sentencias.clear()
+                    event.listen(Engine, "before_cursor_execute", contar_sentencias)
+                    try:
+                        response = client.get(ruta, headers=headers, params={"limit": 100})
+                    finally:
+                        event.remove(Engine, "before_cursor_execute", contar_sentencias)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertLessEqual(len(sentencias), MAX_SENTENCIAS, sentencias)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,12 @@ Unit tests for edictos
 import unittest
 
 import requests
+from sqlalchemy import delete, insert, select
 
+from pjecz_hercules_api_oauth2.dependencies.database import session_maker
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.autoridades import Autoridad
+from pjecz_hercules_api_oauth2.models.edictos import Edicto
 from tests import config, oauth2_token
 
 
@@ -54,6 +59,40 @@ class TestEdictos(unittest.TestCase):
             self.assertEqual("rag_fue_sintetizado_tiempo" in item, True)
             self.assertEqual("rag_fue_categorizado_tiempo" in item, True)
 
+    def test_get_edictos_de_autoridad_nueva(self):
+        """Test filtrar por una autoridad que no está en el catálogo de la API, creada desde otro sistema"""
+        with session_maker() as database:
+            # Copiar una autoridad y uno de sus edictos, con INSERT, así la API no se entera
+            autoridad = database.execute(select(Autoridad.__table__).filter_by(estatus="A").limit(1)).mappings().first()
+            edicto = database.execute(select(Edicto.__table__).filter_by(estatus="A").limit(1)).mappings().first()
+            if autoridad is None or edicto is None:
+                self.skipTest("No hay autoridades o edictos")
+            columnas = {clave: valor for clave, valor in autoridad.items() if clave != "id"}
+            autoridad_id = database.execute(
+                insert(Autoridad).values(**{**columnas, "clave": "PRUEBA-NUEVA"}).returning(Autoridad.id)
+            ).scalar_one()
+            columnas = {clave: valor for clave, valor in edicto.items() if clave != "id"}
+            edicto_id = database.execute(
+                insert(Edicto).values(**{**columnas, "autoridad_id": autoridad_id}).returning(Edicto.id)
+            ).scalar_one()
+            database.commit()
+            try:
+                response = requests.get(
+                    url=f"{config['api_base_url']}/api/v5/edictos",
+                    headers={"Authorization": f"Bearer {oauth2_token}"},
+                    params={"autoridad_clave": "PRUEBA-NUEVA"},
+                    timeout=config["timeout"],
+                )
+                self.assertEqual(response.status_code, 200)
+                contenido = response.json()
+                self.assertEqual(contenido["success"], True)
+                self.assertEqual([item["id"] for item in contenido["data"]], [edicto_id])
+                self.assertEqual(contenido["data"][0]["autoridad_clave"], "PRUEBA-NUEVA")
+            finally:
+                database.execute(delete(Edicto).where(Edicto.id == edicto_id))
+                database.execute(delete(Autoridad).where(Autoridad.id == autoridad_id))
+                database.commit()
+
 
 if __name__ == "__main__":
     unittest.main()
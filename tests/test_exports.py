@@ -0,0 +1,116 @@
+"""
+Unit Tests Exports
+"""
+
+import csv
+import io
+import json
+import unittest
+
+import requests
+
+from tests import config, oauth2_token
+
+
+class TestExports(unittest.TestCase):
+    """Tests Exports class"""
+
+    def test_export_ndjson(self):
+        """Test exportar en NDJSON, un registro por línea, ordenados como en el paginado"""
+        for ruta in ("edictos", "listas_de_acuerdos", "sentencias"):
+            with self.subTest(ruta=ruta):
+                try:
+                    response = requests.get(
+                        url=f"{config['api_base_url']}/api/v5/{ruta}/export",
+                        headers={"Authorization": f"Bearer {oauth2_token}"},
+                        timeout=config["timeout"],
+                        stream=True,
+                    )
+                except requests.exceptions.RequestException as error:
+                    self.fail(error)
+
+                # Sin el nivel de EXPORT_PERMISSION_LEVEL se recibe 403
+                if response.status_code == 403:
+                    continue
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+                self.assertEqual(response.headers["content-disposition"], f'attachment; filename="{ruta}.ndjson"')
+
+                # Validar que cada línea sea un registro JSON
+                ids = []
+                for linea in response.iter_lines():
+                    item = json.loads(linea)
+                    self.assertEqual("id" in item, True)
+                    self.assertEqual("autoridad_clave" in item, True)
+                    ids.append(item["id"])
+                self.assertEqual(len(ids), len(set(ids)))
+
+    def test_export_ndjson_filtro_vacio(self):
+        """Test exportar con un rango de fechas sin registros entrega un contenido vacío"""
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/edictos/export",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params={"creado_desde": "1900-01-01", "creado_hasta": "1900-01-02"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        if response.status_code != 403:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"")
+
+    def test_export_csv(self):
+        """Test exportar en CSV, el encabezado tiene las columnas del paginado"""
+        for ruta in ("listas_de_acuerdos", "sentencias"):
+            with self.subTest(ruta=ruta):
+                try:
+                    response = requests.get(
+                        url=f"{config['api_base_url']}/api/v5/{ruta}/export/csv",
+                        headers={"Authorization": f"Bearer {oauth2_token}"},
+                        timeout=config["timeout"],
+                    )
+                except requests.exceptions.RequestException as error:
+                    self.fail(error)
+                if response.status_code == 403:
+                    continue
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers["content-type"], "text/csv; charset=utf-8")
+                renglones = list(csv.DictReader(io.StringIO(response.content.decode("utf-8"))))
+                for item in renglones:
+                    self.assertEqual("id" in item, True)
+                    self.assertEqual("distrito_clave" in item, True)
+                    self.assertEqual("autoridad_clave" in item, True)
+
+    def test_export_parquet(self):
+        """Test exportar en Parquet, sin pyarrow en la API se recibe 501"""
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/sentencias/export/parquet",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        if response.status_code in (403, 501):
+            return
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/vnd.apache.parquet")
+        self.assertEqual(response.content[:4], b"PAR1")
+        self.assertEqual(response.content[-4:], b"PAR1")
+
+    def test_export_formato_no_valido(self):
+        """Test exportar en un formato que no existe se recibe 422"""
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/sentencias/export/xml",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
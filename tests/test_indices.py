@@ -0,0 +1,102 @@
+"""
+Unit Tests Índices
+
+Consulta los paginados dentro de la aplicación, captura la consulta de cada página
+y valida con EXPLAIN que la tabla principal se lea con un índice y no recorriéndola toda.
+Necesita una base de datos PostgreSQL con datos y con las migraciones aplicadas: alembic upgrade head
+"""
+
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine, session_maker
+from pjecz_hercules_api_oauth2.dependencies.fastapi_pagination_custom_page import Explain
+from pjecz_hercules_api_oauth2.main import app
+from tests import config
+
+# Tipos de nodo del plan que leen con un índice
+LECTURAS_CON_INDICE = ("Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+
+# Ruta, parámetros y tabla principal de cada paginado
+PAGINADOS = [
+    ("/api/v5/edictos", {}, "edictos"),
+    ("/api/v5/edictos", {"autoridad_clave": config["autoridades_claves"][0]}, "edictos"),
+    ("/api/v5/edictos", {"creado_desde": "2025-01-01"}, "edictos"),
+    ("/api/v5/listas_de_acuerdos", {}, "listas_de_acuerdos"),
+    ("/api/v5/listas_de_acuerdos", {"autoridad_clave": config["autoridades_claves"][0]}, "listas_de_acuerdos"),
+    ("/api/v5/listas_de_acuerdos", {"fecha_desde": "2025-01-01"}, "listas_de_acuerdos"),
+    ("/api/v5/permisos", {"rol_id": 1}, "permisos"),
+    ("/api/v5/sentencias", {}, "sentencias"),
+    ("/api/v5/sentencias", {"autoridad_clave": config["autoridades_claves"][0]}, "sentencias"),
+    ("/api/v5/sentencias", {"creado_desde": "2025-01-01"}, "sentencias"),
+    ("/api/v5/usuarios", {"autoridad_clave": config["autoridades_claves"][0]}, "usuarios"),
+    ("/api/v5/usuarios_roles", {"rol_id": 1}, "usuarios_roles"),
+]
+
+
+def nodos_de_la_tabla(plan: dict, tabla: str) -> list[dict]:
+    """Entregar los nodos del plan que leen la tabla"""
+    nodos = []
+    if plan.get("Relation Name") == tabla:
+        nodos.append(plan)
+    for subplan in plan.get("Plans", []):
+        nodos.extend(nodos_de_la_tabla(subplan, tabla))
+    return nodos
+
+
+class TestIndices(unittest.TestCase):
+    """Tests Indices class"""
+
+    def setUp(self):
+        """Cada TestClient tiene su propio ciclo de eventos, no se pueden reusar las conexiones asíncronas de otro"""
+        async_engine.sync_engine.dispose(close=False)
+
+    def test_paginados_usan_indices(self):
+        """Test que la consulta de cada página lea la tabla principal con un índice"""
+
+        # Capturar las consultas de las páginas, son las que tienen LIMIT
+        consultas = []
+
+        def capturar_consulta(orm_execute_state):
+            if orm_execute_state.is_select and " LIMIT " in str(orm_execute_state.statement):
+                consultas.append(orm_execute_state.statement)
+
+        event.listen(Session, "do_orm_execute", capturar_consulta)
+        try:
+            with TestClient(app) as client:
+                response = client.post("/token", data={"username": config["username"], "password": config["password"]})
+                self.assertEqual(response.status_code, 200)
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+                paginas = []
+                for ruta, params, tabla in PAGINADOS:
+                    consultas.clear()
+                    response = client.get(ruta, headers=headers, params=params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(consultas), 1)
+                    paginas.append((ruta, params, tabla, consultas[0]))
+        finally:
+            event.remove(Session, "do_orm_execute", capturar_consulta)
+
+        # Con pocos datos el planificador prefiere recorrer la tabla, se desactiva para validar que hay un índice que sirve
+        database = session_maker()
+        try:
+            database.execute(text("SET enable_seqscan = off"))
+            for ruta, params, tabla, consulta in paginas:
+                with self.subTest(ruta=ruta, params=params):
+                    plan = database.scalar(Explain(consulta))
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    nodos = nodos_de_la_tabla(plan[0]["Plan"], tabla)
+                    self.assertGreater(len(nodos), 0)
+                    for nodo in nodos:
+                        self.assertIn(nodo["Node Type"], LECTURAS_CON_INDICE, json.dumps(plan, indent=2))
+        finally:
+            database.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 Unit tests for listas de acuerdos
 """
 
+import base64
+import json
 import unittest
 
 import requests
@@ -51,6 +53,67 @@ class TestListasDeAcuerdos(unittest.TestCase):
             self.assertEqual("rag_fue_sintetizado_tiempo" in item, True)
             self.assertEqual("rag_fue_categorizado_tiempo" in item, True)
 
+    def test_get_listas_de_acuerdos_cursor(self):
+        """Test que la página siguiente con cursor sea igual a la de offset"""
+
+        # Consultar la primera página y la segunda con offset
+        try:
+            primera = requests.get(
+                url=f"{config['api_base_url']}/api/v5/listas_de_acuerdos",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params={"limit": 10},
+                timeout=config["timeout"],
+            )
+            segunda_offset = requests.get(
+                url=f"{config['api_base_url']}/api/v5/listas_de_acuerdos",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params={"limit": 10, "offset": 10},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(segunda_offset.status_code, 200)
+
+        # Validar que se entregue el cursor de la página siguiente
+        contenido = primera.json()
+        self.assertEqual("next_cursor" in contenido, True)
+        if contenido["next_cursor"] is None:
+            return
+
+        # Consultar la segunda página con el cursor
+        try:
+            segunda_cursor = requests.get(
+                url=f"{config['api_base_url']}/api/v5/listas_de_acuerdos",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params={"limit": 10, "cursor": contenido["next_cursor"]},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(segunda_cursor.status_code, 200)
+
+        # Validar que sean los mismos registros
+        ids_offset = [item["id"] for item in segunda_offset.json()["data"]]
+        ids_cursor = [item["id"] for item in segunda_cursor.json()["data"]]
+        self.assertEqual(ids_cursor, ids_offset)
+
+    def test_get_listas_de_acuerdos_cursor_no_valido(self):
+        """Test que un cursor mal formado se rechace con 400"""
+        for valores in ([5, 3], ["2024-01-01", True], ["no-es-fecha", 1], [None, 1], [1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(valores).encode("utf-8")).decode("ascii").rstrip("=")
+            with self.subTest(valores=valores):
+                try:
+                    response = requests.get(
+                        url=f"{config['api_base_url']}/api/v5/listas_de_acuerdos",
+                        headers={"Authorization": f"Bearer {oauth2_token}"},
+                        params={"limit": 10, "cursor": cursor},
+                        timeout=config["timeout"],
+                    )
+                except requests.exceptions.RequestException as error:
+                    self.fail(error)
+                self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit Tests Métricas
+"""
+
+import unittest
+
+import requests
+
+from tests import config, oauth2_token
+
+
+class TestMetricas(unittest.TestCase):
+    """Tests Metricas class"""
+
+    def test_get_pool(self):
+        """Test get pool"""
+
+        # Consultar
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/metricas/pool",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(response.status_code, 200)
+
+        # Validar el contenido de la respuesta
+        contenido = response.json()
+        self.assertEqual(contenido["success"], True)
+
+        # Validar los datos
+        self.assertEqual(type(contenido["data"]), list)
+        for item in contenido["data"]:
+            self.assertEqual("checked_out" in item, True)
+            self.assertEqual("idle" in item, True)
+            self.assertEqual("overflow" in item, True)
+            self.assertEqual("wait_seconds_max" in item, True)
+
+    def test_get_caches(self):
+        """Test get caches"""
+
+        # Consultar
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/metricas/caches",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(response.status_code, 200)
+
+        # Validar el contenido de la respuesta
+        contenido = response.json()
+        self.assertEqual(contenido["success"], True)
+
+        # Validar los datos
+        nombres = [item["nombre"] for item in contenido["data"]]
+        self.assertEqual("usuarios" in nombres, True)
+        self.assertEqual("versiones" in nombres, True)
+        for item in contenido["data"]:
+            self.assertEqual("hits" in item, True)
+            self.assertEqual("misses" in item, True)
+            self.assertEqual("redis_errors" in item, True)
+
+
+if __name__ == "__main__":
+    unittest.main()
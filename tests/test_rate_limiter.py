@@ -0,0 +1,201 @@
+"""
+Unit Tests Rate Limiter
+"""
+
+import unittest
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from pjecz_hercules_api_oauth2.dependencies.database import async_engine
+from pjecz_hercules_api_oauth2.dependencies.exceptions import MyTooManyRequestsError
+from pjecz_hercules_api_oauth2.dependencies.rate_limiter import (
+    LoginRateLimiter,
+    MemoryTokenBucketBackend,
+    RedisTokenBucketBackend,
+    get_client_ip,
+    get_login_rate_limiter,
+)
+from pjecz_hercules_api_oauth2.main import app
+from tests import config
+
+
+class Reloj:
+    """Reloj que sólo avanza cuando se le indica, reemplaza a time en el limitador"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self) -> float:
+        return self.ahora
+
+    def time(self) -> float:
+        return self.ahora
+
+    def avanzar(self, segundos: float) -> None:
+        self.ahora += segundos
+
+
+class TestMemoryTokenBucket(unittest.IsolatedAsyncioTestCase):
+    """Tests Memory Token Bucket class"""
+
+    async def asyncSetUp(self):
+        self.reloj = Reloj()
+        self.patcher = patch("pjecz_hercules_api_oauth2.dependencies.rate_limiter.time", self.reloj)
+        self.patcher.start()
+        self.backend = MemoryTokenBucketBackend()
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+
+    async def test_rafaga(self):
+        """Test se permiten tantas solicitudes seguidas como la capacidad y la siguiente espera una ficha"""
+        for _ in range(5):
+            self.assertEqual(await self.backend.take("llave", capacity=5, rate=5 / 60), 0.0)
+        self.assertAlmostEqual(await self.backend.take("llave", capacity=5, rate=5 / 60), 12.0)
+
+    async def test_recarga(self):
+        """Test las fichas se recargan según pasa el tiempo, sin rebasar la capacidad"""
+        for _ in range(5):
+            await self.backend.take("llave", capacity=5, rate=5 / 60)
+        self.reloj.avanzar(12)
+        self.assertEqual(await self.backend.take("llave", capacity=5, rate=5 / 60), 0.0)
+        self.assertGreater(await self.backend.take("llave", capacity=5, rate=5 / 60), 0.0)
+
+        # Después de mucho tiempo sólo se tiene la capacidad
+        self.reloj.avanzar(3600)
+        esperas = [await self.backend.take("llave", capacity=5, rate=5 / 60) for _ in range(6)]
+        self.assertEqual(esperas[:5], [0.0] * 5)
+        self.assertGreater(esperas[5], 0.0)
+
+
+class TestLoginRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Tests Login Rate Limiter class"""
+
+    async def asyncSetUp(self):
+        self.reloj = Reloj()
+        self.patcher = patch("pjecz_hercules_api_oauth2.dependencies.rate_limiter.time", self.reloj)
+        self.patcher.start()
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+
+    async def test_por_usuario(self):
+        """Test el límite por usuario no distingue mayúsculas ni espacios y entrega los segundos a esperar"""
+        limitador = LoginRateLimiter(MemoryTokenBucketBackend(), username_per_minute=2, ip_per_minute=0)
+        await limitador.check("uno@pjecz.gob.mx", "10.0.0.1")
+        await limitador.check("UNO@pjecz.gob.mx ", "10.0.0.2")
+        with self.assertRaises(MyTooManyRequestsError) as contexto:
+            await limitador.check("uno@pjecz.gob.mx", "10.0.0.3")
+        self.assertEqual(contexto.exception.retry_after, 30)
+
+        # Otro usuario no está limitado
+        await limitador.check("dos@pjecz.gob.mx", "10.0.0.1")
+
+    async def test_por_ip(self):
+        """Test el límite por IP cuenta los intentos de todos los usuarios"""
+        limitador = LoginRateLimiter(MemoryTokenBucketBackend(), username_per_minute=0, ip_per_minute=3)
+        for usuario in ("uno", "dos", "tres"):
+            await limitador.check(f"{usuario}@pjecz.gob.mx", "10.0.0.1")
+        with self.assertRaises(MyTooManyRequestsError) as contexto:
+            await limitador.check("cuatro@pjecz.gob.mx", "10.0.0.1")
+        self.assertEqual(contexto.exception.retry_after, 20)
+
+        # Otra IP no está limitada
+        await limitador.check("cuatro@pjecz.gob.mx", "10.0.0.2")
+
+    async def test_limite_cero(self):
+        """Test un límite en cero lo desactiva"""
+        backend = MemoryTokenBucketBackend()
+        limitador = LoginRateLimiter(backend, username_per_minute=0, ip_per_minute=0)
+        for _ in range(100):
+            await limitador.check("uno@pjecz.gob.mx", "10.0.0.1")
+        self.assertIsNone(backend.buckets.get("login:username:uno@pjecz.gob.mx"))
+        self.assertIsNone(backend.buckets.get("login:ip:10.0.0.1"))
+
+
+class TestRedisTokenBucket(unittest.IsolatedAsyncioTestCase):
+    """Tests Redis Token Bucket class, el script Lua en fakeredis compartido como si fueran dos workers"""
+
+    async def asyncSetUp(self):
+        self.reloj = Reloj()
+        self.patcher = patch("pjecz_hercules_api_oauth2.dependencies.rate_limiter.time", self.reloj)
+        self.patcher.start()
+        self.redis = FakeAsyncRedis()
+        self.fallback = MemoryTokenBucketBackend()
+        self.worker_a = RedisTokenBucketBackend(self.redis, fallback=self.fallback)
+        self.worker_b = RedisTokenBucketBackend(self.redis, fallback=self.fallback)
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+        await self.redis.aclose()
+
+    async def test_rafaga_y_recarga_entre_workers(self):
+        """Test las fichas se comparten entre workers y se recargan según pasa el tiempo"""
+        for worker in (self.worker_a, self.worker_b, self.worker_a):
+            self.assertEqual(await worker.take("llave", capacity=3, rate=3 / 60), 0.0)
+        self.assertAlmostEqual(await self.worker_b.take("llave", capacity=3, rate=3 / 60), 20.0)
+        self.reloj.avanzar(20)
+        self.assertEqual(await self.worker_a.take("llave", capacity=3, rate=3 / 60), 0.0)
+
+        # Se usó Redis, no la memoria del proceso
+        self.assertIsNone(self.fallback.buckets.get("llave"))
+
+    async def test_caduca_la_llave(self):
+        """Test la llave caduca cuando la cubeta ya estaría llena"""
+        await self.worker_a.take("llave", capacity=3, rate=3 / 60)
+        self.assertEqual(await self.redis.ttl("rate_limiter:llave"), 60)
+
+
+class TestGetClientIp(unittest.TestCase):
+    """Tests get_client_ip, X-Forwarded-For sólo con proxies de confianza"""
+
+    def request(self, forwarded_for: str | None) -> Request:
+        """Solicitud desde 10.0.0.9 con el encabezado X-Forwarded-For"""
+        headers = [] if forwarded_for is None else [(b"x-forwarded-for", forwarded_for.encode("latin-1"))]
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.9", 5000)})
+
+    def test_sin_proxies(self):
+        """Test sin proxies de confianza se ignora X-Forwarded-For, el cliente lo puede escribir"""
+        self.assertEqual(get_client_ip(self.request("1.1.1.1"), 0), "10.0.0.9")
+        self.assertEqual(get_client_ip(self.request(None), 0), "10.0.0.9")
+
+    def test_con_proxies(self):
+        """Test con dos proxies, como el balanceador de Google, es la penúltima aunque el cliente agregue otras"""
+        self.assertEqual(get_client_ip(self.request("203.0.113.5, 35.191.0.1"), 2), "203.0.113.5")
+        self.assertEqual(get_client_ip(self.request("1.1.1.1, 203.0.113.5, 35.191.0.1"), 2), "203.0.113.5")
+        self.assertEqual(get_client_ip(self.request("203.0.113.5"), 1), "203.0.113.5")
+
+    def test_con_menos_ips_que_proxies(self):
+        """Test si no pasó por todos los proxies se usa la IP de la conexión"""
+        self.assertEqual(get_client_ip(self.request("203.0.113.5"), 2), "10.0.0.9")
+        self.assertEqual(get_client_ip(self.request(None), 2), "10.0.0.9")
+
+
+class TestLoginRetryAfter(unittest.TestCase):
+    """Tests Retry-After del login"""
+
+    def setUp(self):
+        """Cada TestClient tiene su propio ciclo de eventos, no se pueden reusar las conexiones asíncronas de otro"""
+        async_engine.sync_engine.dispose(close=False)
+
+    def tearDown(self):
+        app.dependency_overrides.pop(get_login_rate_limiter, None)
+
+    def test_retry_after(self):
+        """Test Retry-After tiene los segundos que calcula el limitador"""
+        limitador = LoginRateLimiter(MemoryTokenBucketBackend(), username_per_minute=1, ip_per_minute=0)
+        app.dependency_overrides[get_login_rate_limiter] = lambda: limitador
+        datos = {"username": config["username"], "password": config["password"]}
+        with TestClient(app) as client:
+            self.assertEqual(client.post("/token", data=datos).status_code, 200)
+            response = client.post("/token", data=datos)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["retry-after"]), 55)
+        self.assertLessEqual(int(response.headers["retry-after"]), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
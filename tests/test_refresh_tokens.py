@@ -0,0 +1,140 @@
+"""
+Unit Tests Refresh Tokens
+"""
+
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from pjecz_hercules_api_oauth2.config.settings import get_settings
+from pjecz_hercules_api_oauth2.dependencies.exceptions import MyAuthenticationError, MyConnectionError
+from pjecz_hercules_api_oauth2.dependencies.refresh_tokens import (
+    MemoryRefreshTokenStore,
+    get_refresh_token_store,
+    issue_refresh_token,
+    rotate_refresh_token,
+)
+from pjecz_hercules_api_oauth2.main import app
+
+
+class Reloj:
+    """Reloj que sólo avanza cuando se le indica, reemplaza a time en los refresh tokens y en TTLCache"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self) -> float:
+        return self.ahora
+
+    def time(self) -> float:
+        return self.ahora
+
+    def avanzar(self, segundos: float) -> None:
+        self.ahora += segundos
+
+
+class TestRotateRefreshToken(unittest.IsolatedAsyncioTestCase):
+    """Tests rotate_refresh_token con MemoryRefreshTokenStore"""
+
+    async def asyncSetUp(self):
+        self.settings = get_settings()
+        self.reloj = Reloj()
+        self.patchers = [
+            patch("pjecz_hercules_api_oauth2.dependencies.refresh_tokens.time", self.reloj),
+            patch("pjecz_hercules_api_oauth2.dependencies.ttl_cache.time", self.reloj),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.store = MemoryRefreshTokenStore()
+
+    async def asyncTearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    async def test_rotacion(self):
+        """Test al usar un refresh token se entrega otro de la misma familia con el tiempo que le queda"""
+        primero, segundos = await issue_refresh_token(self.settings, self.store, "uno@pjecz.gob.mx")
+        self.assertEqual(segundos, self.settings.REFRESH_TOKEN_EXPIRE_SECONDS)
+        self.reloj.avanzar(100)
+        username, segundo, segundos = await rotate_refresh_token(self.settings, self.store, primero)
+        self.assertEqual(username, "uno@pjecz.gob.mx")
+        self.assertNotEqual(segundo, primero)
+        self.assertEqual(segundos, self.settings.REFRESH_TOKEN_EXPIRE_SECONDS - 100)
+
+        # El nuevo también se puede usar una vez
+        username, _, _ = await rotate_refresh_token(self.settings, self.store, segundo)
+        self.assertEqual(username, "uno@pjecz.gob.mx")
+
+    async def test_reuso_revoca_la_familia(self):
+        """Test si se usa de nuevo un refresh token se revocan todos los de su familia"""
+        primero, _ = await issue_refresh_token(self.settings, self.store, "uno@pjecz.gob.mx")
+        _, segundo, _ = await rotate_refresh_token(self.settings, self.store, primero)
+        with self.assertRaises(MyAuthenticationError):
+            await rotate_refresh_token(self.settings, self.store, primero)
+        with self.assertRaises(MyAuthenticationError):
+            await rotate_refresh_token(self.settings, self.store, segundo)
+
+        # Otra familia no se revoca
+        otro, _ = await issue_refresh_token(self.settings, self.store, "uno@pjecz.gob.mx")
+        await rotate_refresh_token(self.settings, self.store, otro)
+
+    async def test_caducado(self):
+        """Test un refresh token caducado no es válido"""
+        refresh_token, _ = await issue_refresh_token(self.settings, self.store, "uno@pjecz.gob.mx")
+        self.reloj.avanzar(self.settings.REFRESH_TOKEN_EXPIRE_SECONDS + 1)
+        with self.assertRaises(MyAuthenticationError):
+            await rotate_refresh_token(self.settings, self.store, refresh_token)
+
+    async def test_vida_de_la_familia(self):
+        """Test rotar no extiende la vida de la familia más allá de la del primer refresh token"""
+        refresh_token, _ = await issue_refresh_token(self.settings, self.store, "uno@pjecz.gob.mx")
+        for _ in range(3):
+            self.reloj.avanzar(self.settings.REFRESH_TOKEN_EXPIRE_SECONDS // 4)
+            _, refresh_token, segundos = await rotate_refresh_token(self.settings, self.store, refresh_token)
+        self.assertLessEqual(segundos, self.settings.REFRESH_TOKEN_EXPIRE_SECONDS // 4 + 1)
+        self.reloj.avanzar(segundos + 1)
+        with self.assertRaises(MyAuthenticationError):
+            await rotate_refresh_token(self.settings, self.store, refresh_token)
+
+
+class StoreCaido(MemoryRefreshTokenStore):
+    """Almacén que no responde, como Redis caído"""
+
+    async def get(self, token_hash: str) -> dict | None:
+        raise MyConnectionError("No se pudo consultar el refresh token")
+
+
+class TestRefreshTokenGrant(unittest.TestCase):
+    """Tests grant_type refresh_token de /token, no consulta la base de datos si el refresh token no es válido"""
+
+    def tearDown(self):
+        app.dependency_overrides.pop(get_refresh_token_store, None)
+
+    def post(self, refresh_token: str):
+        """Solicitar el token con el refresh token"""
+        with TestClient(app) as client:
+            return client.post("/token", data={"grant_type": "refresh_token", "refresh_token": refresh_token})
+
+    def test_no_valido(self):
+        """Test un refresh token que no existe recibe 401"""
+        app.dependency_overrides[get_refresh_token_store] = MemoryRefreshTokenStore
+        response = self.post("no-existe")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.headers["www-authenticate"], "Bearer")
+
+    def test_almacen_caido(self):
+        """Test si no responde el almacén recibe 503, no 401"""
+        app.dependency_overrides[get_refresh_token_store] = StoreCaido
+        response = self.post("cualquiera")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("retry-after", response.headers)
+
+    def test_sin_redis(self):
+        """Test sin almacén, porque no hay Redis, recibe 400"""
+        app.dependency_overrides[get_refresh_token_store] = lambda: None
+        self.assertEqual(self.post("cualquiera").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Unit Tests Response Cache
+"""
+
+import unittest
+
+import requests
+
+from tests import config, oauth2_token
+
+
+class TestResponseCache(unittest.TestCase):
+    """Tests Response Cache class"""
+
+    def test_respuesta_guardada(self):
+        """Test la respuesta guardada es igual a la primera y respeta If-None-Match"""
+        for url in ("/api/v5/roles", "/api/v5/modulos?limit=5", "/api/v5/materias_tipos_juicios"):
+            with self.subTest(url=url):
+                respuestas = []
+                for _ in range(2):
+                    try:
+                        respuestas.append(
+                            requests.get(
+                                url=f"{config['api_base_url']}{url}",
+                                headers={"Authorization": f"Bearer {oauth2_token}"},
+                                timeout=config["timeout"],
+                            )
+                        )
+                    except requests.exceptions.RequestException as error:
+                        self.fail(error)
+                primera, segunda = respuestas
+                self.assertEqual(primera.status_code, 200)
+                self.assertEqual(segunda.status_code, 200)
+                self.assertEqual(primera.json(), segunda.json())
+                self.assertEqual(primera.headers["etag"], segunda.headers["etag"])
+
+                # Sin el token no se entrega aunque esté guardada
+                response = requests.get(url=f"{config['api_base_url']}{url}", timeout=config["timeout"])
+                self.assertEqual(response.status_code, 401)
+
+                # Con el ETag se recibe 304
+                response = requests.get(
+                    url=f"{config['api_base_url']}{url}",
+                    headers={"Authorization": f"Bearer {oauth2_token}", "If-None-Match": segunda.headers["etag"]},
+                    timeout=config["timeout"],
+                )
+                self.assertEqual(response.status_code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
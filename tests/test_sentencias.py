@@ -55,6 +55,26 @@ class TestSentencias(unittest.TestCase):
             self.assertEqual("rag_fue_sintetizado_tiempo" in item, True)
             self.assertEqual("rag_fue_categorizado_tiempo" in item, True)
 
+    def test_get_sentencias_sin_total(self):
+        """Test get sentencias sin contar el total"""
+
+        # Consultar
+        try:
+            response = requests.get(
+                url=f"{config['api_base_url']}/api/v5/sentencias",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params={"total": "none"},
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+        self.assertEqual(response.status_code, 200)
+
+        # Validar que no se entregue el total y que se entregue has_more
+        contenido = response.json()
+        self.assertEqual(contenido["total"], None)
+        self.assertEqual(type(contenido["has_more"]), bool)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit Tests Sparse Fieldsets
+"""
+
+import unittest
+
+import requests
+
+from pjecz_hercules_api_oauth2.dependencies.sparse_fieldsets import page_columns
+from pjecz_hercules_api_oauth2.main import app  # noqa: F401, para que se registren todos los modelos
+from pjecz_hercules_api_oauth2.models.edictos import Edicto
+from pjecz_hercules_api_oauth2.models.sentencias import Sentencia
+from tests import config, oauth2_token
+
+
+class TestSparseFieldsets(unittest.TestCase):
+    """Tests Sparse Fieldsets class"""
+
+    def get(self, ruta: str, params: dict) -> requests.Response:
+        """Consultar la ruta con los parámetros"""
+        try:
+            return requests.get(
+                url=f"{config['api_base_url']}/api/v5/{ruta}",
+                headers={"Authorization": f"Bearer {oauth2_token}"},
+                params=params,
+                timeout=config["timeout"],
+            )
+        except requests.exceptions.RequestException as error:
+            self.fail(error)
+
+    def test_paginado_con_fields(self):
+        """Test paginado de sentencias sólo con los campos solicitados"""
+        response = self.get("sentencias", {"fields": "id,fecha,autoridad_clave,url", "limit": 10})
+        self.assertEqual(response.status_code, 200)
+        contenido = response.json()
+        self.assertEqual(contenido["success"], True)
+        self.assertIn("total", contenido)
+        for item in contenido["data"]:
+            self.assertEqual(set(item.keys()), {"id", "fecha", "autoridad_clave", "url"})
+
+    def test_paginado_de_catalogo_con_fields(self):
+        """Test paginado de roles sólo con el nombre"""
+        response = self.get("roles", {"fields": "nombre"})
+        self.assertEqual(response.status_code, 200)
+        contenido = response.json()
+        self.assertEqual(contenido["success"], True)
+        for item in contenido["data"]:
+            self.assertEqual(list(item.keys()), ["nombre"])
+
+    def test_detalle_con_fields(self):
+        """Test detalle de una sentencia sólo con los campos solicitados, incluso de sus relaciones"""
+        response = self.get("sentencias", {"fields": "id", "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        if len(data) == 0:
+            self.skipTest("No hay sentencias")
+        response = self.get(f"sentencias/{data[0]['id']}", {"fields": "id,distrito_clave"})
+        self.assertEqual(response.status_code, 200)
+        contenido = response.json()
+        self.assertEqual(contenido["success"], True)
+        self.assertEqual(set(contenido["data"].keys()), {"id", "distrito_clave"})
+        self.assertEqual(contenido["data"]["id"], data[0]["id"])
+
+    def test_fields_no_valido(self):
+        """Test un campo que no existe recibe 400"""
+        response = self.get("sentencias", {"fields": "id,no_existe"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestPageColumns(unittest.TestCase):
+    """Tests page_columns, el SELECT del paginado sin JOIN a los catálogos"""
+
+    def tablas(self, modelo, campos: tuple[str, ...] | None) -> set[str]:
+        """Tablas en el FROM del SELECT compilado"""
+        sql = str(page_columns(modelo, campos, [modelo.id]))
+        return {tabla for tabla in ("autoridades", "distritos", "materias_tipos_juicios", "materias") if f" {tabla}" in sql}
+
+    def test_sin_campos_de_catalogos(self):
+        """Test sin campos de los catálogos no se consultan sus tablas ni las llaves foráneas"""
+        consulta = page_columns(Sentencia, ("id", "fecha", "url"), [Sentencia.id])
+        self.assertEqual(list(consulta.selected_columns.keys()), ["id", "fecha", "url"])
+        self.assertEqual(self.tablas(Sentencia, ("id", "fecha", "url")), set())
+
+    def test_campos_de_catalogos(self):
+        """Test con campos de los catálogos sólo se agregan las llaves foráneas, no sus tablas"""
+        consulta = page_columns(Sentencia, ("distrito_clave", "materia_tipo_juicio_descripcion"), [Sentencia.id])
+        self.assertEqual(list(consulta.selected_columns.keys()), ["id", "autoridad_id", "materia_tipo_juicio_id"])
+        self.assertEqual(self.tablas(Sentencia, ("distrito_clave", "materia_tipo_juicio_descripcion")), set())
+
+    def test_todos_los_campos(self):
+        """Test sin fields están todas las columnas de la tabla del esquema y tampoco hay JOIN"""
+        consulta = page_columns(Edicto, None, [Edicto.id])
+        self.assertIn("autoridad_id", consulta.selected_columns.keys())
+        self.assertNotIn("autoridad_clave", consulta.selected_columns.keys())
+        self.assertEqual(self.tablas(Edicto, None), set())
+        self.assertNotIn("JOIN", str(consulta))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Unit Tests Two Level Cache
+"""
+
+import asyncio
+import unittest
+
+from fakeredis import FakeAsyncRedis
+
+from pjecz_hercules_api_oauth2.dependencies.two_level_cache import TwoLevelCache
+
+
+class TestTwoLevelCache(unittest.IsolatedAsyncioTestCase):
+    """Tests Two Level Cache class, con fakeredis compartido como si fueran dos workers"""
+
+    async def asyncSetUp(self):
+        """Crear dos cachés con el mismo Redis"""
+        self.redis = FakeAsyncRedis()
+        self.worker_a = TwoLevelCache("pruebas", self.redis, "secreto", max_size=10, ttl_seconds=60)
+        self.worker_b = TwoLevelCache("pruebas", self.redis, "secreto", max_size=10, ttl_seconds=60)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_get_set_entre_workers(self):
+        """Test lo que guarda un worker lo lee el otro"""
+        await self.worker_a.set("llave", {"valor": 1})
+        self.assertEqual(await self.worker_b.get("llave"), {"valor": 1})
+        self.assertEqual(self.worker_b.stats()["redis_hits"], 1)
+
+        # La segunda vez se lee de la memoria del proceso
+        self.assertEqual(await self.worker_b.get("llave"), {"valor": 1})
+        self.assertEqual(self.worker_b.stats()["redis_hits"], 1)
+
+    async def test_invalidate_tag(self):
+        """Test invalidar por etiqueta elimina sólo las llaves con esa etiqueta"""
+        await self.worker_a.set("uno", 1, tags=["usuario:uno@pjecz.gob.mx"])
+        await self.worker_a.set("dos", 2, tags=["usuario:dos@pjecz.gob.mx"])
+        self.assertEqual(await self.worker_a.invalidate_tag("usuario:uno@pjecz.gob.mx"), 1)
+        self.assertIsNone(await self.worker_b.get("uno"))
+        self.assertEqual(await self.worker_b.get("dos"), 2)
+
+        # Limpiar elimina todo el espacio de nombres en Redis, en la memoria del otro worker caduca por su tiempo
+        await self.worker_a.clear()
+        self.assertIsNone(await self.worker_a.get("dos"))
+        self.assertEqual(await self.redis.exists("cache:pruebas:dos"), 0)
+
+    async def test_get_or_set_carga_una_vez(self):
+        """Test con muchas solicitudes a la vez en dos workers se carga una sola vez"""
+        cargas = 0
+
+        async def cargar():
+            nonlocal cargas
+            cargas += 1
+            await asyncio.sleep(0.1)
+            return "cargado"
+
+        resultados = await asyncio.gather(
+            *[worker.get_or_set("llave", cargar) for worker in (self.worker_a, self.worker_b) for _ in range(10)]
+        )
+        self.assertEqual(resultados, ["cargado"] * 20)
+        self.assertEqual(cargas, 1)
+
+    async def test_firma_no_valida(self):
+        """Test un valor con otra clave secreta no se deserializa"""
+        otro = TwoLevelCache("pruebas", self.redis, "otro secreto", max_size=10, ttl_seconds=60)
+        await otro.set("llave", "valor")
+        self.assertIsNone(await self.worker_a.get("llave"))
+
+    async def test_sin_redis(self):
+        """Test sin Redis funciona con la memoria del proceso"""
+        local = TwoLevelCache("pruebas", None, "secreto", max_size=10, ttl_seconds=60)
+        self.assertEqual(await local.get_or_set("llave", lambda: asyncio.sleep(0, "valor")), "valor")
+        self.assertEqual(await local.get("llave"), "valor")
+        self.assertEqual(local.invalidate_tag_nowait("pruebas"), 1)
+        self.assertIsNone(await local.get("llave"))
+
+
+if __name__ == "__main__":
+    unittest.main()